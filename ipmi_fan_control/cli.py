@@ -1,37 +1,69 @@
 """CLI interface for Dell IPMI fan control."""
 
+import atexit
+import contextlib
+import functools
+import inspect
 import json
+import os
+import shlex
 import shutil
+import signal
 import sys
+import threading
 import time
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional
 
 import typer
-import yaml
 
-# Try to use the ipmitool implementation first, fallback to python-ipmi if not available
 try:
-    # Check if ipmitool is installed
-    if shutil.which("ipmitool"):
-        from ipmi_fan_control.ipmitool import (
-            DellIPMIToolFanController as IPMIController,
-        )
+    import orjson
+except ImportError:
+    orjson = None
 
-        USING_IPMITOOL = True
-    else:
-        from ipmi_fan_control.ipmi import DellIPMIFanController as IPMIController
+from ipmi_fan_control.enhanced_logger import logger
+from ipmi_fan_control.polling import MIN_SAFE_INTERVAL
+from ipmi_fan_control.sdr_cache import SDRCache
 
-        USING_IPMITOOL = False
-except ImportError:
-    from ipmi_fan_control.ipmi import DellIPMIFanController as IPMIController
+# Output keys and the matching controller reading keys per sensor type
+FAN_FIELDS = ("id", "name", "speed", "unit", "status")
+TEMP_FIELDS = ("id", "name", "temperature", "unit", "status")
+_FAN_VALUES = itemgetter("id", "name", "current_speed", "unit", "status")
+_TEMP_VALUES = itemgetter("id", "name", "current_temp", "unit", "status")
+_TEMP_FORMAT = (TEMP_FIELDS, _TEMP_VALUES)
+_SENSOR_FORMATS = {"fan": (FAN_FIELDS, _FAN_VALUES), "temperature": _TEMP_FORMAT}
 
-    USING_IPMITOOL = False
 
-import atexit
-import signal
+def dump_json(data: Any, indent: bool = False) -> str:
+    """Serialize data to JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    return json.dumps(data, indent=2 if indent else None)
 
-from ipmi_fan_control.enhanced_logger import logger
+
+@functools.lru_cache(maxsize=None)
+def _yaml_dumper() -> Any:
+    """Import PyYAML on first use and pick its fastest safe dumper."""
+    # libyaml-backed dumper when PyYAML was built with it (pure-Python otherwise)
+    try:
+        from yaml import CSafeDumper as SafeDumper
+    except ImportError:
+        from yaml import SafeDumper
+    return SafeDumper
+
+
+def dump_yaml(data: Any, sort_keys: bool = False) -> str:
+    """Serialize data to YAML, keeping keys in the same order as JSON output.
+
+    Args:
+        data: Data to serialize
+        sort_keys: Sort mapping keys instead (PyYAML's default)
+    """
+    import yaml
+
+    return yaml.dump(data, Dumper=_yaml_dumper(), sort_keys=sort_keys)
 
 
 class OutputFormat(str, Enum):
@@ -44,15 +76,90 @@ class OutputFormat(str, Enum):
 
 app = typer.Typer(help="Control fan speeds on Dell servers via IPMI")
 
+
+def _emit_json(data: Any, indent: bool = False) -> None:
+    """Print data as JSON."""
+    print(dump_json(data, indent=indent))
+
+
+def _emit_yaml(data: Any, indent: bool = False) -> None:
+    """Print data as YAML (always block style, so indent is ignored)."""
+    print(dump_yaml(data))
+
+
+def _emit_nothing(data: Any, indent: bool = False) -> None:
+    """Table output is rendered through the logger instead."""
+
+
+# Machine-readable output writer per format, resolved with a single lookup
+EMITTERS = {
+    OutputFormat.TABLE: _emit_nothing,
+    OutputFormat.JSON: _emit_json,
+    OutputFormat.YAML: _emit_yaml,
+}
+
+# Error envelopes with only the message left to fill in
+_JSON_ERROR_TEMPLATE = '{"error": %s}'
+_YAML_ERROR_TEMPLATE = "error: '%s'"
+
+
+def _emit_error(error_msg: str, output_format: OutputFormat) -> None:
+    """Print an error envelope, escaping just the message."""
+    if output_format == OutputFormat.JSON:
+        print(_JSON_ERROR_TEMPLATE % json.dumps(error_msg))
+    elif error_msg.isprintable():
+        # Single-quoted YAML scalars only need quotes doubled
+        print(_YAML_ERROR_TEMPLATE % error_msg.replace("'", "''"))
+    else:
+        _emit_yaml({"error": error_msg})
+
+
+# IPMI backend class, selected on first use (tests may patch it directly)
+IPMIController = None
+
+
+@functools.lru_cache(maxsize=None)
+def _using_ipmitool() -> bool:
+    """Whether the ipmitool backend is used (ipmitool is on PATH)."""
+    return shutil.which("ipmitool") is not None
+
+
+def _controller_class():
+    """Import the IPMI backend on first use.
+
+    Prefers the ipmitool implementation and falls back to python-ipmi if
+    ipmitool is not installed.
+    """
+    global IPMIController
+    if IPMIController is None:
+        if _using_ipmitool():
+            from ipmi_fan_control.ipmitool import (
+                DellIPMIToolFanController as IPMIController,
+            )
+        else:
+            from ipmi_fan_control.ipmi import DellIPMIFanController as IPMIController
+    return IPMIController
+
 # Global variables for cleanup
 _controller = None
 _auto_restore = True
+_cleaned_up = False
+_signal_thread: Optional[threading.Thread] = None
+# Set while a command waits on shutdown_event and exits cleanly by itself
+_graceful_shutdown = False
+
+# Signals that stop the tool, and the event set when one arrives
+SHUTDOWN_SIGNALS = {signal.SIGINT, signal.SIGTERM}
+shutdown_event = threading.Event()
 
 
 def cleanup_and_restore():
     """Restore automatic fan control on exit."""
-    global _controller, _auto_restore
+    global _controller, _auto_restore, _cleaned_up
+    if _cleaned_up:
+        return
     if _controller and _auto_restore:
+        _cleaned_up = True
         try:
             logger.info("Restoring automatic fan control...")
             _controller.set_automatic_control()
@@ -61,23 +168,103 @@ def cleanup_and_restore():
             logger.warning(f"Failed to restore automatic control: {str(e)}")
 
 
+def _wait_for_signal():
+    """Wait for a shutdown signal, then restore fan control and exit.
+
+    Runs on a dedicated thread with the signals blocked everywhere else, so the
+    cleanup never interrupts an in-flight IPMI command.
+    """
+    while True:
+        signal.sigwait(SHUTDOWN_SIGNALS)
+        if _graceful_shutdown and not shutdown_event.is_set():
+            # The waiting command finishes on its own (and clears the event
+            # before it waits again); a second signal meanwhile forces exit
+            shutdown_event.set()
+            continue
+        break
+    shutdown_event.set()
+    cleanup_and_restore()
+    logger.flush()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
+
+
+@contextlib.contextmanager
+def _sigint_unblocked() -> Iterator[None]:
+    """Deliver Ctrl+C to the main thread as KeyboardInterrupt inside the block.
+
+    Once a command has installed the signal waiter, SIGINT is blocked here and
+    would restore fan control and exit; at the shell prompt it should only
+    discard the line. SIGTERM still goes to the waiter.
+    """
+    if _signal_thread is None:
+        yield
+        return
+    handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGINT})
+    try:
+        yield
+    finally:
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT})
+        signal.signal(signal.SIGINT, handler)
+
+
+def _forward_signal(signum, frame):
+    """Hand a signal over to the waiter thread.
+
+    Only runs for a signal delivered while a thread briefly has the signals
+    unblocked (around spawning ipmitool); the waiter picks it up with sigwait.
+    """
+    signal.pthread_kill(_signal_thread.ident, signum)
+
+
+def _signal_handler(signum, frame):
+    """Fallback signal handler for platforms without sigwait."""
+    shutdown_event.set()
+    if _graceful_shutdown:
+        return
+    cleanup_and_restore()
+    sys.exit(0)
+
+
+def _install_signal_handlers():
+    """Route SIGINT/SIGTERM to the cleanup path."""
+    global _signal_thread
+    if _signal_thread is not None:
+        return
+
+    if (
+        hasattr(signal, "pthread_sigmask")
+        and threading.current_thread() is threading.main_thread()
+    ):
+        # Block the signals before any worker thread starts so they inherit the mask
+        signal.pthread_sigmask(signal.SIG_BLOCK, SHUTDOWN_SIGNALS)
+        _signal_thread = threading.Thread(
+            target=_wait_for_signal, name="signal-waiter", daemon=True
+        )
+        _signal_thread.start()
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, _forward_signal)
+    else:
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, _signal_handler)
+
+
 def setup_cleanup(controller, auto_restore: bool):
     """Set up cleanup handlers."""
-    global _controller, _auto_restore
+    global _controller, _auto_restore, _cleaned_up
     _controller = controller
     _auto_restore = auto_restore
+    _cleaned_up = False
 
     if auto_restore:
-        # Register cleanup function for normal exit
+        # Register cleanup function for normal exit (once)
+        atexit.unregister(cleanup_and_restore)
         atexit.register(cleanup_and_restore)
 
-        # Register signal handlers for Ctrl+C and SIGTERM
-        def signal_handler(signum, frame):
-            cleanup_and_restore()
-            sys.exit(0)
-
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        # Handle Ctrl+C and SIGTERM
+        _install_signal_handlers()
 
 
 def connect_controller(controller, output_format):
@@ -85,10 +272,7 @@ def connect_controller(controller, output_format):
     if output_format == OutputFormat.TABLE:
         logger.status("Connecting to iDRAC...")
 
-    if USING_IPMITOOL:
-        controller.test_connection()
-    else:
-        controller.connect()
+    controller.connect()
 
 
 def handle_error(error_msg: str, output_format: OutputFormat, show_tips: bool = True):
@@ -97,20 +281,79 @@ def handle_error(error_msg: str, output_format: OutputFormat, show_tips: bool =
         logger.error(error_msg)
         if show_tips:
             logger.print_troubleshooting_tips()
-    elif output_format == OutputFormat.JSON:
-        print(json.dumps({"error": error_msg}))
-    elif output_format == OutputFormat.YAML:
-        print(yaml.dump({"error": error_msg}))
+    else:
+        _emit_error(error_msg, output_format)
 
 
 def disconnect_controller(controller, output_format: OutputFormat):
     """Helper function to disconnect controller safely."""
-    if not USING_IPMITOOL:
-        try:
-            controller.disconnect()
-        except Exception as disconnect_err:
-            if output_format == OutputFormat.TABLE:
-                logger.warning(f"Warning during disconnect: {str(disconnect_err)}")
+    try:
+        controller.disconnect()
+    except Exception as disconnect_err:
+        if output_format == OutputFormat.TABLE:
+            logger.warning(f"Warning during disconnect: {str(disconnect_err)}")
+
+
+class _IpmiSession:
+    """Lazily opened IPMI connection shared by everything in one invocation.
+
+    ``with session as controller:`` connects on first use and leaves the
+    connection open afterwards, so exit-time cleanup (restoring automatic fan
+    control) reuses it. The connection is closed by ``close()``, registered
+    with atexit by the CLI callback.
+    """
+
+    def __init__(self, controller, output_format: OutputFormat):
+        self.controller = controller
+        self.output_format = output_format
+        self._connected = False
+
+    def __enter__(self):
+        if not self._connected:
+            connect_controller(self.controller, self.output_format)
+            self._connected = True
+        return self.controller
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def close(self):
+        """Disconnect if a connection was opened."""
+        if self._connected:
+            self._connected = False
+            disconnect_controller(self.controller, self.output_format)
+
+
+def ipmi_command(error_message: str, show_tips: bool = True):
+    """Run a command with a connected controller and uniform error reporting.
+
+    The decorated function is called as ``fn(ctx, controller, ...)``; the
+    controller parameter is hidden from Typer. Any exception is reported as
+    ``"<error_message>: <exception>"`` in the selected output format and exits
+    with status 1.
+
+    Args:
+        error_message: Prefix of the error reported on failure
+        show_tips: Whether table output includes troubleshooting tips
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(ctx: typer.Context, *args, **kwargs):
+            try:
+                with ctx.obj["session"] as controller:
+                    return fn(ctx, controller, *args, **kwargs)
+            except Exception as e:
+                handle_error(
+                    f"{error_message}: {str(e)}", ctx.obj["output_format"], show_tips
+                )
+                sys.exit(1)
+
+        signature = inspect.signature(fn)
+        ctx_param, _controller_param, *params = signature.parameters.values()
+        wrapper.__signature__ = signature.replace(parameters=[ctx_param, *params])
+        return wrapper
+
+    return decorator
 
 
 @app.callback()
@@ -167,8 +410,18 @@ def callback(
         envvar="IPMI_OUTPUT_FORMAT",
         help="Output format (table, json, or yaml) (env: IPMI_OUTPUT_FORMAT)",
     ),
+    rediscover: bool = typer.Option(
+        False,
+        "--rediscover",
+        envvar="IPMI_REDISCOVER",
+        help="Ignore cached sensor discovery and re-read the SDR repository "
+             "(env: IPMI_REDISCOVER)",
+    ),
 ):
     """Set up IPMI connection parameters."""
+    # Log lines would corrupt JSON/YAML on stdout, so drop them early
+    logger.set_silent(output != OutputFormat.TABLE)
+
     # Configure logging if debug mode is enabled
     if debug:
         import logging
@@ -178,7 +431,7 @@ def callback(
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         )
         # Enable pyipmi debug logging if applicable
-        if not USING_IPMITOOL:
+        if not _using_ipmitool():
             try:
                 import pyipmi  # noqa: F401
 
@@ -191,25 +444,33 @@ def callback(
 
     # Show which IPMI implementation we're using
     if debug:
-        if USING_IPMITOOL:
+        if _using_ipmitool():
             logger.info("Using ipmitool implementation")
         else:
             logger.info("Using python-ipmi implementation")
 
     # Create controller instance
-    if USING_IPMITOOL:
+    controller_class = _controller_class()
+    sdr_cache = None
+    if _using_ipmitool():
+        # Sensor discovery is cached on disk between invocations
+        sdr_cache = SDRCache.for_host(host)
+        if rediscover:
+            sdr_cache.invalidate()
+
         # For ipmitool implementation
-        controller = IPMIController(
+        controller = controller_class(
             interface=interface,
             host=host,
             port=port,
             username=username,
             password=password,
             verify=False,  # Don't verify connection in constructor
+            sdr_cache=sdr_cache,
         )
     else:
         # For python-ipmi implementation
-        controller = IPMIController(
+        controller = controller_class(
             interface_type=interface,
             host=host,
             port=port,
@@ -217,11 +478,17 @@ def callback(
             password=password,
         )
 
-    # Store controller, output format, and auto_restore flag in context
+    # Share one connection between the command and exit-time cleanup
+    session = _IpmiSession(controller, output)
+    atexit.register(session.close)
+
+    # Store controller, session, output format, auto_restore flag and SDR cache
     ctx.obj = {
         "controller": controller,
+        "session": session,
         "output_format": output,
         "auto_restore": auto_restore,
+        "sdr_cache": sdr_cache,
     }
 
 
@@ -229,66 +496,33 @@ def format_sensor_data(
     sensors: List[Dict[str, Any]], sensor_type: str
 ) -> List[Dict[str, Any]]:
     """Helper function to format sensor data for JSON/YAML output."""
-    clean_data = []
-    for sensor in sensors:
-        if sensor_type == "fan":
-            clean_sensor = {
-                "id": sensor["id"],
-                "name": sensor["name"],
-                "speed": sensor["current_speed"],
-                "unit": sensor["unit"],
-                "status": sensor["status"],
-            }
-        else:  # temperature
-            clean_sensor = {
-                "id": sensor["id"],
-                "name": sensor["name"],
-                "temperature": sensor["current_temp"],
-                "unit": sensor["unit"],
-                "status": sensor["status"],
-            }
-        clean_data.append(clean_sensor)
-    return clean_data
+    fields, values = _SENSOR_FORMATS.get(sensor_type, _TEMP_FORMAT)
+    return [dict(zip(fields, values(sensor))) for sensor in sensors]
 
 
 @app.command("status")
-def status(ctx: typer.Context):
+@ipmi_command("Error reading fan status")
+def status(ctx: typer.Context, controller):
     """Display current fan speeds."""
-    controller = ctx.obj["controller"]
     output_format = ctx.obj["output_format"]
 
-    try:
-        connect_controller(controller, output_format)
-
-        if output_format == OutputFormat.TABLE:
-            logger.status("Reading fan sensors...")
-
-        fans = controller.get_fan_speeds()
+    if output_format == OutputFormat.TABLE:
+        logger.status("Reading fan sensors...")
 
-        if not fans:
-            if output_format == OutputFormat.TABLE:
-                logger.warning("No fans detected in this system")
-            elif output_format == OutputFormat.JSON:
-                print(json.dumps({"fans": []}))
-            elif output_format == OutputFormat.YAML:
-                print(yaml.dump({"fans": []}))
-            return
+    fans = controller.get_fan_speeds()
 
-        # Format the results based on the selected output format
+    if not fans:
         if output_format == OutputFormat.TABLE:
-            logger.print_fan_data(fans)
-        elif output_format == OutputFormat.JSON:
-            clean_fans = format_sensor_data(fans, "fan")
-            print(json.dumps({"fans": clean_fans}, indent=2))
-        elif output_format == OutputFormat.YAML:
-            clean_fans = format_sensor_data(fans, "fan")
-            print(yaml.dump({"fans": clean_fans}, sort_keys=False))
+            logger.warning("No fans detected in this system")
+        EMITTERS[output_format]({"fans": []})
+        return
 
-    except Exception as e:
-        handle_error(f"Error reading fan status: {str(e)}", output_format)
-        sys.exit(1)
-    finally:
-        disconnect_controller(controller, output_format)
+    # Format the results based on the selected output format
+    if output_format == OutputFormat.TABLE:
+        logger.print_fan_data(fans)
+    else:
+        clean_fans = format_sensor_data(fans, "fan")
+        EMITTERS[output_format]({"fans": clean_fans}, indent=True)
 
 
 def output_result(
@@ -297,86 +531,50 @@ def output_result(
     """Helper function to output results consistently."""
     if output_format == OutputFormat.TABLE and success_msg:
         logger.success(success_msg)
-    elif output_format == OutputFormat.JSON:
-        print(json.dumps(result_data))
-    elif output_format == OutputFormat.YAML:
-        print(yaml.dump(result_data))
+    if output_format == OutputFormat.YAML:
+        # set/auto results have always been printed with sorted keys; scripts
+        # may compare them verbatim
+        print(dump_yaml(result_data, sort_keys=True))
+        return
+    EMITTERS[output_format](result_data)
 
 
 @app.command("set")
+@ipmi_command("Error setting fan speed", show_tips=False)
 def set_speed(
     ctx: typer.Context,
+    controller,
     percentage: int = typer.Argument(
         ..., min=0, max=100, help="Fan speed percentage (0-100)"
     ),
 ):
     """Set fan speed to a specific percentage."""
-    controller = ctx.obj["controller"]
     output_format = ctx.obj["output_format"]
     auto_restore = ctx.obj["auto_restore"]
 
     # Set up cleanup handlers
     setup_cleanup(controller, auto_restore)
 
-    try:
-        connect_controller(controller, output_format)
-        controller.set_fan_speed(percentage)
+    controller.set_fan_speed(percentage)
 
-        result_data = {"result": "success", "fan_speed": percentage}
-        output_result(result_data, output_format, f"Fan speed set to {percentage}%")
+    result_data = {"result": "success", "fan_speed": percentage}
+    output_result(result_data, output_format, f"Fan speed set to {percentage}%")
 
-        if output_format == OutputFormat.TABLE and auto_restore:
-            logger.info("Automatic fan control will be restored on exit")
-
-    except Exception as e:
-        handle_error(
-            f"Error setting fan speed: {str(e)}", output_format, show_tips=False
-        )
-        sys.exit(1)
-    finally:
-        disconnect_controller(controller, output_format)
+    if output_format == OutputFormat.TABLE and auto_restore:
+        logger.info("Automatic fan control will be restored on exit")
 
 
 @app.command("auto")
-def auto_control(ctx: typer.Context):
+@ipmi_command("Error enabling automatic fan control", show_tips=False)
+def auto_control(ctx: typer.Context, controller):
     """Enable automatic fan control."""
-    controller = ctx.obj["controller"]
-    output_format = ctx.obj["output_format"]
+    controller.set_automatic_control()
 
-    try:
-        # For ipmitool implementation, we need to test the connection
-        if USING_IPMITOOL:
-            controller.test_connection()
-        else:
-            controller.connect()
-
-        controller.set_automatic_control()
-
-        if output_format == OutputFormat.TABLE:
-            logger.success("Automatic fan control enabled")
-        elif output_format == OutputFormat.JSON:
-            print(json.dumps({"result": "success", "mode": "automatic"}))
-        elif output_format == OutputFormat.YAML:
-            print(yaml.dump({"result": "success", "mode": "automatic"}))
-
-    except Exception as e:
-        error_msg = f"Error enabling automatic fan control: {str(e)}"
-        if output_format == OutputFormat.TABLE:
-            logger.error(error_msg)
-        elif output_format == OutputFormat.JSON:
-            print(json.dumps({"error": error_msg}))
-        elif output_format == OutputFormat.YAML:
-            print(yaml.dump({"error": error_msg}))
-
-        sys.exit(1)
-    finally:
-        # Only disconnect for python-ipmi implementation
-        if not USING_IPMITOOL:
-            try:
-                controller.disconnect()
-            except Exception as disconnect_err:
-                if output_format == OutputFormat.TABLE:
-                    logger.warning(f"Warning during disconnect: {str(disconnect_err)}")
+    output_result(
+        {"result": "success", "mode": "automatic"},
+        ctx.obj["output_format"],
+        "Automatic fan control enabled",
+    )
 
 
 @app.command("test")
@@ -398,10 +596,10 @@ def test_compatibility(
     ),
 ):
     """Test Dell server compatibility."""
-    controller = ctx.obj["controller"]
     output_format = ctx.obj["output_format"]
 
     # Test mode only supports table output for now
+    logger.set_silent(False)
     if output_format != OutputFormat.TABLE:
         logger.warning("Note: Test mode only supports table output format")
 
@@ -410,26 +608,28 @@ def test_compatibility(
     try:
         # Step 1: Connect to the server
         logger.status("Testing connection to iDRAC...")
-        if USING_IPMITOOL:
-            controller.test_connection()
-
-            # Run diagnostics if requested
-            if diagnostic and USING_IPMITOOL:
-                logger.success("Connection OK")
-                logger.section_header("Running diagnostic tests...")
-
-                # Try various IPMI commands and show their output
-                commands = [
-                    "chassis status",
-                    "sensor reading",
-                    "sdr list",
-                    "mc info",
-                ]
-
-                for cmd in commands:
-                    logger.info(f"Testing command: {cmd}")
-                    try:
-                        output = controller._run_command(cmd)
+        with ctx.obj["session"] as controller:
+            if _using_ipmitool():
+                # Run diagnostics if requested
+                if diagnostic:
+                    logger.success("Connection OK")
+                    logger.section_header("Running diagnostic tests...")
+
+                    # Try various IPMI commands in one session and show their output
+                    commands = [
+                        "chassis status",
+                        "sensor reading",
+                        "sdr list",
+                        "mc info",
+                        "raw 0x30 0xF0",  # Dell get version command (read-only OEM)
+                    ]
+                    results = controller._run_command_batch(commands)
+
+                    for cmd, output, error in results[:-1]:
+                        logger.info(f"Testing command: {cmd}")
+                        if error:
+                            logger.error(f"Command failed: {error}")
+                            continue
                         logger.success("Command succeeded")
                         # Print the raw output with line numbers
                         for i, line in enumerate(output.strip().split("\n")):
@@ -440,181 +640,107 @@ def test_compatibility(
                             elif i == 10:
                                 logger.info("  ... (output truncated)")
                                 break
-                    except Exception as e:
-                        logger.error(f"Command failed: {str(e)}")
 
-                # Special test for raw OEM commands
-                logger.info("Testing Dell OEM commands:")
-                try:
-                    # Test getting the version of the OEM commands subsystem
-                    # This is usually a safe "read-only" OEM command
-                    cmd = "raw 0x30 0xF0"  # Dell get version command
-                    output = controller._run_command(cmd)
-                    logger.success(f"OEM command succeeded: {output}")
-                except Exception as e:
-                    logger.error(f"OEM command failed: {str(e)}")
-
-                logger.info("Diagnostics complete")
+                    # Special test for raw OEM commands
+                    logger.info("Testing Dell OEM commands:")
+                    _, output, error = results[-1]
+                    if error:
+                        logger.error(f"OEM command failed: {error}")
+                    else:
+                        logger.success(f"OEM command succeeded: {output}")
+
+                    logger.info("Diagnostics complete")
+                else:
+                    logger.success("Connection OK")
             else:
                 logger.success("Connection OK")
-        else:
-            controller.connect()
-            logger.success("Connection OK")
-
-        # Step 2: Read fan speeds
-        logger.status("Testing reading fan speeds...")
-        fans = controller.get_fan_speeds()
-        if not fans:
-            logger.warning("No fans detected")
-        else:
-            logger.success(f"Found {len(fans)} fans")
-
-        # Step 3: Read temperatures
-        logger.status("Testing reading temperature sensors...")
-        temps = controller.get_temperature_sensors()
-        if not temps:
-            logger.warning("No temperature sensors detected")
-        else:
-            logger.success(f"Found {len(temps)} temperature sensors")
-
-        # Skip if quick test
-        if not quick:
-            # Step 4: Test manual fan control
-            logger.status("Testing manual fan control...")
-            # Set manual fan control
-            controller._set_manual_mode()
-            logger.success("Manual mode enabled")
-
-            # Step 5: Set fan speed to 50%
-            logger.status("Testing setting fan speed to 50%...")
-            controller.set_fan_speed(50)
-            logger.success("Fan speed set successfully")
-
-            # Brief pause to let fans adjust
-            time.sleep(2)
-
-            # Step 6: Return to automatic control
-            logger.status("Testing return to automatic control...")
-            controller.set_automatic_control()
-            logger.success("Automatic control restored")
-
-        # Overall result
-        logger.section_header(
-            "✓ Compatibility test passed! Your Dell server appears to be compatible."
-        )
-        logger.info("Detected hardware:")
 
-        # Display fan info
-        if fans:
-            logger.print_fan_data(fans)
+            # Step 2: Read fan speeds and temperatures in a single pass
+            logger.status("Testing reading fan speeds and temperature sensors...")
+            sensors = controller.get_all_sensors()
+            fans = sensors["fans"]
+            if not fans:
+                logger.warning("No fans detected")
+            else:
+                logger.success(f"Found {len(fans)} fans")
 
-        # Display temperature info
-        if temps:
-            logger.print_temperature_data(temps)
+            # Step 3: Report temperatures
+            temps = sensors["temps"]
+            if not temps:
+                logger.warning("No temperature sensors detected")
+            else:
+                logger.success(f"Found {len(temps)} temperature sensors")
+
+            # Skip if quick test
+            if not quick:
+                # Step 4: Test manual fan control
+                logger.status("Testing manual fan control...")
+                # Set manual fan control
+                controller._set_manual_mode()
+                logger.success("Manual mode enabled")
+
+                # Step 5: Set fan speed to 50%
+                logger.status("Testing setting fan speed to 50%...")
+                controller.set_fan_speed(50)
+                logger.success("Fan speed set successfully")
+
+                # Brief pause to let fans adjust
+                time.sleep(2)
+
+                # Step 6: Return to automatic control
+                logger.status("Testing return to automatic control...")
+                controller.set_automatic_control()
+                logger.success("Automatic control restored")
+
+            # Overall result
+            logger.section_header(
+                "✓ Compatibility test passed! Your Dell server appears to be compatible."
+            )
+            logger.info("Detected hardware:")
+
+            # Display fan info
+            if fans:
+                logger.print_fan_data(fans)
+
+            # Display temperature info
+            if temps:
+                logger.print_temperature_data(temps)
 
     except Exception as e:
         logger.error(f"Compatibility test failed: {str(e)}")
         logger.print_troubleshooting_tips()
         sys.exit(1)
-    finally:
-        # Only disconnect for python-ipmi implementation
-        if not USING_IPMITOOL:
-            try:
-                controller.disconnect()
-            except Exception:
-                pass
 
 
 @app.command("temp")
-def temp_status(ctx: typer.Context):
+@ipmi_command("Error reading temperature status")
+def temp_status(ctx: typer.Context, controller):
     """Display current temperature sensors."""
-    controller = ctx.obj["controller"]
     output_format = ctx.obj["output_format"]
 
-    try:
-        if output_format == OutputFormat.TABLE:
-            logger.status("Connecting to iDRAC...")
-
-        # For ipmitool implementation, we need to test the connection
-        if USING_IPMITOOL:
-            controller.test_connection()
-        else:
-            controller.connect()
-
-        if output_format == OutputFormat.TABLE:
-            logger.status("Reading temperature sensors...")
-
-        temps = controller.get_temperature_sensors()
-
-        if not temps:
-            if output_format == OutputFormat.TABLE:
-                logger.warning("No temperature sensors detected")
-            elif output_format == OutputFormat.JSON:
-                print(json.dumps({"temperatures": []}))
-            elif output_format == OutputFormat.YAML:
-                print(yaml.dump({"temperatures": []}))
-            return
+    if output_format == OutputFormat.TABLE:
+        logger.status("Reading temperature sensors...")
 
-        # Format the results based on the selected output format
-        if output_format == OutputFormat.TABLE:
-            logger.print_temperature_data(temps)
-
-        elif output_format == OutputFormat.JSON:
-            # Clean up temperature data for JSON output
-            clean_temps = []
-            for temp in temps:
-                clean_temp = {
-                    "id": temp["id"],
-                    "name": temp["name"],
-                    "temperature": temp["current_temp"],
-                    "unit": temp["unit"],
-                    "status": temp["status"],
-                }
-                clean_temps.append(clean_temp)
-
-            # Output formatted JSON
-            print(json.dumps({"temperatures": clean_temps}, indent=2))
-
-        elif output_format == OutputFormat.YAML:
-            # Clean up temperature data for YAML output
-            clean_temps = []
-            for temp in temps:
-                clean_temp = {
-                    "id": temp["id"],
-                    "name": temp["name"],
-                    "temperature": temp["current_temp"],
-                    "unit": temp["unit"],
-                    "status": temp["status"],
-                }
-                clean_temps.append(clean_temp)
-
-            # Output formatted YAML
-            print(yaml.dump({"temperatures": clean_temps}, sort_keys=False))
+    temps = controller.get_temperature_sensors()
 
-    except Exception as e:
-        error_msg = f"Error reading temperature status: {str(e)}"
+    if not temps:
         if output_format == OutputFormat.TABLE:
-            logger.error(error_msg)
-            logger.print_troubleshooting_tips()
-        elif output_format == OutputFormat.JSON:
-            print(json.dumps({"error": error_msg}))
-        elif output_format == OutputFormat.YAML:
-            print(yaml.dump({"error": error_msg}))
+            logger.warning("No temperature sensors detected")
+        EMITTERS[output_format]({"temperatures": []})
+        return
 
-        sys.exit(1)
-    finally:
-        # Only disconnect for python-ipmi implementation
-        if not USING_IPMITOOL:
-            try:
-                controller.disconnect()
-            except Exception as disconnect_err:
-                if output_format == OutputFormat.TABLE:
-                    logger.warning(f"Warning during disconnect: {str(disconnect_err)}")
+    # Format the results based on the selected output format
+    if output_format == OutputFormat.TABLE:
+        logger.print_temperature_data(temps)
+    else:
+        clean_temps = format_sensor_data(temps, "temperature")
+        EMITTERS[output_format]({"temperatures": clean_temps}, indent=True)
 
 
 @app.command("pid")
 def pid_control(
     ctx: typer.Context,
+    *,
     target_temp: float = typer.Option(
         60.0,
         "--target",
@@ -659,6 +785,20 @@ def pid_control(
         envvar="IPMI_PID_MAX_SPEED",
         help="Maximum fan speed percentage (env: IPMI_PID_MAX_SPEED)",
     ),
+    max_backoff: float = typer.Option(
+        4.0,
+        "--max-backoff",
+        envvar="IPMI_PID_MAX_BACKOFF",
+        help="Maximum sensor poll interval while temperatures are stable, as a "
+             "multiple of --interval (env: IPMI_PID_MAX_BACKOFF)",
+    ),
+    min_delta: float = typer.Option(
+        1.0,
+        "--min-delta",
+        envvar="IPMI_PID_MIN_DELTA",
+        help="Smallest fan speed change (in percent) written to the BMC "
+             "(env: IPMI_PID_MIN_DELTA)",
+    ),
     runtime: Optional[int] = typer.Option(
         None,
         "--time",
@@ -668,6 +808,7 @@ def pid_control(
     ),
 ):
     """Run temperature-based fan control with PID controller."""
+    global _graceful_shutdown
     controller = ctx.obj["controller"]
     output_format = ctx.obj["output_format"]
     auto_restore = ctx.obj["auto_restore"]
@@ -676,64 +817,129 @@ def pid_control(
     setup_cleanup(controller, auto_restore)
 
     # PID controller only supports table output format
+    logger.set_silent(False)
     if output_format != OutputFormat.TABLE:
         logger.warning("Note: PID control only supports table output format")
 
     try:
-        # For ipmitool implementation, we need to test the connection
-        if USING_IPMITOOL:
-            controller.test_connection()
-        else:
-            controller.connect()
+        with ctx.obj["session"] as controller:
+
+            # Configure PID controller
+            controller.configure_pid(p_gain, i_gain, d_gain, min_speed, max_speed)
+            controller.set_target_temperature(target_temp)
+            controller.set_monitor_interval(interval)
+            controller.set_max_backoff(max_backoff)
+            controller.set_min_speed_delta(min_delta)
+
+            if interval < MIN_SAFE_INTERVAL:
+                logger.warning(
+                    f"Polling the BMC more often than every {MIN_SAFE_INTERVAL:g}s can "
+                    "hurt its responsiveness and skew sensor readings"
+                )
+
+            logger.section_header(
+                f"PID Temperature Control - Target: {target_temp}°C | Interval: {interval}s"
+            )
+
+            if auto_restore:
+                logger.info("Automatic fan control will be restored on exit")
+
+            def update_display(status):
+                """Callback for updating the display."""
+                logger.print_pid_status(status)
+
+            # Status lines are flushed in batches when not on a terminal
+            with logger.buffered():
+                # A signal that stopped an earlier run (e.g. in the shell)
+                # must not end this one
+                shutdown_event.clear()
+
+                # Start monitoring
+                controller.start_temperature_monitoring(
+                    target_temp=target_temp, interval=interval, callback=update_display
+                )
+
+                if not runtime:
+                    logger.info("PID control started. Press Ctrl+C to stop...")
+
+                # Run for the specified duration or until a shutdown signal
+                _graceful_shutdown = True
+                try:
+                    # --time 0 means no limit, like leaving it out
+                    shutdown_event.wait(timeout=runtime or None)
+                finally:
+                    # Ensure we stop monitoring when done
+                    _graceful_shutdown = False
+                    controller.stop_temperature_monitoring()
+                    logger.success("PID temperature control stopped")
 
-        # Configure PID controller
-        controller.configure_pid(p_gain, i_gain, d_gain, min_speed, max_speed)
-        controller.set_target_temperature(target_temp)
-        controller.set_monitor_interval(interval)
+    except Exception as e:
+        logger.error(f"Error in PID temperature control: {str(e)}")
+        sys.exit(1)
 
-        logger.section_header(
-            f"PID Temperature Control - Target: {target_temp}°C | Interval: {interval}s"
-        )
 
-        if auto_restore:
-            logger.info("Automatic fan control will be restored on exit")
+SHELL_EXIT_COMMANDS = {"exit", "quit"}
 
-        def update_display(status):
-            """Callback for updating the display."""
-            logger.print_pid_status(status)
 
-        # Start monitoring
-        controller.start_temperature_monitoring(
-            target_temp=target_temp, interval=interval, callback=update_display
-        )
+def run_shell_line(ctx: typer.Context, line: str) -> None:
+    """Run one shell line as a command against the shared context.
 
+    Only the subcommand's own options are parsed; the callback, controller and
+    connection of the enclosing invocation are reused as-is.
+    """
+    args = shlex.split(line)
+    if not args:
+        return
+
+    name, args = args[0], args[1:]
+    command = ctx.parent.command.get_command(ctx, name) if ctx.parent else None
+    if command is None or name == "shell":
+        logger.error(f"Unknown command: {name}")
+        return
+
+    try:
+        # A fresh context per command, sharing the controller and session
+        command.main(args, prog_name=name, obj=ctx.obj)
+    except SystemExit:
+        # Raised on completion, and after usage errors or failures are reported
+        pass
+    finally:
+        # Commands like test and pid force logging back on
+        logger.set_silent(ctx.obj["output_format"] != OutputFormat.TABLE)
+
+
+@app.command("shell")
+def shell(ctx: typer.Context):
+    """Run several commands over one connection (reads commands from stdin)."""
+    interactive = sys.stdin.isatty()
+    if interactive:
         try:
-            if runtime:
-                # Run for specified duration
-                time.sleep(runtime)
-            else:
-                # Run until interrupted
-                logger.info("PID control started. Press Ctrl+C to stop...")
-                while True:
-                    time.sleep(0.5)
-        except KeyboardInterrupt:
+            import readline  # noqa: F401  (line editing and history for input())
+        except ImportError:
             pass
-        finally:
-            # Ensure we stop monitoring when done
-            controller.stop_temperature_monitoring()
-            logger.success("PID temperature control stopped")
 
-    except Exception as e:
-        logger.error(f"Error in PID temperature control: {str(e)}")
-        sys.exit(1)
-    finally:
-        # Only disconnect for python-ipmi implementation
-        if not USING_IPMITOOL:
-            try:
-                if hasattr(controller, "disconnect"):
-                    controller.disconnect()
-            except Exception:
-                pass
+        logger.info("Type a command (status, temp, set 50, auto, ...) or 'exit'")
+
+    prompt = "ipmi-fan-control> " if interactive else ""
+    while True:
+        # Ctrl+C discards the line at the prompt and stops a running pid;
+        # during any other command it ends the shell
+        try:
+            with _sigint_unblocked():
+                line = input(prompt)
+        except EOFError:
+            break
+        except KeyboardInterrupt:
+            if interactive:
+                typer.echo()
+            continue
+
+        if line.strip() in SHELL_EXIT_COMMANDS:
+            break
+        try:
+            run_shell_line(ctx, line)
+        except ValueError as e:
+            logger.error(f"Invalid command line: {str(e)}")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,122 @@
 """Enhanced logging using Rich's logging handler."""
 
+import bisect
+import contextlib
+import functools
 import logging
-from typing import Any, Dict, List
+import time
+from collections import OrderedDict
+from logging.handlers import MemoryHandler
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 
 from rich.console import Console
 from rich.logging import RichHandler
+from rich.markup import render
+
+# Number of distinct PID status lines kept pre-rendered
+PID_STATUS_CACHE_SIZE = 16
+
+# Sensor status colors (anything else is red)
+_STATUS_COLORS = {
+    "ok": "green",
+    "normal": "green",
+    "good": "green",
+    "warning": "yellow",
+    "caution": "yellow",
+}
+
+# Color bands: a value below thresholds[i] gets colors[i], above all the last one
+_FAN_RPM_THRESHOLDS = (2000, 4000)
+_FAN_RPM_COLORS = ("green", "yellow", "red")
+_TEMP_THRESHOLDS = (40, 60, 80)
+_TEMP_COLORS = ("green", "yellow", "magenta", "red")
+_PID_ERROR_THRESHOLDS = (1, 3)
+_PID_ERROR_COLORS = ("green", "yellow", "red")
+_PID_FAN_THRESHOLDS = (40, 70)
+_PID_FAN_COLORS = ("green", "yellow", "red")
+
+# Shown after connection failures
+_TROUBLESHOOTING_TIPS = (
+    "Verify iDRAC IP address, username, and password",
+    "Ensure network connectivity to the iDRAC",
+    "Check if IPMI over LAN is enabled in iDRAC settings",
+    "Try using the --interface parameter ('lan' or 'lanplus')",
+    "Make sure 'ipmitool' is installed on your system",
+    "Try installing ipmitool: 'sudo apt install ipmitool' or equivalent",
+)
+_TIP_ROW = "  [yellow]%d.[/yellow] %s"
+
+
+def _band_color(value: float, thresholds: Tuple[float, ...], colors: Tuple[str, ...]) -> str:
+    """Pick the color of the band a value falls in."""
+    return colors[bisect.bisect(thresholds, value)]
+
+
+@functools.lru_cache(maxsize=32)
+def _status_markup(status: str) -> str:
+    """Colored "(status)" suffix of a sensor row; sensors share few statuses."""
+    color = _STATUS_COLORS.get(status.lower(), "red")
+    return f"([{color}]{status}[/{color}])"
+
+
+def _clock_time() -> str:
+    """Format the local time as HH:MM:SS without going through strftime."""
+    now = time.localtime()
+    return f"{now.tm_hour:02d}:{now.tm_min:02d}:{now.tm_sec:02d}"
+
+
+class _DeferredFlushStream:
+    """Text stream wrapper that only honours every ``flush_every``-th flush.
+
+    Rich flushes its output file after every record; on a pipe or file that is
+    one write(2) per log line.
+    """
+
+    def __init__(self, stream: TextIO, flush_every: int):
+        self.stream = stream
+        self.flush_every = max(flush_every, 1)
+        self.pending = 0
+
+    def write(self, text: str) -> int:
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush_now()
+
+    def flush_now(self) -> None:
+        """Flush the underlying stream regardless of the count."""
+        self.pending = 0
+        self.stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+class _FastRichHandler(RichHandler):
+    """RichHandler that skips Rich's layout for routine records off a terminal.
+
+    Rendering a record through the console costs several hundred
+    microseconds, mostly in building its table layout. When output goes to a
+    pipe or file, INFO and DEBUG records only have their markup stripped and
+    are written as plain ``LEVEL    message`` lines; warnings and errors, and
+    everything on a terminal, still go through Rich.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno >= logging.WARNING or self.console.is_terminal:
+            super().emit(record)
+            return
+        try:
+            message = self.format(record)
+            if self.markup:
+                message = render(message).plain
+            stream = self.console.file
+            stream.write(f"{record.levelname:<8} {message}\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
 
 
 class EnhancedLogger:
@@ -22,13 +134,14 @@ class EnhancedLogger:
         # Set up the logger with Rich handler
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
+        self.logger.disabled = False
         
         # Remove existing handlers to avoid duplicates
         for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
         
         # Add Rich handler
-        rich_handler = RichHandler(
+        rich_handler = _FastRichHandler(
             console=self.console,
             show_time=False,
             show_path=False,
@@ -37,38 +150,117 @@ class EnhancedLogger:
         )
         rich_handler.setFormatter(logging.Formatter(fmt="%(message)s"))
         self.logger.addHandler(rich_handler)
+        self.handler = rich_handler
+        
+        # Record buffer and stream installed by buffered(), if active
+        self._memory_handler: Optional[MemoryHandler] = None
+        self._buffered_stream: Optional[_DeferredFlushStream] = None
+        
+        # Rendered PID status lines keyed on (temperature, target, fan speed)
+        self._pid_status_cache: "OrderedDict[Tuple[float, float, int], str]" = (
+            OrderedDict()
+        )
+    
+    @property
+    def silent(self) -> bool:
+        """Whether all output is currently suppressed."""
+        return self.logger.disabled
+    
+    def set_silent(self, silent: bool = True) -> None:
+        """Suppress (or restore) all output.
+
+        Used for machine-readable output formats, where log lines would
+        corrupt stdout. A disabled logger returns before any record is
+        created or rendered.
+
+        Args:
+            silent: Whether to suppress output
+        """
+        self.logger.disabled = silent
+    
+    @contextlib.contextmanager
+    def buffered(self, flush_every: int = 10) -> Iterator[None]:
+        """Write output in batches of a few lines while the context is active.
+
+        Records are held in a MemoryHandler and rendered together once
+        ``flush_every`` have accumulated (or immediately for warnings and
+        errors), with a single flush of the output stream per batch. Meant for
+        long-running, high-frequency output such as PID status lines; terminal
+        output stays line by line.
+
+        Args:
+            flush_every: Number of log lines per batch
+        """
+        stream = self.console.file
+        if stream.isatty():
+            yield
+            return
+        
+        memory_handler = MemoryHandler(
+            flush_every, flushLevel=logging.WARNING, target=self.handler
+        )
+        self._buffered_stream = _DeferredFlushStream(stream, flush_every)
+        self.console.file = self._buffered_stream
+        self._memory_handler = memory_handler
+        self.logger.removeHandler(self.handler)
+        self.logger.addHandler(memory_handler)
+        try:
+            yield
+        finally:
+            self.flush()
+            self.logger.removeHandler(memory_handler)
+            self.logger.addHandler(self.handler)
+            memory_handler.close()
+            self._memory_handler = self._buffered_stream = None
+            # Follow sys.stdout again, as the console does by default
+            self.console.file = None
+    
+    def flush(self) -> None:
+        """Write out any log records held back by buffered()."""
+        if self._memory_handler is not None:
+            self._memory_handler.flush()
+        if self._buffered_stream is not None:
+            self._buffered_stream.flush_now()
     
     def debug(self, message: str) -> None:
         """Log debug message."""
-        self.logger.debug(f"[dim cyan]🔍 {message}[/dim cyan]")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"[dim cyan]🔍 {message}[/dim cyan]")
     
     def info(self, message: str) -> None:
         """Log info message."""
-        self.logger.info(f"[white]{message}[/white]")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"[white]{message}[/white]")
     
     def success(self, message: str) -> None:
         """Log success message."""
-        self.logger.info(f"[green]✓ {message}[/green]")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"[green]✓ {message}[/green]")
     
     def warning(self, message: str) -> None:
         """Log warning message."""
-        self.logger.warning(f"[yellow]⚠ {message}[/yellow]")
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(f"[yellow]⚠ {message}[/yellow]")
     
     def error(self, message: str) -> None:
         """Log error message."""
-        self.logger.error(f"[red]✗ {message}[/red]")
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(f"[red]✗ {message}[/red]")
     
     def critical(self, message: str) -> None:
         """Log critical message."""
-        self.logger.critical(f"[bold red]✗ {message}[/bold red]")
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.critical(f"[bold red]✗ {message}[/bold red]")
     
     def status(self, message: str) -> None:
         """Log status message."""
-        self.logger.info(f"[cyan]→ {message}[/cyan]")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"[cyan]→ {message}[/cyan]")
     
     def section_header(self, title: str) -> None:
         """Print a section header."""
-        self.logger.info(f"\n[bold cyan]═══ {title} ═══[/bold cyan]")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"\n[bold cyan]═══ {title} ═══[/bold cyan]")
     
     def print_fan_data(self, fans: List[Dict[str, Any]]) -> None:
         """Print fan data in a structured format without tables.
@@ -76,41 +268,32 @@ class EnhancedLogger:
         Args:
             fans: List of fan dictionaries
         """
+        if self.silent:
+            return
         if not fans:
             self.warning("No fans detected in this system")
             return
         
         self.section_header("Dell Server Fan Status")
         
+        # All rows go out as one record, rendered and written once
+        lines = []
         for fan in fans:
-            # Color status based on value
-            status = fan['status'].lower()
-            if status in ['ok', 'normal', 'good']:
-                status_color = "green"
-            elif status in ['warning', 'caution']:
-                status_color = "yellow"
-            else:
-                status_color = "red"
-            
             # Color speed based on level (assuming RPM values)
             speed = fan['current_speed']
             if isinstance(speed, (int, float)):
-                if speed < 2000:
-                    speed_color = "green"
-                elif speed < 4000:
-                    speed_color = "yellow"
-                else:
-                    speed_color = "red"
+                speed_color = _band_color(speed, _FAN_RPM_THRESHOLDS, _FAN_RPM_COLORS)
             else:
                 speed_color = "white"
             
-            self.logger.info(
+            lines.append(
                 f"  [cyan]{fan['id']}[/cyan] "
                 f"[bold white]{fan['name']}[/bold white]: "
                 f"[{speed_color}]{speed}[/{speed_color}] "
                 f"[blue]{fan['unit']}[/blue] "
-                f"([{status_color}]{fan['status']}[/{status_color}])"
+                f"{_status_markup(fan['status'])}"
             )
+        self.logger.info("\n".join(lines))
     
     def print_temperature_data(self, temps: List[Dict[str, Any]]) -> None:
         """Print temperature data in a structured format without tables.
@@ -118,43 +301,32 @@ class EnhancedLogger:
         Args:
             temps: List of temperature sensor dictionaries
         """
+        if self.silent:
+            return
         if not temps:
             self.warning("No temperature sensors detected")
             return
         
         self.section_header("Dell Server Temperature Status")
         
+        # All rows go out as one record, rendered and written once
+        lines = []
         for temp in temps:
             # Color temperature based on value
             temp_val = temp['current_temp']
             if isinstance(temp_val, (int, float)):
-                if temp_val < 40:
-                    temp_color = "green"
-                elif temp_val < 60:
-                    temp_color = "yellow"
-                elif temp_val < 80:
-                    temp_color = "magenta"
-                else:
-                    temp_color = "red"
+                temp_color = _band_color(temp_val, _TEMP_THRESHOLDS, _TEMP_COLORS)
             else:
                 temp_color = "white"
             
-            # Color status based on value
-            status = temp['status'].lower()
-            if status in ['ok', 'normal', 'good']:
-                status_color = "green"
-            elif status in ['warning', 'caution']:
-                status_color = "yellow"
-            else:
-                status_color = "red"
-            
-            self.logger.info(
+            lines.append(
                 f"  [cyan]{temp['id']}[/cyan] "
                 f"[bold white]{temp['name']}[/bold white]: "
                 f"[{temp_color}]{temp_val}[/{temp_color}] "
                 f"[blue]{temp['unit']}[/blue] "
-                f"([{status_color}]{temp['status']}[/{status_color}])"
+                f"{_status_markup(temp['status'])}"
             )
+        self.logger.info("\n".join(lines))
     
     def print_pid_status(self, status: Dict[str, Any]) -> None:
         """Print PID controller status.
@@ -162,61 +334,67 @@ class EnhancedLogger:
         Args:
             status: Status dictionary with temperature, target, and fan_speed
         """
-        temp = status.get('temperature', 0)
-        target = status.get('target', 0)
-        fan_speed = status.get('fan_speed', 0)
+        # Also covers silent mode; skips the formatting and strftime
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        body = self._format_pid_status(
+            status.get('temperature', 0),
+            status.get('target', 0),
+            status.get('fan_speed', 0),
+        )
+        
+        self.logger.info(f"[dim white]{_clock_time()}[/dim white] | {body}")
+    
+    def _format_pid_status(self, temp: float, target: float, fan_speed: int) -> str:
+        """Build the markup of a PID status line, minus the timestamp.
+
+        Temperatures rarely change between PID ticks, so recent lines are
+        kept in a small LRU cache keyed on the displayed values.
+
+        Args:
+            temp: Current temperature
+            target: Target temperature
+            fan_speed: Fan speed percentage
+
+        Returns:
+            Rich markup for the status line
+        """
+        key = (temp, target, fan_speed)
+        cache = self._pid_status_cache
+        body = cache.get(key)
+        if body is not None:
+            cache.move_to_end(key)
+            return body
+        
         error = temp - target
         
-        # Color temperature based on how close to target
-        if abs(error) < 1:
-            temp_color = "green"
-        elif abs(error) < 3:
-            temp_color = "yellow"
-        else:
-            temp_color = "red"
+        # Color temperature and error by how close to target
+        temp_color = error_color = _band_color(
+            abs(error), _PID_ERROR_THRESHOLDS, _PID_ERROR_COLORS
+        )
         
         # Color fan speed based on level
-        if fan_speed < 40:
-            fan_color = "green"
-        elif fan_speed < 70:
-            fan_color = "yellow"
-        else:
-            fan_color = "red"
-        
-        # Color error based on magnitude
-        if abs(error) < 1:
-            error_color = "green"
-        elif abs(error) < 3:
-            error_color = "yellow"
-        else:
-            error_color = "red"
-        
-        import time
-        timestamp = time.strftime("%H:%M:%S")
-        
-        self.logger.info(
-            f"[dim white]{timestamp}[/dim white] | "
+        fan_color = _band_color(fan_speed, _PID_FAN_THRESHOLDS, _PID_FAN_COLORS)
+        
+        body = (
             f"Temp: [{temp_color}]{temp:.1f}°C[/{temp_color}] | "
             f"Target: [cyan]{target:.1f}°C[/cyan] | "
             f"Fan: [{fan_color}]{fan_speed}%[/{fan_color}] | "
             f"Error: [{error_color}]{error:+.1f}°C[/{error_color}]"
         )
+        cache[key] = body
+        if len(cache) > PID_STATUS_CACHE_SIZE:
+            cache.popitem(last=False)
+        return body
     
     def print_troubleshooting_tips(self) -> None:
         """Print troubleshooting tips."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         self.section_header("Troubleshooting Tips")
         
-        tips = [
-            "Verify iDRAC IP address, username, and password",
-            "Ensure network connectivity to the iDRAC", 
-            "Check if IPMI over LAN is enabled in iDRAC settings",
-            "Try using the --interface parameter ('lan' or 'lanplus')",
-            "Make sure 'ipmitool' is installed on your system",
-            "Try installing ipmitool: 'sudo apt install ipmitool' or equivalent"
-        ]
-        
-        for i, tip in enumerate(tips, 1):
-            self.logger.info(f"  [yellow]{i}.[/yellow] {tip}")
+        for i, tip in enumerate(_TROUBLESHOOTING_TIPS, 1):
+            self.logger.info(_TIP_ROW, i, tip)
 
 
 # Global logger instance
@@ -1,14 +1,23 @@
 """IPMI interface for Dell server fan control."""
 
+import random
 import threading
 import time
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 import pyipmi
 import pyipmi.interfaces
 
+from ipmi_fan_control.enhanced_logger import logger
 from ipmi_fan_control.pid import PIDController
-from ipmi_fan_control.types import IPMIInterface, StatusCallback
+from ipmi_fan_control.polling import AdaptivePoller
+from ipmi_fan_control.types import (
+    FanSensor,
+    IPMIInterface,
+    StatusCallback,
+    TemperatureSensor,
+)
+from ipmi_fan_control.worker import MonitorWorker
 
 
 class DellIPMIFanController:
@@ -20,6 +29,9 @@ class DellIPMIFanController:
     IPMI_DELL_OEM_SET_FAN_SPEED_CMD = 0x31
     IPMI_DELL_OEM_SET_AUTO_FAN_CMD = 0x32
 
+    # Seconds before manual fan mode is sent again, in case the BMC reverted it
+    MANUAL_MODE_REASSERT = 300.0
+
     def __init__(
         self,
         interface_type: str = "rmcp",
@@ -44,16 +56,31 @@ class DellIPMIFanController:
         self.username = username
         self.password = password
         self.connected = False
+        self._session_close: Optional[Callable[[], None]] = None  # Set by connect()
         
         # PID controller for temperature-based fan control
         self.pid = PIDController()
         self.target_temp = 60.0  # Default target temperature in celsius
         self.monitor_interval = 30.0  # Default monitoring interval in seconds
+        self.max_backoff = 4.0  # Max poll interval while stable, in intervals
+        self.min_speed_delta = 1.0  # Smallest fan speed change worth writing, in %
+        self.keepalive_ticks = 20  # Rewrite an unchanged speed after this many skips
+        self._last_speed: Optional[int] = None  # Last speed written to the BMC
+        self._manual_mode_enabled = False  # Whether the BMC is in manual fan mode
+        self._manual_mode_at = 0.0  # time.monotonic() it was last sent
         
         # Temperature monitoring
         self.monitoring = False
-        self.monitor_thread = None
+        self.monitor_worker = MonitorWorker(
+            lambda: self._temperature_monitor_loop(self.temp_callback),
+            name="temperature-monitor",
+        )
         self.temp_callback = None
+        self._stop_event = threading.Event()  # Set to stop the monitor thread
+        
+        # Discovered sensor objects, filled on first read
+        self._fan_sensors: Optional[List[Any]] = None
+        self._temp_sensors: Optional[List[Any]] = None
 
     def _create_interface(self, interface_type: str) -> IPMIInterface:
         """Create the IPMI interface based on type.
@@ -91,6 +118,7 @@ class DellIPMIFanController:
             except Exception as e:
                 raise RuntimeError(f"Failed to connect to iDRAC: {str(e)}")
                 
+            self._session_close = getattr(self.ipmi.session, "close", None)
             self.connected = True
         except Exception as e:
             self.connected = False
@@ -100,27 +128,123 @@ class DellIPMIFanController:
         """Close connection to iDRAC."""
         # Stop monitoring thread if running
         self.stop_temperature_monitoring()
+        self.monitor_worker.shutdown()
         
         # Close session - with safer error handling
-        try:
-            if hasattr(self.ipmi, "session"):
-                if hasattr(self.ipmi.session, "close"):
-                    try:
-                        # Make sure interface and session properties exist before using them
-                        if (hasattr(self.ipmi.session, "interface") and 
-                            self.ipmi.session.interface is not None and
-                            hasattr(self.ipmi.session.interface, "_session") and
-                            self.ipmi.session.interface._session is not None):
-                            self.ipmi.session.close()
-                    except AttributeError:
-                        # Safely handle case where interface or _session is missing or None
-                        pass
-        except Exception as e:
-            print(f"Warning: Could not close IPMI session cleanly: {str(e)}")
+        close = self._session_close
+        if close is None and self.connected:
+            close = getattr(getattr(self.ipmi, "session", None), "close", None)
+        if close is not None:
+            try:
+                close()
+            except AttributeError:
+                # No RMCP session was ever opened on the interface
+                pass
+            except Exception as e:
+                logger.warning(f"Could not close IPMI session cleanly: {str(e)}")
         
+        self._session_close = None
         self.connected = False
+        self._manual_mode_enabled = False
+        self.invalidate_sensor_cache()
+
+    def _get_sdr_repository(self) -> Any:
+        """Get the SDR repository, creating and caching it on first use.
+
+        Returns:
+            pyipmi SDR repository
+        """
+        # Try to access SDR repository directly
+        if hasattr(self.ipmi, "sdr_repository"):
+            return self.ipmi.sdr_repository
+
+        # If not available directly, try to initialize it
+        try:
+            # Attempt to get sdr repository from pyipmi
+            # This works for newer versions of pyipmi
+            from pyipmi.sdr import SdrRepository
+            sdr = SdrRepository(self.ipmi)
+            # Cache it for future use
+            self.ipmi.sdr_repository = sdr
+            return sdr
+        except (ImportError, AttributeError):
+            raise RuntimeError("Unable to access SDR repository. Check pyipmi version compatibility.")
+
+    def _discover_sensors(self) -> Tuple[List[Any], List[Any]]:
+        """Walk the SDR repository once and remember the fan and temperature sensors.
+
+        The sensor layout of a server does not change at runtime, so later
+        reads only query the remembered sensors.
 
-    def get_fan_speeds(self) -> List[Dict[str, Any]]:
+        Returns:
+            Tuple of (fan sensors, temperature sensors)
+        """
+        if self._fan_sensors is not None and self._temp_sensors is not None:
+            return self._fan_sensors, self._temp_sensors
+        
+        sdr = self._get_sdr_repository()
+        fans = []
+        temps = []
+        for sensor in sdr.get_sensor_list():
+            name = sensor.name.lower()
+            # Each sensor is classified once; fan names take precedence
+            if "fan" in name:
+                fans.append(sensor)
+            elif "temp" in name:
+                temps.append(sensor)
+        self._fan_sensors = fans
+        self._temp_sensors = temps
+        return fans, temps
+    
+    def invalidate_sensor_cache(self) -> None:
+        """Forget discovered sensors, walking the SDR repository again on next read."""
+        self._fan_sensors = None
+        self._temp_sensors = None
+    
+    @staticmethod
+    def _fan_reading(sensor: Any) -> FanSensor:
+        """Read a fan sensor."""
+        reading = sensor.read_sensor()
+        return {
+            "id": sensor.id,
+            "name": sensor.name,
+            "current_speed": reading.raw,
+            "unit": "RPM",
+            "status": reading.state
+        }
+    
+    @staticmethod
+    def _temp_reading(sensor: Any) -> TemperatureSensor:
+        """Read a temperature sensor."""
+        reading = sensor.read_sensor()
+        return {
+            "id": sensor.id,
+            "name": sensor.name,
+            "current_temp": reading.raw,
+            "unit": "Celsius",
+            "status": reading.state
+        }
+
+    def get_all_sensors(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get fan and temperature readings in a single pass over the SDR.
+
+        Returns:
+            Dictionary with "fans" and "temps" lists, in the same format as
+            get_fan_speeds() and get_temperature_sensors()
+        """
+        if not self.connected:
+            self.connect()
+        
+        try:
+            fan_sensors, temp_sensors = self._discover_sensors()
+            return {
+                "fans": [self._fan_reading(sensor) for sensor in fan_sensors],
+                "temps": [self._temp_reading(sensor) for sensor in temp_sensors],
+            }
+        except Exception as e:
+            raise RuntimeError(f"Failed to read sensor data: {str(e)}. Make sure you are connecting to a valid Dell iDRAC.") from e
+
+    def get_fan_speeds(self) -> List[FanSensor]:
         """Get current fan speeds from Dell server.
 
         Returns:
@@ -129,42 +253,15 @@ class DellIPMIFanController:
         if not self.connected:
             self.connect()
         
-        # Get SDR repository
         try:
-            # Try to access SDR repository directly
-            if hasattr(self.ipmi, "sdr_repository"):
-                sdr = self.ipmi.sdr_repository
-            else:
-                # If not available directly, try to initialize it
-                try:
-                    # Attempt to get sdr repository from pyipmi 
-                    # This works for newer versions of pyipmi
-                    from pyipmi.sdr import SdrRepository
-                    sdr = SdrRepository(self.ipmi)
-                    # Cache it for future use
-                    self.ipmi.sdr_repository = sdr
-                except (ImportError, AttributeError):
-                    raise RuntimeError("Unable to access SDR repository. Check pyipmi version compatibility.")
-            
-            # Find and return all fan sensors (Dell typically uses "Fan" prefix)
-            fans = []
-            for sensor in sdr.get_sensor_list():
-                if "fan" in sensor.name.lower():
-                    reading = sensor.read_sensor()
-                    fans.append({
-                        "id": sensor.id,
-                        "name": sensor.name,
-                        "current_speed": reading.raw,
-                        "unit": "RPM",
-                        "status": reading.state
-                    })
-            
-            return fans
+            # Fan sensors (Dell typically uses "Fan" prefix)
+            fan_sensors, _ = self._discover_sensors()
+            return [self._fan_reading(sensor) for sensor in fan_sensors]
         except Exception as e:
             # Provide more detailed error information
             raise RuntimeError(f"Failed to read fan data: {str(e)}. Make sure you are connecting to a valid Dell iDRAC.") from e
         
-    def get_temperature_sensors(self) -> List[Dict[str, Any]]:
+    def get_temperature_sensors(self) -> List[TemperatureSensor]:
         """Get temperature sensor readings from Dell server.
 
         Returns:
@@ -173,36 +270,9 @@ class DellIPMIFanController:
         if not self.connected:
             self.connect()
         
-        # Get SDR repository
         try:
-            # Try to access SDR repository directly
-            if hasattr(self.ipmi, "sdr_repository"):
-                sdr = self.ipmi.sdr_repository
-            else:
-                # If not available directly, try to initialize it
-                try:
-                    # Attempt to get sdr repository from pyipmi
-                    from pyipmi.sdr import SdrRepository
-                    sdr = SdrRepository(self.ipmi)
-                    # Cache it for future use
-                    self.ipmi.sdr_repository = sdr
-                except (ImportError, AttributeError):
-                    raise RuntimeError("Unable to access SDR repository. Check pyipmi version compatibility.")
-            
-            # Find and return all temperature sensors
-            temps = []
-            for sensor in sdr.get_sensor_list():
-                if any(term in sensor.name.lower() for term in ["temp", "temperature"]):
-                    reading = sensor.read_sensor()
-                    temps.append({
-                        "id": sensor.id,
-                        "name": sensor.name,
-                        "current_temp": reading.raw,
-                        "unit": "Celsius",
-                        "status": reading.state
-                    })
-            
-            return temps
+            _, temp_sensors = self._discover_sensors()
+            return [self._temp_reading(sensor) for sensor in temp_sensors]
         except Exception as e:
             # Provide more detailed error information
             raise RuntimeError(f"Failed to read temperature data: {str(e)}. Make sure you are connecting to a valid Dell iDRAC.") from e
@@ -213,12 +283,17 @@ class DellIPMIFanController:
         Returns:
             Highest temperature in Celsius
         """
-        temp_sensors = self.get_temperature_sensors()
-        if not temp_sensors:
-            return 0.0
+        if not self.connected:
+            self.connect()
         
-        max_temp = max(sensor["current_temp"] for sensor in temp_sensors)
-        return max_temp
+        try:
+            # Only the raw values are needed, so skip building sensor readings
+            _, temp_sensors = self._discover_sensors()
+            return max(
+                (sensor.read_sensor().raw for sensor in temp_sensors), default=0.0
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to read temperature data: {str(e)}. Make sure you are connecting to a valid Dell iDRAC.") from e
 
     def set_fan_speed(self, percentage: int) -> None:
         """Set Dell server fan speed to a specific percentage.
@@ -239,7 +314,13 @@ class DellIPMIFanController:
         # For Dell servers, this typically takes a percentage value
         # Note: The exact data bytes may need adjustment based on specific Dell model
         data = [percentage]
-        self.ipmi.raw_command(self.IPMI_DELL_OEM_NETFN, self.IPMI_DELL_OEM_SET_FAN_SPEED_CMD, *data)
+        try:
+            self.ipmi.raw_command(self.IPMI_DELL_OEM_NETFN, self.IPMI_DELL_OEM_SET_FAN_SPEED_CMD, *data)
+        except Exception:
+            # Whatever went wrong, send manual mode again on the next write
+            self._manual_mode_enabled = False
+            raise
+        self._last_speed = percentage
 
     def set_automatic_control(self) -> None:
         """Enable automatic fan control on Dell server."""
@@ -249,12 +330,21 @@ class DellIPMIFanController:
         # Dell-specific command to return fan control to automatic mode
         data = [0x01]  # Typically 0x01 means "enable automatic control"
         self.ipmi.raw_command(self.IPMI_DELL_OEM_NETFN, self.IPMI_DELL_OEM_SET_AUTO_FAN_CMD, *data)
+        self._last_speed = None
+        self._manual_mode_enabled = False
 
     def _set_manual_mode(self) -> None:
-        """Put Dell server fans in manual control mode."""
+        """Put Dell server fans in manual control mode, if not already."""
+        if (
+            self._manual_mode_enabled
+            and time.monotonic() - self._manual_mode_at < self.MANUAL_MODE_REASSERT
+        ):
+            return
         # Dell-specific command to enable manual fan control
         data = [0x01]  # Typically 0x01 means "enable manual control"
         self.ipmi.raw_command(self.IPMI_DELL_OEM_NETFN, self.IPMI_DELL_OEM_ENABLE_MANUAL_FAN_CMD, *data)
+        self._manual_mode_enabled = True
+        self._manual_mode_at = time.monotonic()
         
     def configure_pid(
         self,
@@ -294,22 +384,60 @@ class DellIPMIFanController:
         self.monitor_interval = interval
         self.pid.set_sample_time(interval)
     
+    def set_max_backoff(self, max_backoff: float) -> None:
+        """Set how far sensor polling may back off while readings are stable.
+
+        Args:
+            max_backoff: Maximum poll interval as a multiple of the monitoring interval
+        """
+        self.max_backoff = max_backoff
+    
+    def set_min_speed_delta(self, min_delta: float) -> None:
+        """Set the smallest fan speed change the monitor loop writes to the BMC.
+
+        Args:
+            min_delta: Minimum change in fan speed percentage
+        """
+        self.min_speed_delta = min_delta
+    
     def _temperature_monitor_loop(self, callback: Optional[StatusCallback] = None) -> None:
         """Background thread for temperature monitoring and fan control.
 
         Args:
             callback: Optional callback function for monitoring events
         """
-        while self.monitoring:
+        poller = AdaptivePoller(
+            self.get_highest_temperature, self.monitor_interval, self.max_backoff
+        )
+        skipped_writes = 0  # Ticks since the fan speed was last written
+        last_error: Optional[str] = None  # Identical errors in a row are logged once
+        repeats = 0
+        
+        # Bound once; the loop runs for as long as monitoring is on
+        compute = self.pid.compute
+        set_speed = self.set_fan_speed
+        wait = self._stop_event.wait
+        is_stopped = self._stop_event.is_set
+        
+        while not is_stopped():
             try:
-                # Get current highest temperature
-                current_temp = self.get_highest_temperature()
+                # Get current highest temperature (cached while stable)
+                current_temp = poller.read()
                 
                 # Calculate fan speed with PID
-                fan_speed = int(self.pid.compute(current_temp))
+                fan_speed = int(compute(current_temp))
                 
-                # Set fan speed
-                self.set_fan_speed(fan_speed)
+                # Set fan speed, skipping the BMC write if it barely changed;
+                # rewrite it now and then in case the BMC lost the setting
+                if (
+                    self._last_speed is None
+                    or abs(fan_speed - self._last_speed) >= self.min_speed_delta
+                    or skipped_writes >= self.keepalive_ticks
+                ):
+                    set_speed(fan_speed)
+                    skipped_writes = 0
+                else:
+                    skipped_writes += 1
                 
                 # Call callback if provided
                 if callback:
@@ -320,13 +448,28 @@ class DellIPMIFanController:
                     }
                     callback(status)
                 
-                # Sleep until next interval
-                time.sleep(self.monitor_interval)
+                if repeats:
+                    logger.warning(f"Previous monitor error repeated {repeats} more times")
+                last_error, repeats = None, 0
+                
+                # Sleep until next interval, waking up at once when stopped
+                if wait(self.monitor_interval):
+                    break
                 
             except Exception as e:
-                # Log error and continue
-                print(f"Error in temperature monitor: {str(e)}")
-                time.sleep(5)  # Short sleep before retry
+                # Log error and continue; a burst of identical errors is
+                # logged once, with a count when it ends
+                message = str(e)
+                if message == last_error:
+                    repeats += 1
+                else:
+                    if repeats:
+                        logger.warning(f"Previous monitor error repeated {repeats} more times")
+                    last_error, repeats = message, 0
+                    logger.error(f"Error in temperature monitor: {message}")
+                # Short sleep before retry, jittered so monitors do not retry in lockstep
+                if wait(5 + random.uniform(0, 1)):
+                    break
     
     def start_temperature_monitoring(
         self, 
@@ -340,10 +483,18 @@ class DellIPMIFanController:
             target_temp: Target temperature in Celsius (uses current value if None)
             interval: Monitoring interval in seconds (uses current value if None)
             callback: Optional callback for monitoring events
+
+        Raises:
+            RuntimeError: If the previous monitor loop has not exited yet
         """
         if self.monitoring:
             return
         
+        # A loop stuck in a slow BMC read can outlive stop_temperature_monitoring();
+        # it must not wake up with the new run's settings and a cleared stop event
+        if not self.monitor_worker.wait_idle(2.0):
+            raise RuntimeError("Previous temperature monitor loop is still running")
+        
         if not self.connected:
             self.connect()
         
@@ -359,18 +510,15 @@ class DellIPMIFanController:
         
         # Set manual fan control mode
         self._set_manual_mode()
+        self._last_speed = None
         
         # Store callback
         self.temp_callback = callback
         
-        # Start monitoring thread
+        # Start monitoring on the (reused) worker thread
         self.monitoring = True
-        self.monitor_thread = threading.Thread(
-            target=self._temperature_monitor_loop,
-            args=(callback,),
-            daemon=True
-        )
-        self.monitor_thread.start()
+        self._stop_event.clear()
+        self.monitor_worker.start()
     
     def stop_temperature_monitoring(self) -> None:
         """Stop temperature-based fan control and return to automatic control."""
@@ -379,8 +527,8 @@ class DellIPMIFanController:
         
         # Stop monitoring thread
         self.monitoring = False
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(2.0)  # Wait up to 2 seconds for thread to stop
+        self._stop_event.set()
+        self.monitor_worker.wait_idle(2.0)  # Wait up to 2 seconds for the loop to exit
         
         # Reset PID controller
         self.pid.set_auto_mode(False)
@@ -1,13 +1,136 @@
 """IPMI interface for Dell server fan control using ipmitool."""
 
+import contextlib
+import os
+import random
 import re
+import selectors
+import signal
 import subprocess
+import tempfile
 import threading
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
+from ipmi_fan_control.enhanced_logger import logger
 from ipmi_fan_control.pid import PIDController
-from ipmi_fan_control.types import StatusCallback
+from ipmi_fan_control.polling import AdaptivePoller
+from ipmi_fan_control.sdr_cache import SDRCache
+from ipmi_fan_control.types import FanSensor, StatusCallback, TemperatureSensor
+from ipmi_fan_control.worker import MonitorWorker
+
+# Prompt printed by ``ipmitool shell`` when it is ready for the next command
+SHELL_PROMPT = b"ipmitool> "
+
+# ipmitool output is ASCII in practice; decoded with a fixed codec rather than
+# the locale's, and undecodable bytes (e.g. in OEM sensor names) never raise
+OUTPUT_ENCODING = "utf-8"
+
+# Marker echoed before each command of an ``ipmitool exec`` batch (no "#":
+# exec treats everything from a "#" to the end of the line as a comment)
+BATCH_MARKER = "IPMI_FAN_CONTROL_BATCH"
+
+# ``sdr`` rows, e.g. "System Fan 1    | 33h | ok  | 7.1 | 3240 RPM"
+SDR_FAN_PATTERN = re.compile(
+    r'(.*?)\s+\|\s+(\w+h)\s+\|\s+(\w+)\s+\|\s+[\d\.]+\s+\|\s+([\d\.]+)\s+(\w+)'
+)
+# e.g. "Inlet Temp       | 04h | ok  | 7.1 | 19 degrees C"
+SDR_TEMP_PATTERN = re.compile(
+    r'(.*?)\s+\|\s+(\w+h?)\s+\|\s+(\w+)\s+\|\s+[\d\.]+\s+\|\s+([\d\.]+)\s+degrees\s+(\w)'
+)
+# ``sensor reading``/``sensor list`` values, e.g. "3240 RPM"
+SENSOR_VALUE_PATTERN = re.compile(r'([\d\.]+)\s*(\w+)')
+# Free-form temperature lines, e.g. "Inlet Temp : 19 C"
+TEMP_ALT_PATTERN = re.compile(r'(.*?)\s*:\s*([\d\.]+)\s*([CF])', re.IGNORECASE)
+
+
+# ``sdr get`` spells threshold states out; map them to the ``sdr`` list codes
+SDR_GET_STATUS = {
+    "Lower Non-Recoverable": "lnr",
+    "Lower Critical": "lcr",
+    "Lower Non-Critical": "lnc",
+    "Upper Non-Critical": "unc",
+    "Upper Critical": "ucr",
+    "Upper Non-Recoverable": "unr",
+    "Not Available": "ns",
+}
+
+
+@contextlib.contextmanager
+def _shutdown_signals_unblocked() -> Iterator[None]:
+    """Unblock SIGINT/SIGTERM in this thread while ipmitool is spawned.
+
+    The CLI blocks both on every thread so they reach its signal waiter; a
+    child inherits the spawning thread's mask across exec and would never act
+    on them. The CLI forwards a signal that lands here meanwhile to the waiter.
+    """
+    if not hasattr(signal, "pthread_sigmask"):
+        yield
+        return
+    mask = signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGINT, signal.SIGTERM})
+    try:
+        yield
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+
+def _parse_sdr_row(line: str) -> Optional[Tuple[str, str, str, float, List[str]]]:
+    """Split a well-formed ``sdr`` row without a regex.
+
+    Returns:
+        (name, id, status, value, unit words), or None when the line does not
+        have the usual five columns and callers should fall back to the patterns
+    """
+    parts = line.split("|")
+    if len(parts) != 5:
+        return None
+    reading = parts[4].split()
+    status = parts[2].strip()
+    if len(reading) < 2 or not status.isalnum():
+        return None
+    try:
+        value = float(reading[0])
+    except ValueError:
+        return None
+    return parts[0].strip(), parts[1].strip(), status, value, reading[1:]
+
+
+def _parse_sdr_get(output: str) -> Dict[str, Tuple[Optional[float], str]]:
+    """Pick the reading and status of each sensor out of ``sdr get`` output.
+
+    Each sensor is a block of ``key : value`` lines, e.g.
+    ``Sensor ID : Fan1 RPM (0x30)``, ``Sensor Reading : 3240 (+/- 120) RPM``
+    and ``Status : ok``.
+
+    Returns:
+        Mapping of sensor name to (value, status); value is None and status
+        "ns" when the sensor has no reading
+    """
+    readings: Dict[str, Tuple[Optional[float], str]] = {}
+    name = None
+    value: Optional[float] = None
+    for line in output.splitlines():
+        key, sep, field = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip()
+        field = field.strip()
+        if key == "Sensor ID":
+            # Drop the sensor number suffix, e.g. " (0x30)"
+            name = field.rsplit(" (", 1)[0]
+            value = None
+            readings[name] = (None, "ns")
+        elif name is None:
+            continue
+        elif key == "Sensor Reading":
+            try:
+                value = float(field.split(None, 1)[0])
+            except (IndexError, ValueError):
+                value = None  # "No Reading"
+            readings[name] = (value, "ns" if value is None else "ok")
+        elif key == "Status" and value is not None:
+            readings[name] = (value, SDR_GET_STATUS.get(field, field))
+    return readings
 
 
 class DellIPMIToolFanController:
@@ -18,6 +141,23 @@ class DellIPMIToolFanController:
     DELL_CMD_SET_FAN_SPEED = "raw 0x30 0x30 0x02 0xff"      # Append % value in hex
     DELL_CMD_ENABLE_AUTO_FAN = "raw 0x30 0x30 0x01 0x01"    # Enable automatic fan control
 
+    # Seconds before manual fan mode is sent again, in case the BMC reverted it
+    MANUAL_MODE_REASSERT = 300.0
+
+    # Commands test_connection() tries in order of preference, simplest first
+    CONNECTION_PROBE_COMMANDS: Tuple[str, ...] = (
+        "chassis status",    # Works on virtually all IPMI implementations
+        "sensor reading",    # Works well on Dell servers
+        "sdr list",          # Also reliable on most servers
+        "mc info",           # Basic management controller info
+    )
+
+    # Longest wait between retries while the monitor loop keeps failing
+    MAX_ERROR_BACKOFF = 60.0
+
+    # Seconds a successful test_connection() is trusted without re-checking
+    CONNECTION_TTL = 60.0
+
     def __init__(
         self,
         host: str = "localhost",
@@ -26,6 +166,7 @@ class DellIPMIToolFanController:
         password: str = "",
         interface: str = "lanplus",
         verify: bool = True,
+        sdr_cache: Optional[SDRCache] = None,
     ):
         """Initialize IPMI connection for Dell servers.
 
@@ -36,6 +177,7 @@ class DellIPMIToolFanController:
             password: BMC password
             interface: IPMI interface type (lanplus, lan, etc.)
             verify: Whether to verify connection on initialization
+            sdr_cache: Persistent cache of discovered sensors (optional)
         """
         self.host = host
         self.port = port
@@ -43,19 +185,36 @@ class DellIPMIToolFanController:
         self.password = password
         self.interface = interface
         self.base_cmd = self._build_base_cmd()
+        self.sdr_cache = sdr_cache
         
         # PID controller for temperature-based fan control
         self.pid = PIDController()
         self.target_temp = 60.0  # Default target temperature in celsius
         self.monitor_interval = 30.0  # Default monitoring interval in seconds
+        self.max_backoff = 4.0  # Max poll interval while stable, in intervals
+        self.min_speed_delta = 1.0  # Smallest fan speed change worth writing, in %
+        self.keepalive_ticks = 20  # Rewrite an unchanged speed after this many skips
+        self._last_speed: Optional[int] = None  # Last speed written to the BMC
+        self._manual_mode_enabled = False  # Whether the BMC is in manual fan mode
+        self._manual_mode_at = 0.0  # time.monotonic() it was last sent
         
         # Temperature monitoring
         self.monitoring = False
-        self.monitor_thread = None
+        self.monitor_worker = MonitorWorker(
+            lambda: self._temperature_monitor_loop(self.temp_callback),
+            name="temperature-monitor",
+        )
         self.temp_callback = None
+        self._stop_event = threading.Event()  # Set to stop the monitor thread
         
         # Connection status
         self.connected = False
+        self._last_verified = 0.0  # time.monotonic() of the last successful check
+        
+        # Persistent ``ipmitool shell`` process (started by connect())
+        self._shell_proc: Optional[subprocess.Popen] = None
+        self._shell_lock = threading.Lock()
+        self._reopen_shell = False  # Restart the shell if it dies mid-session
         
         # Verify connection if requested
         if verify:
@@ -83,6 +242,9 @@ class DellIPMIToolFanController:
     def _run_command(self, command: Union[str, List[str]]) -> str:
         """Run an IPMI command and return the output.
 
+        The command is piped to the persistent shell when one is open,
+        otherwise a one-shot ipmitool process is spawned.
+
         Args:
             command: Command to run (string or list of arguments)
 
@@ -92,24 +254,238 @@ class DellIPMIToolFanController:
         Raises:
             RuntimeError: If command fails
         """
+        if self._shell_proc is None and self._reopen_shell:
+            self._restart_shell()
+        if self._shell_proc is not None:
+            # The shell tokenizes the line itself, so strings go through as-is
+            if isinstance(command, str):
+                return self._run_shell_command(command)
+            return self._run_shell_command(
+                " ".join(f'"{arg}"' if " " in arg else arg for arg in command)
+            )
+        
         if isinstance(command, str):
             full_cmd = self.base_cmd + command.split()
         else:
-            full_cmd = self.base_cmd + command
+            full_cmd = self.base_cmd + list(command)
         
         try:
-            result = subprocess.run(
-                full_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
+            with _shutdown_signals_unblocked():
+                result = subprocess.run(
+                    full_cmd,
+                    capture_output=True,
+                    encoding=OUTPUT_ENCODING,
+                    errors="replace",
+                    check=True,
+                )
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
             error_msg = e.stderr.strip() if e.stderr else str(e)
             raise RuntimeError(f"IPMI command failed: {error_msg}")
     
+    def _run_command_batch(
+        self, commands: List[str]
+    ) -> List[Tuple[str, str, Optional[str]]]:
+        """Run several IPMI commands in a single ipmitool session.
+
+        Uses the persistent shell when one is open, otherwise writes the
+        commands to a script for one ``ipmitool exec`` run, separated by
+        ``echo`` markers so the output can be split per command.
+
+        Args:
+            commands: Commands to run, in order
+
+        Returns:
+            List of (command, output, error) tuples; error is None on success
+        """
+        if self._shell_proc is not None:
+            results: List[Tuple[str, str, Optional[str]]] = []
+            for command in commands:
+                try:
+                    results.append((command, self._run_command(command), None))
+                except RuntimeError as e:
+                    results.append((command, "", str(e)))
+            return results
+
+        with tempfile.NamedTemporaryFile(
+            "w", prefix="ipmi-fan-", suffix=".txt", delete=False
+        ) as script:
+            for index, command in enumerate(commands):
+                script.write(f"echo {BATCH_MARKER} {index}\n{command}\n")
+        
+        try:
+            with _shutdown_signals_unblocked():
+                result = subprocess.run(
+                    self.base_cmd + ["exec", script.name],
+                    capture_output=True,
+                    encoding=OUTPUT_ENCODING,
+                    errors="replace",
+                    # Failed commands are reported per command below
+                    check=False,
+                )
+        except OSError as e:
+            raise RuntimeError(f"IPMI command failed: {str(e)}") from e
+        finally:
+            os.unlink(script.name)
+        
+        # Split stdout on the markers
+        sections: Dict[int, List[str]] = {}
+        current = None
+        for line in result.stdout.splitlines():
+            if line.startswith(BATCH_MARKER):
+                current = int(line[len(BATCH_MARKER):])
+                sections[current] = []
+            elif current is not None:
+                sections[current].append(line)
+        
+        # stderr is not split per command, report it for any command without output
+        error = result.stderr.strip() or "No output"
+        results = []
+        for index, command in enumerate(commands):
+            output = "\n".join(sections.get(index, [])).strip()
+            if output:
+                results.append((command, output, None))
+            else:
+                results.append((command, "", f"IPMI command failed: {error}"))
+        return results
+    
+    def _start_shell(self) -> None:
+        """Start a persistent ``ipmitool shell`` process.
+
+        If the shell cannot be started (e.g. ipmitool was built without
+        readline support), commands keep using one-shot invocations.
+        """
+        # A dumb terminal keeps readline from emitting escape sequences
+        env = dict(os.environ, TERM="dumb")
+        try:
+            with _shutdown_signals_unblocked():
+                self._shell_proc = subprocess.Popen(
+                    self.base_cmd + ["shell"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env=env,
+                    # Out of the terminal's process group: a Ctrl+C must not kill
+                    # the shell that the exit path restores fan control through
+                    start_new_session=True,
+                )
+        except OSError:
+            self._shell_proc = None
+            return
+        
+        try:
+            # Wait for the first prompt so we know the session is usable
+            self._read_shell_response()
+        except RuntimeError:
+            self._close_shell()
+    
+    def _restart_shell(self) -> None:
+        """Reopen a shell that died after connect().
+
+        Tried once per loss; if the new shell does not come up either,
+        commands fall back to one-shot invocations for the rest of the session.
+        """
+        with self._shell_lock:
+            if self._shell_proc is None and self._reopen_shell:
+                self._start_shell()
+                self._reopen_shell = self._shell_proc is not None
+                if self._shell_proc is None:
+                    logger.warning("ipmitool shell could not be restarted, spawning ipmitool per command")
+    
+    def _close_shell(self) -> None:
+        """Terminate the persistent shell process, if any."""
+        proc, self._shell_proc = self._shell_proc, None
+        if proc is None:
+            return
+        
+        try:
+            if proc.stdin:
+                proc.stdin.write(b"quit\n")
+                proc.stdin.close()
+            proc.wait(timeout=2.0)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+        finally:
+            for stream in (proc.stdout, proc.stderr):
+                if stream:
+                    stream.close()
+    
+    def _read_shell_response(self) -> Tuple[str, str]:
+        """Read shell output up to the next prompt.
+
+        Returns:
+            Tuple of (stdout, stderr) text produced before the prompt
+
+        Raises:
+            RuntimeError: If the shell exits before printing a prompt
+        """
+        proc = self._shell_proc
+        out = bytearray()
+        err = bytearray()
+        
+        with selectors.DefaultSelector() as selector:
+            # Read both pipes so a chatty stderr can never block the shell
+            selector.register(proc.stdout, selectors.EVENT_READ, out)
+            selector.register(proc.stderr, selectors.EVENT_READ, err)
+            
+            while not out.endswith(SHELL_PROMPT):
+                for key, _ in selector.select():
+                    chunk = os.read(key.fd, 4096)
+                    if not chunk:
+                        if key.data is out:
+                            raise RuntimeError("ipmitool shell exited unexpectedly")
+                        selector.unregister(key.fileobj)
+                        continue
+                    key.data.extend(chunk)
+            
+            # stderr is unbuffered, so anything written before the prompt
+            # is already waiting in the pipe
+            selector.unregister(proc.stdout)
+            if proc.stderr in selector.get_map():
+                while selector.select(timeout=0):
+                    chunk = os.read(proc.stderr.fileno(), 4096)
+                    if not chunk:
+                        break
+                    err.extend(chunk)
+        
+        del out[-len(SHELL_PROMPT):]
+        return (
+            out.decode(OUTPUT_ENCODING, errors="replace"),
+            err.decode(OUTPUT_ENCODING, errors="replace"),
+        )
+    
+    def _run_shell_command(self, line: str) -> str:
+        """Run a command through the persistent shell.
+
+        Args:
+            line: Command line (without the base ipmitool arguments)
+
+        Returns:
+            Command output as string
+
+        Raises:
+            RuntimeError: If the command fails or the shell dies
+        """
+        with self._shell_lock:
+            try:
+                self._shell_proc.stdin.write(line.encode() + b"\n")
+                self._shell_proc.stdin.flush()
+                output, errors = self._read_shell_response()
+            except (OSError, RuntimeError) as e:
+                self._close_shell()
+                raise RuntimeError(f"IPMI command failed: {str(e)}") from e
+        
+        # readline echoes the command back when stdin is not a terminal
+        first, sep, rest = output.partition("\n")
+        if first.strip() == line.strip():
+            output = rest
+        
+        output = output.strip()
+        if not output and errors.strip():
+            raise RuntimeError(f"IPMI command failed: {errors.strip()}")
+        return output
+    
     def test_connection(self) -> bool:
         """Test connection to the iDRAC.
 
@@ -119,21 +495,16 @@ class DellIPMIToolFanController:
         Raises:
             RuntimeError: If connection fails
         """
+        if self._connection_fresh():
+            return True
         try:
             # Try each command in order, stopping at the first one that works
-            commands = [
-                # List in order of preference - try the simplest commands first
-                "chassis status",    # Works on virtually all IPMI implementations
-                "sensor reading",    # Works well on Dell servers
-                "sdr list",          # Also reliable on most servers
-                "mc info"            # Basic management controller info
-            ]
-            
-            for cmd in commands:
+            for cmd in self.CONNECTION_PROBE_COMMANDS:
                 try:
                     output = self._run_command(cmd)
                     if output.strip():  # Any non-empty response is good
                         self.connected = True
+                        self._last_verified = time.monotonic()
                         return True
                 except Exception:
                     continue  # Try the next command
@@ -143,79 +514,316 @@ class DellIPMIToolFanController:
             
         except Exception as e:
             self.connected = False
+            self._last_verified = 0.0
             raise RuntimeError(f"Failed to connect to Dell iDRAC at {self.host}: {str(e)}")
     
-    def get_fan_speeds(self) -> List[Dict[str, Any]]:
+    def _connection_fresh(self) -> bool:
+        """Whether the connection was verified less than CONNECTION_TTL ago."""
+        return (
+            self.connected
+            and time.monotonic() - self._last_verified < self.CONNECTION_TTL
+        )
+    
+    def connect(self) -> None:
+        """Open a persistent ipmitool session and verify the connection.
+
+        Subsequent commands are piped to a long-lived ``ipmitool shell``
+        process, avoiding a fork/exec and BMC authentication per command.
+
+        Raises:
+            RuntimeError: If connection fails
+        """
+        if self._shell_proc is None:
+            self._start_shell()
+        
+        try:
+            self.test_connection()
+        except RuntimeError:
+            self._close_shell()
+            raise
+        self._reopen_shell = self._shell_proc is not None
+    
+    def disconnect(self) -> None:
+        """Stop monitoring and close the persistent ipmitool session."""
+        self.stop_temperature_monitoring()
+        self.monitor_worker.shutdown()
+        self._reopen_shell = False
+        self._close_shell()
+        self.connected = False
+        self._last_verified = 0.0
+        self._manual_mode_enabled = False
+    
+    def discover_sensors(self) -> List[Dict[str, Any]]:
+        """Walk the SDR repository and refresh the sensor cache.
+
+        Returns:
+            List of ``{"id": ..., "name": ..., "type": ...}`` entries
+        """
+        if self.sdr_cache is not None:
+            self.sdr_cache.invalidate()
+
+        sensors = self.get_all_sensors()
+        discovered = [
+            {"id": fan["id"], "name": fan["name"], "type": "fan"}
+            for fan in sensors["fans"]
+        ]
+        discovered.extend(
+            {"id": temp["id"], "name": temp["name"], "type": "temperature"}
+            for temp in sensors["temps"]
+        )
+        return discovered
+    
+    def _read_cached_sensors(
+        self, *sensor_types: str
+    ) -> Optional[Dict[str, List[Tuple[Dict[str, Any], Optional[float], str]]]]:
+        """Read previously discovered sensors by name in a single request.
+
+        Args:
+            sensor_types: Sensor types to read ("fan", "temperature")
+
+        Returns:
+            Mapping of sensor type to (cached sensor, value, status) triples,
+            or None if discovery is needed; value is None for a sensor without
+            a reading
+        """
+        if self.sdr_cache is None:
+            return None
+        cached = {}
+        for sensor_type in sensor_types:
+            if self.sdr_cache.is_empty(sensor_type):
+                # Recently found to have no sensors of this type
+                cached[sensor_type] = []
+                continue
+            sensors = self.sdr_cache.get_sensors(sensor_type)
+            if not sensors or "unit" not in sensors[0]:
+                # Not discovered yet, or cached before units were recorded
+                return None
+            cached[sensor_type] = sensors
+
+        names = [sensor["name"] for sensors in cached.values() for sensor in sensors]
+        if len(set(names)) < len(names):
+            # Readings are matched by name; written by a version that cached
+            # duplicate names, which would hide all but one of those sensors
+            for sensor_type in sensor_types:
+                self.sdr_cache.invalidate(sensor_type)
+            return None
+        values: Dict[str, Tuple[Optional[float], str]] = {}
+        if names:
+            try:
+                # Unlike "sensor reading", reports each sensor's status
+                values = _parse_sdr_get(self._run_command(["sdr", "get"] + names))
+            except RuntimeError:
+                for sensor_type in sensor_types:
+                    self.sdr_cache.invalidate(sensor_type)
+                return None
+
+        readings = {}
+        for sensor_type, sensors in cached.items():
+            if any(sensor["name"] not in values for sensor in sensors):
+                # Sensor layout changed (e.g. BMC firmware update), rediscover
+                self.sdr_cache.invalidate(sensor_type)
+                return None
+            readings[sensor_type] = [
+                (sensor,) + values[sensor["name"]] for sensor in sensors
+            ]
+        return readings
+    
+    def get_all_sensors(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get fan and temperature readings in a single BMC request.
+
+        Returns:
+            Dictionary with "fans" and "temps" lists, in the same format as
+            get_fan_speeds() and get_temperature_sensors()
+        """
+        cached = self._read_cached_sensors("fan", "temperature")
+        if cached is not None:
+            return {
+                "fans": [self._fan_reading(*reading) for reading in cached["fan"]],
+                "temps": [self._temp_reading(*reading) for reading in cached["temperature"]],
+            }
+
+        fans: List[Dict[str, Any]] = []
+        temps: List[Dict[str, Any]] = []
+        try:
+            # One walk over all full sensor records instead of one per type
+            output = self._run_command("sdr elist full")
+            for line in output.splitlines():
+                row = _parse_sdr_row(line)
+                if row is not None:
+                    name, sensor_id, status, value, unit = row
+                    if unit == ["RPM"]:
+                        fans.append({
+                            "id": sensor_id,
+                            "name": name,
+                            "current_speed": value,
+                            "unit": "RPM",
+                            "status": status
+                        })
+                        continue
+                    if len(unit) == 2 and unit[0] == "degrees":
+                        temps.append({
+                            "id": sensor_id,
+                            "name": name,
+                            "current_temp": value,
+                            "unit": f"degrees {unit[1]}",
+                            "status": status
+                        })
+                        continue
+                match = SDR_FAN_PATTERN.match(line)
+                if match and match.group(5) == "RPM":
+                    name, sensor_id, status, speed, unit = match.groups()
+                    fans.append({
+                        "id": sensor_id,
+                        "name": name.strip(),
+                        "current_speed": float(speed),
+                        "unit": unit,
+                        "status": status
+                    })
+                    continue
+                match = SDR_TEMP_PATTERN.match(line)
+                if match:
+                    name, sensor_id, status, temp, unit = match.groups()
+                    temps.append({
+                        "id": sensor_id,
+                        "name": name.strip(),
+                        "current_temp": float(temp),
+                        "unit": f"degrees {unit}",
+                        "status": status
+                    })
+        except RuntimeError:
+            pass
+
+        if not fans or not temps:
+            # Fall back to the per-type commands, which handle more formats
+            return {
+                "fans": self.get_fan_speeds(),
+                "temps": self.get_temperature_sensors(),
+            }
+
+        if self.sdr_cache is not None:
+            self.sdr_cache.set_sensors("fan", fans)
+            self.sdr_cache.set_sensors("temperature", temps)
+        return {"fans": fans, "temps": temps}
+    
+    @staticmethod
+    def _fan_reading(sensor: Dict[str, Any], speed: Optional[float], status: str) -> FanSensor:
+        """Build a fan reading from a cached sensor."""
+        return {
+            "id": sensor["id"],
+            "name": sensor["name"],
+            "current_speed": speed,
+            "unit": sensor["unit"],
+            "status": status,
+        }
+    
+    @staticmethod
+    def _temp_reading(sensor: Dict[str, Any], temp: Optional[float], status: str) -> TemperatureSensor:
+        """Build a temperature reading from a cached sensor."""
+        return {
+            "id": sensor["id"],
+            "name": sensor["name"],
+            "current_temp": temp,
+            "unit": sensor["unit"],
+            "status": status,
+        }
+    
+    def get_fan_speeds(self) -> List[FanSensor]:
         """Get current fan speeds from Dell server.
 
         Returns:
             List of dictionaries containing fan information
         """
+        cached = self._read_cached_sensors("fan")
+        if cached is not None:
+            return [self._fan_reading(*reading) for reading in cached["fan"]]
+
         try:
             # Try two different commands to read fan data
             fans = []
             try:
-                # First try with sensor reading (more compatible with some Dell servers)
-                output = self._run_command("sensor reading")
+                # First ask the BMC for fan records only
+                output = self._run_command("sdr type fan")
                 
-                # Parse fan information from sensor reading
+                # Parse fan information
                 for line in output.splitlines():
-                    # Look for fan entries (usually contain "fan" in the name or "RPM" in the unit)
-                    if "fan" in line.lower() or "rpm" in line.lower():
-                        # Try to extract the parts - format can vary between Dell models
-                        parts = line.split('|')
-                        if len(parts) >= 3:
-                            name = parts[0].strip()
-                            value_part = parts[2].strip()
-                            # Extract numeric value and unit
-                            value_match = re.search(r'([\d\.]+)\s*(\w+)', value_part)
-                            if value_match:
-                                speed = value_match.group(1)
-                                unit = value_match.group(2)
-                                status = "ok"  # Assume ok if reading is returned
-                                
-                                # Generate a simple id if not present
-                                sensor_id = f"fan{len(fans)+1}"
-                                
-                                fans.append({
-                                    "id": sensor_id,
-                                    "name": name,
-                                    "current_speed": float(speed),
-                                    "unit": unit,
-                                    "status": status
-                                })
+                    # Typical format: "System Fan 1    | 33h | ok  | 7.1 | 3240 RPM"
+                    row = _parse_sdr_row(line)
+                    if row is not None and len(row[4]) == 1 and row[1].endswith("h"):
+                        name, sensor_id, status, speed, (unit,) = row
+                        fans.append({
+                            "id": sensor_id,
+                            "name": name,
+                            "current_speed": speed,
+                            "unit": unit,
+                            "status": status
+                        })
+                        continue
+                    match = SDR_FAN_PATTERN.match(line)
+                    # The pattern also matches "22 degrees C" rows
+                    if match and match.group(5) != "degrees":
+                        name, sensor_id, status, speed, unit = match.groups()
+                        fans.append({
+                            "id": sensor_id,
+                            "name": name.strip(),
+                            "current_speed": float(speed),
+                            "unit": unit,
+                            "status": status
+                        })
             except Exception as e1:
-                # If that fails, try the sdr type command
+                # If that fails, read all sensors and pick out the fans
+                # (more compatible with some Dell servers)
                 try:
-                    output = self._run_command("sdr type fan")
+                    output = self._run_command("sensor reading")
                     
-                    # Parse fan information
+                    # Parse fan information from sensor reading
                     for line in output.splitlines():
-                        # Typical format: "System Fan 1    | 33h | ok  | 7.1 | 3240 RPM"
-                        match = re.match(r'(.*?)\s+\|\s+(\w+h)\s+\|\s+(\w+)\s+\|\s+[\d\.]+\s+\|\s+([\d\.]+)\s+(\w+)', line)
-                        if match:
-                            name, sensor_id, status, speed, unit = match.groups()
-                            fans.append({
-                                "id": sensor_id,
-                                "name": name.strip(),
-                                "current_speed": float(speed),
-                                "unit": unit,
-                                "status": status
-                            })
+                        # Look for fan entries (usually contain "fan" in the name or "RPM" in the unit)
+                        if "fan" in line.lower() or "rpm" in line.lower():
+                            # Try to extract the parts - format can vary between Dell models
+                            parts = line.split('|')
+                            if len(parts) >= 3:
+                                name = parts[0].strip()
+                                value_part = parts[2].strip()
+                                # Extract numeric value and unit
+                                value_match = SENSOR_VALUE_PATTERN.search(value_part)
+                                if value_match:
+                                    speed = value_match.group(1)
+                                    unit = value_match.group(2)
+                                    status = "ok"  # Assume ok if reading is returned
+                                    
+                                    # Generate a simple id if not present
+                                    sensor_id = f"fan{len(fans)+1}"
+                                    
+                                    fans.append({
+                                        "id": sensor_id,
+                                        "name": name,
+                                        "current_speed": float(speed),
+                                        "unit": unit,
+                                        "status": status
+                                    })
                 except Exception:
                     # If both methods fail, raise the first error
                     raise e1
             
+            if self.sdr_cache is not None:
+                if fans:
+                    self.sdr_cache.set_sensors("fan", fans)
+                else:
+                    self.sdr_cache.mark_empty("fan")
             return fans
         except Exception as e:
             raise RuntimeError(f"Failed to read fan data: {str(e)}") from e
     
-    def get_temperature_sensors(self) -> List[Dict[str, Any]]:
+    def get_temperature_sensors(self) -> List[TemperatureSensor]:
         """Get temperature sensor readings from Dell server.
 
         Returns:
             List of dictionaries containing temperature sensor information
         """
+        cached = self._read_cached_sensors("temperature")
+        if cached is not None:
+            return [self._temp_reading(*reading) for reading in cached["temperature"]]
+
         try:
             # Get temperature sensor readings
             # Try multiple commands in case one fails
@@ -240,7 +848,18 @@ class DellIPMIToolFanController:
                 # Try different pattern matches for temperature readings
                 
                 # Typical format: "Inlet Temp       | 04h | ok  | 7.1 | 19 degrees C"
-                match = re.match(r'(.*?)\s+\|\s+(\w+h?)\s+\|\s+(\w+)\s+\|\s+[\d\.]+\s+\|\s+([\d\.]+)\s+degrees\s+(\w)', line)
+                row = _parse_sdr_row(line)
+                if row is not None and len(row[4]) == 2 and row[4][0] == "degrees":
+                    name, sensor_id, status, temp, (_, unit) = row
+                    temps.append({
+                        "id": sensor_id,
+                        "name": name,
+                        "current_temp": temp,
+                        "unit": f"degrees {unit}",
+                        "status": status
+                    })
+                    continue
+                match = SDR_TEMP_PATTERN.match(line)
                 if match:
                     name, sensor_id, status, temp, unit = match.groups()
                     temps.append({
@@ -253,8 +872,11 @@ class DellIPMIToolFanController:
                     continue
                 
                 # Alternative format: "Inlet Temp : 19 C"
-                alt_match = re.search(r'(.*?)\s*:\s*([\d\.]+)\s*([CF])', line, re.IGNORECASE)
-                if alt_match and ("temp" in line.lower() or "ambient" in line.lower()):
+                lowered = line.lower()
+                if "temp" not in lowered and "ambient" not in lowered:
+                    continue
+                alt_match = TEMP_ALT_PATTERN.search(line)
+                if alt_match:
                     name, temp, unit = alt_match.groups()
                     temps.append({
                         "id": f"temp{len(temps)+1}",
@@ -265,10 +887,15 @@ class DellIPMIToolFanController:
                     })
                     continue
             
+            if self.sdr_cache is not None:
+                if temps:
+                    self.sdr_cache.set_sensors("temperature", temps)
+                else:
+                    self.sdr_cache.mark_empty("temperature")
             return temps
         except Exception as e:
             # Return empty list on error instead of raising exception
-            print(f"Warning: Error reading temperature sensors: {str(e)}")
+            logger.warning(f"Error reading temperature sensors: {str(e)}")
             return []
     
     def get_highest_temperature(self) -> float:
@@ -278,39 +905,49 @@ class DellIPMIToolFanController:
             Highest temperature in Celsius
         """
         try:
+            # Fast path: max over the cached sensors' values, no readings built
+            cached = self._read_cached_sensors("temperature")
+            if cached is not None:
+                max_temp = max(
+                    (value for _, value, _ in cached["temperature"] if value is not None),
+                    default=None,
+                )
+                if max_temp is not None:
+                    return max_temp
+            
             temp_sensors = self.get_temperature_sensors()
             
             # If no sensors or empty list, return a default value
             if not temp_sensors:
-                print("Warning: No temperature sensors found, using default temperature of 60.0°C")
+                logger.warning("No temperature sensors found, using default temperature of 60.0°C")
                 return 60.0
             
-            # Filter out potentially invalid sensors and extract temperatures
-            temps = []
-            for sensor in temp_sensors:
-                try:
-                    # Only include sensors with valid numeric temperature values
-                    if "current_temp" in sensor and isinstance(sensor["current_temp"], (int, float)):
-                        temps.append(sensor["current_temp"])
-                except (KeyError, TypeError, ValueError):
-                    continue
+            # Highest of the valid numeric readings, in one pass
+            max_temp = max(
+                (
+                    sensor["current_temp"]
+                    for sensor in temp_sensors
+                    if isinstance(sensor.get("current_temp"), (int, float))
+                ),
+                default=None,
+            )
             
             # If no valid temperatures found, return default
-            if not temps:
-                print("Warning: No valid temperature readings found, using default temperature of 60.0°C")
+            if max_temp is None:
+                logger.warning("No valid temperature readings found, using default temperature of 60.0°C")
                 return 60.0
-                
-            # Find max temperature
-            max_temp = max(temps)
             return max_temp
         except Exception as e:
             # Default to a safe value on error
-            print(f"Warning: Error finding highest temperature: {str(e)}, using default temperature of 60.0°C")
+            logger.warning(f"Error finding highest temperature: {str(e)}, using default temperature of 60.0°C")
             return 60.0
     
     def set_fan_speed(self, percentage: int) -> None:
         """Set Dell server fan speed to a specific percentage.
 
+        Returns as soon as the BMC accepts the command; the fans ramp to the
+        new speed on their own, so callers that read RPMs back must wait.
+
         Args:
             percentage: Fan speed percentage (0-100)
         """
@@ -321,16 +958,13 @@ class DellIPMIToolFanController:
             # Enable manual fan control mode first
             self._set_manual_mode()
             
-            # Convert percentage to hex value (without '0x' prefix)
-            hex_percentage = format(percentage, 'x')
-            
-            # Set fan speed - Dell specific command
-            cmd = f"{self.DELL_CMD_SET_FAN_SPEED} 0x{hex_percentage}"
+            # Set fan speed - Dell specific command, percentage in hex
+            cmd = f"{self.DELL_CMD_SET_FAN_SPEED} 0x{percentage:x}"
             self._run_command(cmd)
-            
-            # Add a small delay to allow fans to adjust
-            time.sleep(0.5)
+            self._last_speed = percentage
         except Exception as e:
+            # Whatever went wrong, send manual mode again on the next write
+            self._manual_mode_enabled = False
             raise RuntimeError(f"Failed to set fan speed: {str(e)}") from e
     
     def set_automatic_control(self) -> None:
@@ -338,14 +972,23 @@ class DellIPMIToolFanController:
         try:
             # Dell-specific command to return fan control to automatic mode
             self._run_command(self.DELL_CMD_ENABLE_AUTO_FAN)
+            self._last_speed = None
+            self._manual_mode_enabled = False
         except Exception as e:
             raise RuntimeError(f"Failed to enable automatic fan control: {str(e)}") from e
     
     def _set_manual_mode(self) -> None:
-        """Put Dell server fans in manual control mode."""
+        """Put Dell server fans in manual control mode, if not already."""
+        if (
+            self._manual_mode_enabled
+            and time.monotonic() - self._manual_mode_at < self.MANUAL_MODE_REASSERT
+        ):
+            return
         try:
             # Dell-specific command to enable manual fan control
             self._run_command(self.DELL_CMD_ENABLE_MANUAL_FAN)
+            self._manual_mode_enabled = True
+            self._manual_mode_at = time.monotonic()
         except Exception as e:
             raise RuntimeError(f"Failed to set manual fan mode: {str(e)}") from e
     
@@ -387,6 +1030,22 @@ class DellIPMIToolFanController:
         self.monitor_interval = interval
         self.pid.set_sample_time(interval)
     
+    def set_max_backoff(self, max_backoff: float) -> None:
+        """Set how far sensor polling may back off while readings are stable.
+
+        Args:
+            max_backoff: Maximum poll interval as a multiple of the monitoring interval
+        """
+        self.max_backoff = max_backoff
+    
+    def set_min_speed_delta(self, min_delta: float) -> None:
+        """Set the smallest fan speed change the monitor loop writes to the BMC.
+
+        Args:
+            min_delta: Minimum change in fan speed percentage
+        """
+        self.min_speed_delta = min_delta
+    
     def _temperature_monitor_loop(self, callback: Optional[StatusCallback] = None) -> None:
         """Background thread for temperature monitoring and fan control.
 
@@ -395,27 +1054,48 @@ class DellIPMIToolFanController:
         """
         consecutive_errors = 0
         max_consecutive_errors = 3
+        last_error: Optional[str] = None  # Identical errors in a row are logged once
+        repeats = 0
+        poller = AdaptivePoller(
+            self.get_highest_temperature, self.monitor_interval, self.max_backoff
+        )
+        skipped_writes = 0  # Ticks since the fan speed was last written
+        
+        # Bound once; the loop runs for as long as monitoring is on
+        compute = self.pid.compute
+        set_speed = self.set_fan_speed
+        wait = self._stop_event.wait
+        is_stopped = self._stop_event.is_set
         
-        while self.monitoring:
+        while not is_stopped():
             try:
-                # Get current highest temperature
-                current_temp = self.get_highest_temperature()
+                # Get current highest temperature (cached while stable)
+                current_temp = poller.read()
                 
                 # Calculate fan speed with PID
                 # Handle the case where compute returns None
-                computed_speed = self.pid.compute(current_temp)
+                computed_speed = compute(current_temp)
                 if computed_speed is None:
                     # If PID returns None, use a default safe value
                     fan_speed = 50  # 50% is a reasonable default
-                    print("Warning: PID controller returned None, using default fan speed of 50%")
+                    logger.warning("PID controller returned None, using default fan speed of 50%")
                 else:
                     fan_speed = int(computed_speed)
                 
                 # Validate fan speed within configured PID controller range
                 fan_speed = max(min(fan_speed, self.pid.output_max), self.pid.output_min)
                 
-                # Set fan speed
-                self.set_fan_speed(fan_speed)
+                # Set fan speed, skipping the BMC write if it barely changed;
+                # rewrite it now and then in case the BMC lost the setting
+                if (
+                    self._last_speed is None
+                    or abs(fan_speed - self._last_speed) >= self.min_speed_delta
+                    or skipped_writes >= self.keepalive_ticks
+                ):
+                    set_speed(fan_speed)
+                    skipped_writes = 0
+                else:
+                    skipped_writes += 1
                 
                 # Call callback if provided
                 if callback:
@@ -427,32 +1107,49 @@ class DellIPMIToolFanController:
                         }
                         callback(status)
                     except Exception as callback_err:
-                        print(f"Warning: Error in callback: {str(callback_err)}")
+                        logger.warning(f"Error in callback: {str(callback_err)}")
                 
                 # Reset error counter on successful loop
                 consecutive_errors = 0
+                if repeats:
+                    logger.warning(f"Previous monitor error repeated {repeats} more times")
+                last_error, repeats = None, 0
                 
-                # Sleep until next interval
-                time.sleep(self.monitor_interval)
+                # Sleep until next interval, waking up at once when stopped
+                if wait(self.monitor_interval):
+                    break
                 
             except Exception as e:
-                # Log error and continue
+                # Log error and continue; a burst of identical errors is
+                # logged once, with a count when it ends
                 consecutive_errors += 1
+                message = str(e)
+                if message == last_error:
+                    repeats += 1
+                else:
+                    if repeats:
+                        logger.warning(f"Previous monitor error repeated {repeats} more times")
+                    last_error, repeats = message, 0
                 
                 # Use different messages based on error count
                 if consecutive_errors >= max_consecutive_errors:
-                    print(f"Critical error in temperature monitor (error #{consecutive_errors}): {str(e)}")
-                    print("Multiple consecutive errors detected. Setting fans to 70% as a safety measure.")
+                    if not repeats or consecutive_errors == max_consecutive_errors:
+                        logger.critical(f"Critical error in temperature monitor (error #{consecutive_errors}): {message}")
+                    if consecutive_errors == max_consecutive_errors:
+                        logger.warning("Multiple consecutive errors detected. Setting fans to 70% as a safety measure.")
                     try:
                         # Set fans to a safe speed
                         self.set_fan_speed(70)
                     except Exception:
                         pass
-                else:
-                    print(f"Error in temperature monitor (error #{consecutive_errors}): {str(e)}")
+                elif not repeats:
+                    logger.error(f"Error in temperature monitor (error #{consecutive_errors}): {message}")
                 
-                # Wait a bit longer after errors to avoid rapid retries
-                time.sleep(5 + (consecutive_errors * 3))
+                # Wait a bit longer after errors to avoid rapid retries, with
+                # jitter so restarted monitors do not retry in lockstep
+                delay = min(5 + consecutive_errors * 3, self.MAX_ERROR_BACKOFF)
+                if wait(delay + random.uniform(0, 1)):
+                    break
     
     def start_temperature_monitoring(
         self, 
@@ -466,11 +1163,19 @@ class DellIPMIToolFanController:
             target_temp: Target temperature in Celsius (uses current value if None)
             interval: Monitoring interval in seconds (uses current value if None)
             callback: Optional callback for monitoring events
+
+        Raises:
+            RuntimeError: If the previous monitor loop has not exited yet
         """
         if self.monitoring:
             return
         
-        # Test connection
+        # A loop stuck in a slow BMC read can outlive stop_temperature_monitoring();
+        # it must not wake up with the new run's settings and a cleared stop event
+        if not self.monitor_worker.wait_idle(2.0):
+            raise RuntimeError("Previous temperature monitor loop is still running")
+        
+        # Test connection (skipped if it was verified moments ago)
         self.test_connection()
         
         # Update settings if provided
@@ -485,18 +1190,15 @@ class DellIPMIToolFanController:
         
         # Set manual fan control mode
         self._set_manual_mode()
+        self._last_speed = None
         
         # Store callback
         self.temp_callback = callback
         
-        # Start monitoring thread
+        # Start monitoring on the (reused) worker thread
         self.monitoring = True
-        self.monitor_thread = threading.Thread(
-            target=self._temperature_monitor_loop,
-            args=(callback,),
-            daemon=True
-        )
-        self.monitor_thread.start()
+        self._stop_event.clear()
+        self.monitor_worker.start()
     
     def stop_temperature_monitoring(self) -> None:
         """Stop temperature-based fan control and return to automatic control."""
@@ -505,8 +1207,8 @@ class DellIPMIToolFanController:
         
         # Stop monitoring thread
         self.monitoring = False
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(2.0)  # Wait up to 2 seconds for thread to stop
+        self._stop_event.set()
+        self.monitor_worker.wait_idle(2.0)  # Wait up to 2 seconds for the loop to exit
         
         # Reset PID controller
         self.pid.set_auto_mode(False)
@@ -515,4 +1217,4 @@ class DellIPMIToolFanController:
         try:
             self.set_automatic_control()
         except Exception as e:
-            print(f"Warning: Failed to restore automatic fan control: {str(e)}")
\ No newline at end of file
+            logger.warning(f"Failed to restore automatic fan control: {str(e)}")
\ No newline at end of file
@@ -7,6 +7,28 @@ from typing import Optional
 class PIDController:
     """PID controller for fan speed based on temperature."""
 
+    __slots__ = (
+        "kp",
+        "ki",
+        "kd",
+        "output_min",
+        "output_max",
+        "sample_time",
+        "setpoint",
+        "integral",
+        "last_input",
+        "last_output",
+        "last_time",
+        "auto_mode",
+        "initialized",
+    )
+
+    # Anti-windup tracking gain is ANTI_WINDUP_GAIN / kp (per second)
+    ANTI_WINDUP_GAIN = 2.0
+    
+    # Setpoint changes larger than this (°C) restart the integral term
+    SETPOINT_RESET_DELTA = 5.0
+
     def __init__(
         self,
         kp: float = 0.1,   # Extremely gentle proportional gain
@@ -35,11 +57,10 @@ class PIDController:
         
         # Internal state
         self.setpoint = 0.0
-        self.last_error = 0.0
         self.integral = 0.0
         self.last_input = 0.0
         self.last_output = 0.0
-        self.last_time = time.time()
+        self.last_time = time.monotonic()
         
         # Internal flags
         self.auto_mode = False
@@ -80,6 +101,10 @@ class PIDController:
         Args:
             setpoint: Target temperature value
         """
+        # The integral was accumulated against the old target; on a large jump
+        # restart it from the current output so the change is bumpless
+        if self.initialized and abs(setpoint - self.setpoint) > self.SETPOINT_RESET_DELTA:
+            self.integral = self.last_output
         self.setpoint = setpoint
 
     def set_sample_time(self, sample_time: float) -> None:
@@ -99,24 +124,24 @@ class PIDController:
 
         Args:
             input_val: Current temperature
-            now: Current time (if None, uses time.time())
+            now: Current time in seconds (if None, uses time.monotonic())
 
         Returns:
             New fan speed percentage
         """
-        if not self.auto_mode:
-            return 0.0
-        
         if now is None:
-            now = time.time()
+            now = time.monotonic()
         
         # Time elapsed since last calculation
         time_change = now - self.last_time
         
-        # Skip update if not enough time has elapsed
-        if time_change < self.sample_time and self.initialized:
+        # Common case first: polled again before a sample period has passed
+        if self.initialized and self.auto_mode and time_change < self.sample_time:
             return self.last_output
         
+        if not self.auto_mode:
+            return 0.0
+        
         # Calculate error for cooling system (negative = need less cooling, positive = need more cooling)
         # For cooling: input_val > setpoint means we need more cooling (positive error)
         error = input_val - self.setpoint
@@ -135,58 +160,50 @@ class PIDController:
                 self.last_output = self.output_min
                 self.integral = self.output_min * 0.3
                 
-            derivative = 0.0
-            self.last_error = error
             self.last_input = input_val
             self.last_time = now
             self.initialized = True
             return self.last_output
         
+        # Read the tunings and state once; written back together below
+        kp = self.kp
+        output_min = self.output_min
+        output_max = self.output_max
+        integral = self.integral
+        
         # Calculate derivative on input to avoid derivative kick on setpoint changes
         derivative = (input_val - self.last_input) / time_change
         
-        # Calculate integral with anti-windup
-        if self.auto_mode:
-            # Apply smaller integral update during large changes to reduce oscillation
-            integral_scale = 1.0
-            if abs(error) > 8.0:
-                integral_scale = 0.3  # Reduce integral effect during large temperature jumps
-                
-            self.integral += self.ki * error * time_change * integral_scale
-            self.integral = max(min(self.integral, self.output_max), self.output_min)
-        
         # Calculate base response using a non-linear curve for smoother response
         # This creates a gentler curve rather than a linear response to error
         base_output = self._calculate_base_response(error)
         
         # Calculate PID output - for cooling, positive error means more cooling (higher fan speed)
-        pid_component = self.kp * error + self.kd * derivative + self.integral
+        pid_component = kp * error + self.kd * derivative + integral
+        
+        # Integrate with back-calculation anti-windup: while the PID term is
+        # beyond the output limits, bleed the integral back towards them
+        # (tracking gain ANTI_WINDUP_GAIN / kp, at most the whole excess per step)
+        # (Clamps in this method are plain conditionals: several times faster
+        # than nested min()/max() calls)
+        saturated = output_max if pid_component > output_max else pid_component
+        saturated = output_min if saturated < output_min else saturated
+        tracking = self.ANTI_WINDUP_GAIN / (kp if kp > 1e-6 else 1e-6) * time_change
+        tracking = 1.0 if tracking > 1.0 else tracking
+        integral += self.ki * error * time_change + tracking * (saturated - pid_component)
         
         # Blend base response with PID component
         # For smaller errors, use more of the base response and less PID
-        blend_factor = min(abs(error / 5.0), 1.0)  # 0-1 based on error magnitude
+        blend_factor = abs(error / 5.0)  # 0-1 based on error magnitude
+        blend_factor = 1.0 if blend_factor > 1.0 else blend_factor
         output = (base_output * (1.0 - blend_factor)) + (pid_component * blend_factor)
         
         # Apply output limits
-        output = max(min(output, self.output_max), self.output_min)
-        
-        # Limit rate of change for smoother transitions (prevent sudden large jumps)
-        # Much gentler rate limiting to prevent oscillation
-        max_change_per_second = 5.0  # Maximum 5% change per second
-        max_change = max_change_per_second * time_change
-        
-        # Apply more aggressive limiting for small errors to prevent oscillation
-        if abs(error) < 2.0:
-            max_change = max_change * 0.5  # Even slower rate of change near setpoint
-            
-        if abs(output - self.last_output) > max_change:
-            if output > self.last_output:
-                output = self.last_output + max_change
-            else:
-                output = self.last_output - max_change
+        output = output_max if output > output_max else output
+        output = output_min if output < output_min else output
         
         # Save state for next calculation
-        self.last_error = error
+        self.integral = integral
         self.last_input = input_val
         self.last_output = output
         self.last_time = now
@@ -195,7 +212,6 @@ class PIDController:
 
     def initialize(self) -> None:
         """Reset PID controller state."""
-        self.last_error = 0.0
         self.integral = 0.0
         self.last_input = 0.0
         self.initialized = False
@@ -0,0 +1,66 @@
+"""Adaptive sensor polling for the temperature monitor loops."""
+
+import time
+from typing import Callable, Optional
+
+# A BMC refreshes its sensors every few tens of milliseconds, but polling it
+# faster than this hurts its responsiveness and can skew the readings.
+MIN_SAFE_INTERVAL = 5.0
+
+
+class AdaptivePoller:
+    """Skip BMC reads while the temperature is stable.
+
+    Every unchanged reading doubles the time until the next real read, up to
+    ``max_backoff`` times the monitoring interval. In between, the last
+    reading is returned without touching the BMC. Any change resets the poll
+    interval to the monitoring interval.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[], float],
+        interval: float,
+        max_backoff: float = 4.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the poller.
+
+        Args:
+            read: Function returning a fresh reading from the BMC
+            interval: Monitoring interval in seconds
+            max_backoff: Maximum poll interval as a multiple of ``interval``
+            clock: Monotonic clock in seconds
+        """
+        self.read_sensor = read
+        self.interval = interval
+        self.max_backoff = max(max_backoff, 1.0)
+        self.clock = clock
+
+        self.poll_interval = interval
+        self.next_poll = 0.0
+        self.last_value: Optional[float] = None
+
+    def read(self) -> float:
+        """Get the current reading, from the BMC when the backoff has elapsed.
+
+        Returns:
+            Current (or cached) reading
+        """
+        now = self.clock()
+        if self.last_value is not None and now < self.next_poll:
+            return self.last_value
+
+        value = self.read_sensor()
+        if value == self.last_value:
+            # Reading unchanged, poll the BMC less often
+            self.poll_interval = min(
+                self.poll_interval * 2, self.interval * self.max_backoff
+            )
+        else:
+            self.poll_interval = self.interval
+
+        self.last_value = value
+        # Leave some slack so a tick that lands right on the deadline still polls
+        self.next_poll = now + self.poll_interval - self.interval / 2
+        return value
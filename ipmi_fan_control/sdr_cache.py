@@ -0,0 +1,169 @@
+"""Persistent on-disk cache of discovered IPMI sensors."""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+# How long a sensor type found missing is trusted to stay missing, in seconds
+EMPTY_TTL = 60.0
+
+
+def default_cache_dir() -> Path:
+    """Return the directory used for sensor caches.
+
+    Returns:
+        ``$XDG_CACHE_HOME/ipmi-fan-control`` (``~/.cache`` if unset)
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return Path(base) / "ipmi-fan-control"
+
+
+class SDRCache:
+    """Sensor discovery results for a single BMC, persisted as JSON.
+
+    Walking the SDR repository is the slowest IPMI operation, while the
+    sensor layout of a server never changes at runtime. The cache stores the
+    id/name/unit of every fan and temperature sensor so later runs can read
+    just those sensors by name.
+    """
+
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None):
+        """Initialize the cache.
+
+        Args:
+            path: JSON file backing the cache
+            data: Previously loaded cache contents
+        """
+        self.path = path
+        self.data: Dict[str, Any] = data if data is not None else {}
+
+    @classmethod
+    def for_host(cls, host: str, cache_dir: Optional[Path] = None) -> "SDRCache":
+        """Load the cache for a BMC, starting empty if none exists.
+
+        Args:
+            host: BMC hostname or IP address
+            cache_dir: Directory holding cache files (defaults to the XDG cache)
+
+        Returns:
+            Cache instance for the host
+        """
+        safe_host = re.sub(r"[^A-Za-z0-9._-]", "_", host)
+        path = (cache_dir or default_cache_dir()) / f"sdr-{safe_host}.json"
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+
+        if not isinstance(data, dict):
+            data = {}
+        return cls(path, data)
+
+    def get_sensors(self, sensor_type: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the cached sensors of a type.
+
+        Args:
+            sensor_type: Sensor type ("fan" or "temperature")
+
+        Returns:
+            List of ``{"id": ..., "name": ..., "unit": ...}`` entries, or None
+            if the type has not been discovered yet
+        """
+        sensors = self.data.get(sensor_type)
+        return sensors if isinstance(sensors, list) else None
+
+    def set_sensors(self, sensor_type: str, sensors: List[Dict[str, Any]]) -> None:
+        """Store discovered sensors of a type and persist the cache.
+
+        Cached sensors are read back by name, so a type whose names are not
+        unique (e.g. two CPU sensors both called "Temp") is left uncached.
+
+        Args:
+            sensor_type: Sensor type ("fan" or "temperature")
+            sensors: Sensor readings as returned by the controller
+        """
+        names = [sensor["name"] for sensor in sensors]
+        unique = len(set(names)) == len(names)
+        if not unique or not self._cached_names(sensor_type).isdisjoint(names):
+            if self.data.pop(sensor_type, None) is not None:
+                self.save()
+            return
+
+        self.data[sensor_type] = [
+            {"id": sensor["id"], "name": sensor["name"], "unit": sensor["unit"]}
+            for sensor in sensors
+        ]
+        self._empty().pop(sensor_type, None)
+        self.save()
+
+    def _cached_names(self, exclude: str) -> Set[str]:
+        """Names of the cached sensors of every type except ``exclude``."""
+        return {
+            sensor["name"]
+            for sensor_type, sensors in self.data.items()
+            if sensor_type != exclude and isinstance(sensors, list)
+            for sensor in sensors
+        }
+
+    def mark_empty(self, sensor_type: str) -> None:
+        """Record that the BMC has no sensors of a type, and persist the cache.
+
+        Args:
+            sensor_type: Sensor type ("fan" or "temperature")
+        """
+        self.data.pop(sensor_type, None)
+        self._empty()[sensor_type] = time.time()
+        self.save()
+
+    def is_empty(self, sensor_type: str, ttl: float = EMPTY_TTL) -> bool:
+        """Check whether a type was recently found to have no sensors.
+
+        Args:
+            sensor_type: Sensor type ("fan" or "temperature")
+            ttl: Maximum age of the result, in seconds
+
+        Returns:
+            True if the type was marked empty less than ``ttl`` seconds ago
+        """
+        marked_at = self._empty().get(sensor_type)
+        if not isinstance(marked_at, (int, float)):
+            return False
+        return 0 <= time.time() - marked_at < ttl
+
+    def _empty(self) -> Dict[str, float]:
+        """Timestamps of sensor types found to have no sensors, by type."""
+        empty = self.data.get("empty")
+        if not isinstance(empty, dict):
+            empty = self.data["empty"] = {}
+        return empty
+
+    def invalidate(self, sensor_type: Optional[str] = None) -> None:
+        """Forget discovered sensors.
+
+        Args:
+            sensor_type: Sensor type to forget (all types if None)
+        """
+        if sensor_type is None:
+            self.data.clear()
+        else:
+            self.data.pop(sensor_type, None)
+            self._empty().pop(sensor_type, None)
+        self.save()
+
+    def save(self) -> None:
+        """Write the cache to disk, ignoring errors (the cache is optional)."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
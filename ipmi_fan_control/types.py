@@ -1,6 +1,6 @@
 """Type definitions for the IPMI fan control module."""
 
-from typing import Any, Dict, Protocol
+from typing import Any, Dict, Optional, Protocol, TypedDict
 
 # Define types for IPMI interfaces
 IPMIInterface = Any  # Replace with actual type when available
@@ -8,8 +8,29 @@ IPMIConnection = Any  # Replace with actual type when available
 
 # Sensor types
 SensorReading = Dict[str, Any]
-FanSensor = Dict[str, Any]
-TemperatureSensor = Dict[str, Any]
+
+
+# Readings stay plain dicts (a dict literal is the cheapest record CPython can
+# build, and the CLI serializes them as-is); these only declare their schema.
+class FanSensor(TypedDict):
+    """A fan reading as returned by get_fan_speeds()."""
+    
+    id: Any
+    name: str
+    current_speed: Optional[float]  # None when the sensor has no reading
+    unit: str
+    status: str
+
+
+class TemperatureSensor(TypedDict):
+    """A temperature reading as returned by get_temperature_sensors()."""
+    
+    id: Any
+    name: str
+    current_temp: Optional[float]  # None when the sensor has no reading
+    unit: str
+    status: str
+
 
 # Define a protocol for callback functions
 class StatusCallback(Protocol):
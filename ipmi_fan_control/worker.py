@@ -0,0 +1,82 @@
+"""Long-lived background thread for the temperature monitor loops."""
+
+import threading
+from typing import Callable, Optional
+
+
+class MonitorWorker:
+    """Run a function on one reusable daemon thread.
+
+    The thread is created on the first ``start()`` and then sleeps on a
+    condition between runs, so stopping and restarting monitoring does not
+    create a new thread each time. The function itself decides when a run
+    ends (the monitor loops return once their stop event is set).
+    """
+
+    def __init__(self, target: Callable[[], None], name: str = "monitor-worker"):
+        """Initialize the worker.
+
+        Args:
+            target: Function executed once per ``start()``
+            name: Name of the worker thread
+        """
+        self.target = target
+        self.name = name
+        self.thread: Optional[threading.Thread] = None
+
+        self._cond = threading.Condition()
+        self._requested = 0  # Runs asked for by start()
+        self._started = 0  # Runs picked up by the thread
+        self._closed = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def start(self) -> None:
+        """Run the target on the worker thread, creating it if needed."""
+        with self._cond:
+            self._requested += 1
+            self._closed = False
+            self._idle.clear()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self.thread.start()
+            self._cond.notify()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no run is pending or in progress.
+
+        Args:
+            timeout: Maximum time to wait in seconds (forever if None)
+
+        Returns:
+            True if the worker is idle
+        """
+        return self._idle.wait(timeout)
+
+    def shutdown(self) -> None:
+        """Let the worker thread exit once the current run (if any) returns."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self) -> None:
+        """Worker thread body: wait for a start request, run, repeat."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._requested > self._started or self._closed
+                )
+                if self._requested == self._started:
+                    # Closed with nothing left to run
+                    self.thread = None
+                    return
+                self._started = self._requested
+
+            try:
+                self.target()
+            finally:
+                with self._cond:
+                    if self._requested == self._started:
+                        self._idle.set()
@@ -11,16 +11,21 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 @pytest.fixture(autouse=True)
 def mock_shutil_which():
-    """Mock shutil.which to always find ipmitool for testing."""
+    """Mock shutil.which to always find ipmitool (and nothing else) for testing."""
     import shutil
     
     original_which = shutil.which
     
     def mock_which(cmd, *args, **kwargs):
-        if cmd == "ipmitool":
-            return "/usr/bin/ipmitool"
-        return original_which(cmd, *args, **kwargs)
+        # Only ipmitool is ever looked up; skip the $PATH walk for anything else
+        return "/usr/bin/ipmitool" if cmd == "ipmitool" else None
     
     shutil.which = mock_which
     yield
-    shutil.which = original_which
\ No newline at end of file
+    shutil.which = original_which
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk SDR cache out of the user's home directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    yield tmp_path / "cache"
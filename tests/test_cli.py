@@ -8,14 +8,15 @@ from typer.testing import CliRunner
 
 # Import the CLI
 from ipmi_fan_control.cli import OutputFormat, app
+from ipmi_fan_control.cli import _install_signal_handlers as install_signal_handlers
 
 # Import the controller
 from ipmi_fan_control.ipmitool import DellIPMIToolFanController
 
 
-@pytest.fixture
-def mock_controller():
-    """Create a mock IPMI controller for testing."""
+@pytest.fixture(scope="session")
+def _mock_controller_template():
+    """Build the mock IPMI controller once; mock_controller resets it per test."""
     controller = MagicMock(spec=DellIPMIToolFanController)
     controller.test_connection.return_value = True
     controller.get_fan_speeds.return_value = [
@@ -50,13 +51,31 @@ def mock_controller():
             "status": "ok"
         }
     ]
+    controller.get_all_sensors.return_value = {
+        "fans": controller.get_fan_speeds.return_value,
+        "temps": controller.get_temperature_sensors.return_value,
+    }
     controller.get_highest_temperature.return_value = 45.0
     return controller
 
 
 @pytest.fixture
+def mock_controller(_mock_controller_template):
+    """Mock IPMI controller with call history and side effects cleared."""
+    _mock_controller_template.reset_mock(return_value=False, side_effect=True)
+    return _mock_controller_template
+
+
+@pytest.fixture(autouse=True)
+def no_signal_handlers():
+    """Keep commands from blocking SIGINT/SIGTERM in the test process."""
+    with patch('ipmi_fan_control.cli._install_signal_handlers') as mock_install:
+        yield mock_install
+
+
+@pytest.fixture(scope="module")
 def cli_runner():
-    """Create a CLI runner for testing Typer CLI."""
+    """Create a CLI runner for testing Typer CLI (stateless, so shared)."""
     return CliRunner()
 
 
@@ -73,7 +92,7 @@ class TestCLI:
         
         # Verify CLI called the controller correctly
         assert result.exit_code == 0
-        mock_controller.test_connection.assert_called()
+        mock_controller.connect.assert_called()
         mock_controller.get_fan_speeds.assert_called()
         
         # Check that output contains fan information
@@ -113,7 +132,7 @@ class TestCLI:
         
         # Verify CLI called the controller correctly
         assert result.exit_code == 0
-        mock_controller.test_connection.assert_called()
+        mock_controller.connect.assert_called()
         mock_controller.get_temperature_sensors.assert_called()
         
         # Check that output contains temperature information
@@ -132,7 +151,7 @@ class TestCLI:
         
         # Verify CLI called the controller correctly
         assert result.exit_code == 0
-        mock_controller.test_connection.assert_called()
+        mock_controller.connect.assert_called()
         mock_controller.set_fan_speed.assert_called_with(50)
         
         # Check that output shows success
@@ -148,7 +167,7 @@ class TestCLI:
         
         # Verify CLI called the controller correctly
         assert result.exit_code == 0
-        mock_controller.test_connection.assert_called()
+        mock_controller.connect.assert_called()
         mock_controller.set_automatic_control.assert_called()
         
         # Check that output shows success
@@ -173,24 +192,52 @@ class TestCLI:
         assert "Troubleshooting Tips" in result.stdout
 
     @patch('ipmi_fan_control.cli.IPMIController')
-    @patch('ipmi_fan_control.cli.time')
-    def test_pid_command(self, mock_time, mock_controller_class, cli_runner, mock_controller):
+    @patch('ipmi_fan_control.cli.shutdown_event')
+    def test_pid_command(self, mock_event, mock_controller_class, cli_runner, mock_controller):
         """Test the PID command with a quick runtime."""
         mock_controller_class.return_value = mock_controller
         
         # Run the CLI PID command with a 1-second runtime to avoid hanging
-        result = cli_runner.invoke(app, ["pid", "--time", "1"])
+        result = cli_runner.invoke(app, ["pid", "--time", "1", "--min-delta", "2"])
+        
+        # Waits on the shutdown event instead of polling
+        mock_event.wait.assert_called_once_with(timeout=1)
         
         # Verify CLI called the controller correctly
-        mock_controller.test_connection.assert_called()
+        mock_controller.connect.assert_called()
         mock_controller.configure_pid.assert_called()
         mock_controller.set_target_temperature.assert_called()
         mock_controller.set_monitor_interval.assert_called()
+        mock_controller.set_min_speed_delta.assert_called_once_with(2.0)
         mock_controller.start_temperature_monitoring.assert_called()
         
         # Should show successful completion
         assert "PID temperature control stopped" in result.stdout
 
+    @patch('ipmi_fan_control.cli.IPMIController')
+    @patch('ipmi_fan_control.cli.shutdown_event')
+    def test_pid_command_zero_time_runs_until_stopped(self, mock_event, mock_controller_class, cli_runner, mock_controller):
+        """Test that --time 0 runs until Ctrl+C instead of stopping at once."""
+        mock_controller_class.return_value = mock_controller
+        
+        result = cli_runner.invoke(app, ["pid", "--time", "0"])
+        
+        mock_event.wait.assert_called_once_with(timeout=None)
+        assert "Press Ctrl+C to stop" in result.stdout
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    @patch('ipmi_fan_control.cli.shutdown_event')
+    def test_pid_command_short_interval_warning(self, mock_event, mock_controller_class, cli_runner, mock_controller):
+        """Test that fast polling warns and the backoff limit is passed through."""
+        mock_controller_class.return_value = mock_controller
+        
+        result = cli_runner.invoke(
+            app, ["pid", "--time", "1", "--interval", "1", "--max-backoff", "8"]
+        )
+        
+        mock_controller.set_max_backoff.assert_called_once_with(8.0)
+        assert "hurt its responsiveness" in result.stdout
+
     @patch('ipmi_fan_control.cli.IPMIController')
     def test_yaml_output_format(self, mock_controller_class, cli_runner, mock_controller):
         """Test YAML output format."""
@@ -211,7 +258,7 @@ class TestCLI:
     def test_connection_error(self, mock_controller_class, cli_runner, mock_controller):
         """Test connection error handling."""
         mock_controller_class.return_value = mock_controller
-        mock_controller.test_connection.side_effect = RuntimeError("Connection failed")
+        mock_controller.connect.side_effect = RuntimeError("Connection failed")
         
         result = cli_runner.invoke(app, ["status"])
         
@@ -231,7 +278,7 @@ class TestCLI:
         result = cli_runner.invoke(app, ["set", "-10"])
         assert result.exit_code == 2  # Typer validation error
 
-    def test_cleanup_functions(self):
+    def test_cleanup_functions(self, no_signal_handlers):
         """Test cleanup and setup functions."""
         from ipmi_fan_control.cli import cleanup_and_restore, setup_cleanup
         
@@ -240,14 +287,13 @@ class TestCLI:
         
         # Test setup cleanup with auto_restore=True
         with patch('ipmi_fan_control.cli.atexit.register') as mock_atexit:
-            with patch('ipmi_fan_control.cli.signal.signal') as mock_signal:
-                setup_cleanup(mock_controller, auto_restore=True)
-                
-                # Should register cleanup function
-                mock_atexit.assert_called_once()
-                
-                # Should register signal handlers
-                assert mock_signal.call_count == 2
+            setup_cleanup(mock_controller, auto_restore=True)
+            
+            # Should register cleanup function
+            mock_atexit.assert_called_once()
+            
+            # Should install signal handling
+            no_signal_handlers.assert_called_once()
 
         # Test setup cleanup with auto_restore=False
         with patch('ipmi_fan_control.cli.atexit.register') as mock_atexit:
@@ -256,19 +302,22 @@ class TestCLI:
             # Should not register cleanup
             mock_atexit.assert_not_called()
 
-        # Test cleanup function with successful restore
+        # Test cleanup function with successful restore, only once
         with patch('ipmi_fan_control.cli._controller', mock_controller):
             with patch('ipmi_fan_control.cli._auto_restore', True):
-                cleanup_and_restore()
-                mock_controller.set_automatic_control.assert_called_once()
+                with patch('ipmi_fan_control.cli._cleaned_up', False):
+                    cleanup_and_restore()
+                    cleanup_and_restore()
+                    mock_controller.set_automatic_control.assert_called_once()
 
         # Test cleanup function with controller exception
         mock_controller.set_automatic_control.side_effect = RuntimeError("Test error")
         with patch('ipmi_fan_control.cli._controller', mock_controller):
             with patch('ipmi_fan_control.cli._auto_restore', True):
-                with patch('ipmi_fan_control.cli.logger.warning') as mock_warning:
-                    cleanup_and_restore()
-                    mock_warning.assert_called()
+                with patch('ipmi_fan_control.cli._cleaned_up', False):
+                    with patch('ipmi_fan_control.cli.logger.warning') as mock_warning:
+                        cleanup_and_restore()
+                        mock_warning.assert_called()
 
     @patch('ipmi_fan_control.cli.IPMIController')
     def test_temp_command_json_output(self, mock_controller_class, cli_runner, mock_controller):
@@ -296,49 +345,326 @@ class TestCLI:
         # Test successful connection
         controller = mock_controller_class()
         connect_controller(controller, OutputFormat.TABLE)
-        mock_controller.test_connection.assert_called_once()
+        mock_controller.connect.assert_called_once()
 
     @patch('ipmi_fan_control.cli.IPMIController')
     @patch('ipmi_fan_control.cli.shutil.which')
     def test_ipmitool_detection(self, mock_which, mock_controller_class, cli_runner):
         """Test ipmitool detection logic."""
-        # This test ensures the import logic is covered
+        from ipmi_fan_control.cli import _using_ipmitool
+
         mock_which.return_value = "/usr/bin/ipmitool"
         
-        # Re-import the module to trigger detection logic
-        import importlib
+        # Detection is cached; start from a clean cache instead of reloading
+        _using_ipmitool.cache_clear()
+        try:
+            assert _using_ipmitool() is True
+            assert _using_ipmitool() is True
+            mock_which.assert_called_once_with("ipmitool")
+        finally:
+            _using_ipmitool.cache_clear()
 
-        import ipmi_fan_control.cli
-        importlib.reload(ipmi_fan_control.cli)
-        
-        # Should have detected ipmitool
-        mock_which.assert_called()
+    def test_signal_handler(self):
+        """Test that a shutdown signal restores fan control and exits."""
+        import signal
 
-    @patch('ipmi_fan_control.cli.IPMIController')
-    def test_signal_handler(self, mock_controller_class, cli_runner, mock_controller):
-        """Test signal handler functionality."""
+        from ipmi_fan_control import cli
+        
+        cli.shutdown_event.clear()
+        with patch('ipmi_fan_control.cli.signal.sigwait', return_value=signal.SIGTERM) as mock_sigwait:
+            with patch('ipmi_fan_control.cli.cleanup_and_restore') as mock_cleanup:
+                with patch('ipmi_fan_control.cli.os._exit') as mock_exit:
+                    cli._wait_for_signal()
+        
+        mock_sigwait.assert_called_once_with(cli.SHUTDOWN_SIGNALS)
+        mock_cleanup.assert_called_once()
+        mock_exit.assert_called_once_with(0)
+        assert cli.shutdown_event.is_set()
+        cli.shutdown_event.clear()
+
+    def test_signal_during_graceful_wait(self):
+        """Test that a waiting command gets to stop cleanly before a forced exit."""
+        import signal
+
+        from ipmi_fan_control import cli
+        
+        cli.shutdown_event.clear()
+        with patch('ipmi_fan_control.cli._graceful_shutdown', True):
+            with patch('ipmi_fan_control.cli.signal.sigwait', return_value=signal.SIGINT) as mock_sigwait:
+                with patch('ipmi_fan_control.cli.cleanup_and_restore'):
+                    with patch('ipmi_fan_control.cli.os._exit') as mock_exit:
+                        cli._wait_for_signal()
+        
+        # First signal only wakes the waiter, the second one forces the exit
+        assert mock_sigwait.call_count == 2
+        mock_exit.assert_called_once_with(0)
+        cli.shutdown_event.clear()
+
+    def test_signal_waiter_rearms_after_graceful_stop(self):
+        """Test that each graceful run gets its own Ctrl+C without forcing an exit."""
+        import signal
+
+        from ipmi_fan_control import cli
+        
+        class Done(Exception):
+            pass
+        
+        def sigwait(signals):
+            if mock_sigwait.call_count == 2:
+                # The next pid run clears the event before it waits
+                assert cli.shutdown_event.is_set()
+                cli.shutdown_event.clear()
+            elif mock_sigwait.call_count == 3:
+                raise Done()
+            return signal.SIGINT
+        
+        cli.shutdown_event.clear()
+        with patch('ipmi_fan_control.cli._graceful_shutdown', True):
+            with patch('ipmi_fan_control.cli.signal.sigwait', side_effect=sigwait) as mock_sigwait:
+                with patch('ipmi_fan_control.cli.os._exit') as mock_exit:
+                    with pytest.raises(Done):
+                        cli._wait_for_signal()
+        
+        mock_exit.assert_not_called()
+        assert cli.shutdown_event.is_set()
+        cli.shutdown_event.clear()
+
+    def test_install_signal_handlers(self):
+        """Test that signals are blocked and handed to one waiter thread."""
         import signal
 
-        from ipmi_fan_control.cli import setup_cleanup
+        from ipmi_fan_control import cli
+        
+        with patch('ipmi_fan_control.cli._signal_thread', None):
+            with patch('ipmi_fan_control.cli.signal.pthread_sigmask') as mock_sigmask:
+                with patch('ipmi_fan_control.cli.threading.Thread') as mock_thread:
+                    with patch('ipmi_fan_control.cli.signal.signal') as mock_signal:
+                        install_signal_handlers()
+                        install_signal_handlers()
+        
+        mock_sigmask.assert_called_once_with(signal.SIG_BLOCK, cli.SHUTDOWN_SIGNALS)
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+        # Signals caught while a thread has them unblocked go to the waiter
+        assert {args[0][1] for args in mock_signal.call_args_list} == {cli._forward_signal}
+
+    def test_install_signal_handlers_fallback(self, monkeypatch):
+        """Test the signal.signal fallback without pthread_sigmask."""
+        from ipmi_fan_control import cli
         
-        mock_controller_class.return_value = mock_controller
+        monkeypatch.delattr(cli.signal, "pthread_sigmask")
+        with patch('ipmi_fan_control.cli._signal_thread', None):
+            with patch('ipmi_fan_control.cli.signal.signal') as mock_signal:
+                install_signal_handlers()
         
+        assert mock_signal.call_count == 2
+        handler = mock_signal.call_args_list[0][0][1]
         with patch('ipmi_fan_control.cli.cleanup_and_restore') as mock_cleanup:
             with patch('sys.exit') as mock_exit:
-                # Set up signal handlers
-                setup_cleanup(mock_controller, auto_restore=True)
-                
-                # Trigger signal handler
-                handler_func = None
-                with patch('ipmi_fan_control.cli.signal.signal') as mock_signal:
-                    setup_cleanup(mock_controller, auto_restore=True)
-                    # Get the signal handler function from the call
-                    calls = mock_signal.call_args_list
-                    if calls:
-                        handler_func = calls[0][0][1]
-                
-                if handler_func:
-                    # Call the signal handler
-                    handler_func(signal.SIGINT, None)
-                    mock_cleanup.assert_called()
-                    mock_exit.assert_called_with(0)
\ No newline at end of file
+                handler(cli.signal.SIGINT, None)
+                mock_cleanup.assert_called_once()
+                mock_exit.assert_called_with(0)
+        cli.shutdown_event.clear()
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_compatibility_reads_sensors_once(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that the compatibility test reads all sensors in one pass."""
+        mock_controller_class.return_value = mock_controller
+        
+        result = cli_runner.invoke(app, ["test"])
+        
+        assert result.exit_code == 0
+        mock_controller.get_all_sensors.assert_called_once()
+        mock_controller.get_fan_speeds.assert_not_called()
+        mock_controller.get_temperature_sensors.assert_not_called()
+        assert "Found 2 fans" in result.stdout
+        assert "Found 2 temperature sensors" in result.stdout
+
+    def test_format_sensor_data(self, mock_controller):
+        """Test that readings are mapped to the output schema in order."""
+        from ipmi_fan_control.cli import format_sensor_data
+        
+        fans = format_sensor_data(mock_controller.get_fan_speeds.return_value, "fan")
+        temps = format_sensor_data(
+            mock_controller.get_temperature_sensors.return_value, "temperature"
+        )
+        
+        assert fans[0] == {
+            "id": "33h", "name": "System Fan 1", "speed": 3240, "unit": "RPM", "status": "ok"
+        }
+        assert list(temps[1]) == ["id", "name", "temperature", "unit", "status"]
+        assert temps[1]["temperature"] == 45
+
+    def test_dump_json_without_orjson(self):
+        """Test that JSON output falls back to the standard library."""
+        from ipmi_fan_control import cli
+        
+        with patch.object(cli, 'orjson', None):
+            assert cli.dump_json({"fans": []}) == '{"fans": []}'
+            assert json.loads(cli.dump_json({"fans": [1]}, indent=True)) == {"fans": [1]}
+
+    def test_ipmi_session_reuses_connection(self, mock_controller):
+        """Test that the session connects once and disconnects on close."""
+        from ipmi_fan_control.cli import _IpmiSession
+        
+        session = _IpmiSession(mock_controller, OutputFormat.JSON)
+        with session as controller:
+            assert controller is mock_controller
+        with session:
+            pass
+        
+        mock_controller.connect.assert_called_once()
+        mock_controller.disconnect.assert_not_called()
+        
+        session.close()
+        session.close()
+        mock_controller.disconnect.assert_called_once()
+
+    def test_dump_yaml_keeps_key_order(self):
+        """Test that YAML output keeps the JSON key order."""
+        from ipmi_fan_control.cli import dump_yaml
+        
+        assert dump_yaml({"result": "success", "mode": "automatic"}) == (
+            "result: success\nmode: automatic\n"
+        )
+
+    def test_backend_selected_lazily(self):
+        """Test that the backend is imported on first use and then cached."""
+        from ipmi_fan_control import cli
+        from ipmi_fan_control.ipmi import DellIPMIFanController
+        
+        cli._using_ipmitool.cache_clear()
+        with patch('ipmi_fan_control.cli.IPMIController', None):
+            with patch('ipmi_fan_control.cli.shutil.which', return_value=None) as mock_which:
+                assert cli._controller_class() is DellIPMIFanController
+                assert cli._controller_class() is DellIPMIFanController
+                mock_which.assert_called_once()
+        cli._using_ipmitool.cache_clear()
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_result_yaml_keys_stay_sorted(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that set/auto YAML results keep their sorted key order."""
+        mock_controller_class.return_value = mock_controller
+        
+        result = cli_runner.invoke(app, ["--output", "yaml", "set", "40"])
+        assert result.stdout.strip() == "fan_speed: 40\nresult: success"
+        
+        result = cli_runner.invoke(app, ["--output", "yaml", "auto"])
+        assert result.stdout.strip() == "mode: automatic\nresult: success"
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_auto_command_error_yaml_output(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that errors use the machine-readable format when requested."""
+        mock_controller_class.return_value = mock_controller
+        mock_controller.set_automatic_control.side_effect = RuntimeError("BMC busy")
+        
+        result = cli_runner.invoke(app, ["--output", "yaml", "auto"])
+        
+        assert result.exit_code == 1
+        assert "error: 'Error enabling automatic fan control: BMC busy'" in result.stdout
+        assert "Troubleshooting Tips" not in result.stdout
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_compatibility_diagnostics_batched(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that diagnostic commands are sent as one batch."""
+        mock_controller_class.return_value = mock_controller
+        batch_results = [
+            ("chassis status", "System Power : on", None),
+            ("sensor reading", "", "IPMI command failed: usage"),
+            ("sdr list", "Fan1 | 3240 RPM | ok", None),
+            ("mc info", "Device ID : 32", None),
+            ("raw 0x30 0xF0", "01 02", None),
+        ]
+        
+        # Patched rather than assigned: the mock controller is shared across tests
+        with patch.object(mock_controller, "_run_command_batch", return_value=batch_results) as mock_batch:
+            result = cli_runner.invoke(app, ["test", "--diagnostic"])
+        
+        assert result.exit_code == 0
+        mock_batch.assert_called_once()
+        mock_controller._run_command.assert_not_called()
+        assert "Command failed: IPMI command failed: usage" in result.stdout
+        assert "OEM command succeeded: 01 02" in result.stdout
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_json_output_is_not_mixed_with_logs(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that machine-readable output is the only thing on stdout."""
+        from ipmi_fan_control.cli import logger
+        
+        mock_controller_class.return_value = mock_controller
+        
+        result = cli_runner.invoke(app, ["--output", "json", "set", "40"])
+        
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == {"result": "success", "fan_speed": 40}
+        assert logger.silent is True
+        logger.set_silent(False)
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_shell_reuses_connection(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that shell runs several commands over one controller and connection."""
+        mock_controller_class.return_value = mock_controller
+        
+        result = cli_runner.invoke(
+            app,
+            ["--output", "json", "shell"],
+            input="status\nset 40\nbogus\nset 101\nauto\nexit\ntemp\n",
+        )
+        
+        assert result.exit_code == 0
+        mock_controller_class.assert_called_once()
+        mock_controller.connect.assert_called_once()
+        mock_controller.get_fan_speeds.assert_called_once()
+        mock_controller.set_fan_speed.assert_called_once_with(40)
+        mock_controller.set_automatic_control.assert_called()
+        # Nothing after "exit" runs
+        mock_controller.get_temperature_sensors.assert_not_called()
+        assert {"result": "success", "fan_speed": 40} in [
+            json.loads(line) for line in result.stdout.splitlines() if line.startswith("{\"")
+        ]
+
+    @patch('ipmi_fan_control.cli.IPMIController')
+    def test_shell_runs_pid_after_interrupted_pid(self, mock_controller_class, cli_runner, mock_controller):
+        """Test that a pid stopped by Ctrl+C does not end the next pid in the shell."""
+        from ipmi_fan_control import cli
+        
+        mock_controller_class.return_value = mock_controller
+        already_stopped = []
+        
+        def start_temperature_monitoring(**kwargs):
+            already_stopped.append(cli.shutdown_event.is_set())
+            # Ctrl+C while the run is waiting
+            cli.shutdown_event.set()
+        
+        mock_controller.start_temperature_monitoring.side_effect = start_temperature_monitoring
+        result = cli_runner.invoke(
+            app, ["shell"], input="pid --time 60\npid --time 60\nexit\n"
+        )
+        cli.shutdown_event.clear()
+        
+        assert result.exit_code == 0
+        assert already_stopped == [False, False]
+        assert mock_controller.stop_temperature_monitoring.call_count == 2
+        assert result.stdout.count("PID temperature control stopped") == 2
+
+    def test_error_envelopes_round_trip(self, capsys):
+        """Test that templated error envelopes parse back to the message."""
+        import yaml
+        
+        from ipmi_fan_control.cli import _emit_error
+        
+        for message in ['BMC "busy": it\'s #1 - retry', "multi\nline\ttext", "ünïcode"]:
+            _emit_error(message, OutputFormat.JSON)
+            assert json.loads(capsys.readouterr().out) == {"error": message}
+            
+            _emit_error(message, OutputFormat.YAML)
+            assert yaml.safe_load(capsys.readouterr().out) == {"error": message}
+
+    def test_ipmi_command_hides_controller_parameter(self):
+        """Test that decorated commands expose only their CLI parameters."""
+        import inspect
+        
+        from ipmi_fan_control.cli import set_speed, status
+        
+        assert list(inspect.signature(status).parameters) == ["ctx"]
+        assert list(inspect.signature(set_speed).parameters) == ["ctx", "percentage"]
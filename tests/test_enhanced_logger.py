@@ -1,9 +1,121 @@
 """Tests for the enhanced logger module."""
 
+import io
 import logging
-from unittest.mock import patch
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
 
-from ipmi_fan_control.enhanced_logger import EnhancedLogger, logger
+import pytest
+from rich.logging import RichHandler
+
+from ipmi_fan_control.enhanced_logger import (
+    _TEMP_COLORS,
+    _TEMP_THRESHOLDS,
+    PID_STATUS_CACHE_SIZE,
+    EnhancedLogger,
+    _band_color,
+    logger,
+)
+
+# 12:34:56 local time
+NOON_ISH = time.struct_time((2024, 1, 1, 12, 34, 56, 0, 1, 0))
+
+# Read-only sensor data shared by the print_*_data tests
+FANS = [
+    {
+        'id': 'Fan1',
+        'name': 'System Fan 1',
+        'current_speed': 1500,
+        'unit': 'RPM',
+        'status': 'OK'
+    },
+    {
+        'id': 'Fan2',
+        'name': 'System Fan 2',
+        'current_speed': 3500,
+        'unit': 'RPM',
+        'status': 'Warning'
+    },
+    {
+        'id': 'Fan3',
+        'name': 'System Fan 3',
+        'current_speed': 5000,
+        'unit': 'RPM',
+        'status': 'Error'
+    }
+]
+
+TEMPS = [
+    {
+        'id': 'Temp1',
+        'name': 'CPU Temperature',
+        'current_temp': 35,
+        'unit': '°C',
+        'status': 'OK'
+    },
+    {
+        'id': 'Temp2',
+        'name': 'System Temperature',
+        'current_temp': 55,
+        'unit': '°C',
+        'status': 'Warning'
+    },
+    {
+        'id': 'Temp3',
+        'name': 'Hot Temperature',
+        'current_temp': 85,
+        'unit': '°C',
+        'status': 'Critical'
+    }
+]
+
+# One temperature in each colour band: green, yellow, magenta, red
+BANDED_TEMPS = [
+    {'id': 'T1', 'name': 'Cool', 'current_temp': 30, 'unit': '°C', 'status': 'OK'},    # green
+    {'id': 'T2', 'name': 'Warm', 'current_temp': 50, 'unit': '°C', 'status': 'OK'},   # yellow
+    {'id': 'T3', 'name': 'Hot', 'current_temp': 70, 'unit': '°C', 'status': 'OK'},    # magenta
+    {'id': 'T4', 'name': 'Very Hot', 'current_temp': 90, 'unit': '°C', 'status': 'OK'} # red
+]
+
+
+@contextmanager
+def _swap_in_mock(obj, name):
+    """Shadow a method with a MagicMock on the instance, then drop it again.
+    
+    A plain attribute swap; cheaper than entering and leaving patch.object()
+    in every test.
+    """
+    mock = MagicMock()
+    setattr(obj, name, mock)
+    try:
+        yield mock
+    finally:
+        delattr(obj, name)
+
+
+@pytest.fixture(scope="module")
+def test_logger():
+    """Logger with every level enabled, shared by the formatting tests.
+    
+    Uses its own logger name so tests that build EnhancedLogger() and reset
+    the "ipmi-fan-control" logger cannot change its level mid-module.
+    """
+    return EnhancedLogger(name="test-enhanced-logger", level=logging.DEBUG)
+
+
+@pytest.fixture
+def mock_info(test_logger):
+    """Mocked test_logger.logger.info."""
+    with _swap_in_mock(test_logger.logger, "info") as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_warning(test_logger):
+    """Mocked test_logger.logger.warning."""
+    with _swap_in_mock(test_logger.logger, "warning") as mock:
+        yield mock
 
 
 class TestEnhancedLogger:
@@ -32,250 +144,125 @@ class TestEnhancedLogger:
         assert len(test_logger.logger.handlers) == 1
         
         # Handler should be RichHandler
-        from rich.logging import RichHandler
         assert isinstance(test_logger.logger.handlers[0], RichHandler)
 
-    def test_debug_logging(self):
-        """Test debug message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'debug') as mock_debug:
-            test_logger.debug("Test debug message")
-            mock_debug.assert_called_once_with("[dim cyan]🔍 Test debug message[/dim cyan]")
-
-    def test_info_logging(self):
-        """Test info message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.info("Test info message")
-            mock_info.assert_called_once_with("[white]Test info message[/white]")
-
-    def test_success_logging(self):
-        """Test success message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.success("Test success message")
-            mock_info.assert_called_once_with("[green]✓ Test success message[/green]")
-
-    def test_warning_logging(self):
-        """Test warning message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'warning') as mock_warning:
-            test_logger.warning("Test warning message")
-            mock_warning.assert_called_once_with("[yellow]⚠ Test warning message[/yellow]")
-
-    def test_error_logging(self):
-        """Test error message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'error') as mock_error:
-            test_logger.error("Test error message")
-            mock_error.assert_called_once_with("[red]✗ Test error message[/red]")
-
-    def test_critical_logging(self):
-        """Test critical message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'critical') as mock_critical:
-            test_logger.critical("Test critical message")
-            mock_critical.assert_called_once_with("[bold red]✗ Test critical message[/bold red]")
-
-    def test_status_logging(self):
-        """Test status message logging."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.status("Test status message")
-            mock_info.assert_called_once_with("[cyan]→ Test status message[/cyan]")
+    @pytest.mark.parametrize(
+        "method, message, logger_attr, expected",
+        [
+            ("debug", "Test debug message", "debug", "[dim cyan]🔍 Test debug message[/dim cyan]"),
+            ("info", "Test info message", "info", "[white]Test info message[/white]"),
+            ("success", "Test success message", "info", "[green]✓ Test success message[/green]"),
+            ("warning", "Test warning message", "warning", "[yellow]⚠ Test warning message[/yellow]"),
+            ("error", "Test error message", "error", "[red]✗ Test error message[/red]"),
+            ("critical", "Test critical message", "critical", "[bold red]✗ Test critical message[/bold red]"),
+            ("status", "Test status message", "info", "[cyan]→ Test status message[/cyan]"),
+            ("section_header", "Test Section", "info", "\n[bold cyan]═══ Test Section ═══[/bold cyan]"),
+        ],
+    )
+    def test_message_formatting(self, test_logger, method, message, logger_attr, expected):
+        """Test that each message helper logs its markup at the right level."""
+        with _swap_in_mock(test_logger.logger, logger_attr) as mock_log:
+            getattr(test_logger, method)(message)
+        mock_log.assert_called_once_with(expected)
 
-    def test_section_header(self):
-        """Test section header printing."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.section_header("Test Section")
-            mock_info.assert_called_once_with("\n[bold cyan]═══ Test Section ═══[/bold cyan]")
-
-    def test_print_fan_data_empty(self):
+    def test_print_fan_data_empty(self, test_logger, mock_warning):
         """Test printing fan data with empty list."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger, 'warning') as mock_warning:
-            test_logger.print_fan_data([])
-            mock_warning.assert_called_once_with("No fans detected in this system")
+        test_logger.print_fan_data([])
+        mock_warning.assert_called_once_with("[yellow]⚠ No fans detected in this system[/yellow]")
 
-    def test_print_fan_data_with_fans(self):
+    def test_print_fan_data_with_fans(self, test_logger, mock_info):
         """Test printing fan data with actual fan data."""
-        test_logger = EnhancedLogger()
-        
-        fans = [
-            {
-                'id': 'Fan1',
-                'name': 'System Fan 1',
-                'current_speed': 1500,
-                'unit': 'RPM',
-                'status': 'OK'
-            },
-            {
-                'id': 'Fan2',
-                'name': 'System Fan 2',
-                'current_speed': 3500,
-                'unit': 'RPM',
-                'status': 'Warning'
-            },
-            {
-                'id': 'Fan3',
-                'name': 'System Fan 3',
-                'current_speed': 5000,
-                'unit': 'RPM',
-                'status': 'Error'
-            }
-        ]
+        test_logger.print_fan_data(FANS)
         
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_fan_data(fans)
-            
-            # Should call info multiple times (header + each fan)
-            assert mock_info.call_count >= 4  # 1 header + 3 fans
+        # Header, then all fans in a single record
+        assert mock_info.call_count == 2
+        rows = mock_info.call_args[0][0].split("\n")
+        assert len(rows) == 3
+        assert "System Fan 3" in rows[2]
 
-    def test_print_fan_data_speed_colors(self):
+    def test_print_fan_data_speed_colors(self, test_logger, mock_info):
         """Test fan speed color coding."""
-        test_logger = EnhancedLogger()
-        
         # Test low speed (green)
         fan_low = {
             'id': 'Fan1', 'name': 'Test Fan', 'current_speed': 1000,
             'unit': 'RPM', 'status': 'OK'
         }
         
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_fan_data([fan_low])
-            # Should contain green color tag for low speed
-            assert any('[green]1000[/green]' in str(call) for call in mock_info.call_args_list)
+        test_logger.print_fan_data([fan_low])
+        # Should contain green color tag for low speed
+        assert any('[green]1000[/green]' in call.args[0] for call in mock_info.call_args_list)
 
-    def test_print_fan_data_non_numeric_speed(self):
+    def test_print_fan_data_non_numeric_speed(self, test_logger, mock_info):
         """Test fan data with non-numeric speed."""
-        test_logger = EnhancedLogger()
-        
         fan = {
             'id': 'Fan1', 'name': 'Test Fan', 'current_speed': 'N/A',
             'unit': 'RPM', 'status': 'OK'
         }
         
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_fan_data([fan])
-            # Should handle non-numeric speed gracefully
-            assert mock_info.called
+        test_logger.print_fan_data([fan])
+        # Should handle non-numeric speed gracefully
+        assert mock_info.called
 
-    def test_print_temperature_data_empty(self):
+    def test_print_temperature_data_empty(self, test_logger, mock_warning):
         """Test printing temperature data with empty list."""
-        test_logger = EnhancedLogger()
-        
-        with patch.object(test_logger, 'warning') as mock_warning:
-            test_logger.print_temperature_data([])
-            mock_warning.assert_called_once_with("No temperature sensors detected")
+        test_logger.print_temperature_data([])
+        mock_warning.assert_called_once_with("[yellow]⚠ No temperature sensors detected[/yellow]")
 
-    def test_print_temperature_data_with_temps(self):
+    def test_print_temperature_data_with_temps(self, test_logger, mock_info):
         """Test printing temperature data with actual temperature data."""
-        test_logger = EnhancedLogger()
-        
-        temps = [
-            {
-                'id': 'Temp1',
-                'name': 'CPU Temperature',
-                'current_temp': 35,
-                'unit': '°C',
-                'status': 'OK'
-            },
-            {
-                'id': 'Temp2',
-                'name': 'System Temperature',
-                'current_temp': 55,
-                'unit': '°C',
-                'status': 'Warning'
-            },
-            {
-                'id': 'Temp3',
-                'name': 'Hot Temperature',
-                'current_temp': 85,
-                'unit': '°C',
-                'status': 'Critical'
-            }
-        ]
+        test_logger.print_temperature_data(TEMPS)
         
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_temperature_data(temps)
-            
-            # Should call info multiple times (header + each temp)
-            assert mock_info.call_count >= 4  # 1 header + 3 temperatures
+        # Header, then all temperatures in a single record
+        assert mock_info.call_count == 2
+        rows = mock_info.call_args[0][0].split("\n")
+        assert len(rows) == 3
+        assert "Hot Temperature" in rows[2]
 
-    def test_print_temperature_data_color_coding(self):
+    def test_print_temperature_data_color_coding(self, test_logger, mock_info):
         """Test temperature color coding based on values."""
-        test_logger = EnhancedLogger()
-        
-        # Test different temperature ranges
-        temps = [
-            {'id': 'T1', 'name': 'Cool', 'current_temp': 30, 'unit': '°C', 'status': 'OK'},    # green
-            {'id': 'T2', 'name': 'Warm', 'current_temp': 50, 'unit': '°C', 'status': 'OK'},   # yellow
-            {'id': 'T3', 'name': 'Hot', 'current_temp': 70, 'unit': '°C', 'status': 'OK'},    # magenta
-            {'id': 'T4', 'name': 'Very Hot', 'current_temp': 90, 'unit': '°C', 'status': 'OK'} # red
-        ]
-        
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_temperature_data(temps)
-            
-            call_args_str = str(mock_info.call_args_list)
-            # Should contain different color tags for different temperatures
-            assert '[green]30[/green]' in call_args_str
-            assert '[yellow]50[/yellow]' in call_args_str
-            assert '[magenta]70[/magenta]' in call_args_str
-            assert '[red]90[/red]' in call_args_str
-
-    def test_print_temperature_data_non_numeric(self):
+        test_logger.print_temperature_data(BANDED_TEMPS)
+        
+        call_args_str = "".join(call.args[0] for call in mock_info.call_args_list)
+        # Should contain different color tags for different temperatures
+        assert '[green]30[/green]' in call_args_str
+        assert '[yellow]50[/yellow]' in call_args_str
+        assert '[magenta]70[/magenta]' in call_args_str
+        assert '[red]90[/red]' in call_args_str
+
+    def test_print_temperature_data_non_numeric(self, test_logger, mock_info):
         """Test temperature data with non-numeric temperature."""
-        test_logger = EnhancedLogger()
-        
         temp = {
             'id': 'Temp1', 'name': 'Test Temp', 'current_temp': 'N/A',
             'unit': '°C', 'status': 'OK'
         }
         
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_temperature_data([temp])
-            # Should handle non-numeric temperature gracefully
-            assert mock_info.called
+        test_logger.print_temperature_data([temp])
+        # Should handle non-numeric temperature gracefully
+        assert mock_info.called
 
-    def test_print_pid_status(self):
+    def test_print_pid_status(self, test_logger, mock_info):
         """Test PID status printing."""
-        test_logger = EnhancedLogger()
-        
         status = {
             'temperature': 45.5,
             'target': 50.0,
             'fan_speed': 65
         }
         
-        with patch('time.strftime', return_value='12:34:56'):
-            with patch.object(test_logger.logger, 'info') as mock_info:
-                test_logger.print_pid_status(status)
-                
-                mock_info.assert_called_once()
-                call_args = str(mock_info.call_args)
-                
-                # Should contain timestamp and all values
-                assert '12:34:56' in call_args
-                assert '45.5°C' in call_args
-                assert '50.0°C' in call_args
-                assert '65%' in call_args
-                assert '-4.5°C' in call_args  # error calculation
-
-    def test_print_pid_status_color_coding(self):
+        with patch('time.localtime', return_value=NOON_ISH):
+            test_logger.print_pid_status(status)
+            
+            mock_info.assert_called_once()
+            call_args = mock_info.call_args.args[0]
+            
+            # Should contain timestamp and all values
+            assert '12:34:56' in call_args
+            assert '45.5°C' in call_args
+            assert '50.0°C' in call_args
+            assert '65%' in call_args
+            assert '-4.5°C' in call_args  # error calculation
+
+    def test_print_pid_status_color_coding(self, test_logger, mock_info):
         """Test PID status color coding."""
-        test_logger = EnhancedLogger()
-        
         # Test close to target (should be green)
         status_close = {
             'temperature': 49.5,
@@ -283,33 +270,115 @@ class TestEnhancedLogger:
             'fan_speed': 30
         }
         
-        with patch('time.strftime', return_value='12:34:56'):
-            with patch.object(test_logger.logger, 'info') as mock_info:
-                test_logger.print_pid_status(status_close)
-                
-                call_args_str = str(mock_info.call_args)
-                # Temperature should be green when close to target
-                assert '[green]49.5°C[/green]' in call_args_str
-                # Fan speed should be green when low
-                assert '[green]30%[/green]' in call_args_str
-
-    def test_print_troubleshooting_tips(self):
+        with patch('time.localtime', return_value=NOON_ISH):
+            test_logger.print_pid_status(status_close)
+            
+            call_args_str = mock_info.call_args.args[0]
+            # Temperature should be green when close to target
+            assert '[green]49.5°C[/green]' in call_args_str
+            # Fan speed should be green when low
+            assert '[green]30%[/green]' in call_args_str
+
+    def test_print_troubleshooting_tips(self, test_logger, mock_info):
         """Test troubleshooting tips printing."""
-        test_logger = EnhancedLogger()
+        test_logger.print_troubleshooting_tips()
         
-        with patch.object(test_logger.logger, 'info') as mock_info:
-            test_logger.print_troubleshooting_tips()
-            
-            # Should call info multiple times (header + tips)
-            assert mock_info.call_count >= 7  # 1 header + 6 tips
-            
-            # Check that tips are properly formatted
-            call_args_list = [str(call) for call in mock_info.call_args_list]
-            tip_calls = [call for call in call_args_list if '[yellow]' in call and '.[/yellow]' in call]
-            assert len(tip_calls) == 6  # Should have 6 numbered tips
+        # Should call info multiple times (header + tips)
+        assert mock_info.call_count >= 7  # 1 header + 6 tips
+        
+        # Check that tips are properly formatted
+        messages = [call.args[0] for call in mock_info.call_args_list]
+        tip_calls = [msg for msg in messages if '[yellow]' in msg and '.[/yellow]' in msg]
+        assert len(tip_calls) == 6  # Should have 6 numbered tips
 
     def test_global_logger_instance(self):
         """Test that global logger instance is properly created."""
         
         assert isinstance(logger, EnhancedLogger)
-        assert logger.logger.name == "ipmi-fan-control"
\ No newline at end of file
+        assert logger.logger.name == "ipmi-fan-control"
+    def test_set_silent(self, capsys):
+        """Test that a silent logger renders nothing until re-enabled."""
+        test_logger = EnhancedLogger(name="test-silent")
+        
+        test_logger.set_silent()
+        assert test_logger.silent is True
+        test_logger.error("hidden")
+        test_logger.print_fan_data([
+            {"id": "30h", "name": "Fan1", "current_speed": 3240, "unit": "RPM", "status": "ok"}
+        ])
+        assert capsys.readouterr().out == ""
+        
+        test_logger.set_silent(False)
+        assert test_logger.silent is False
+
+    def test_pid_status_cache(self):
+        """Test that repeated PID status values reuse the rendered markup."""
+        test_logger = EnhancedLogger()
+        status = {"temperature": 55.0, "target": 50.0, "fan_speed": 45}
+        
+        with patch.object(test_logger.logger, 'info') as mock_info:
+            test_logger.print_pid_status(status)
+            test_logger.print_pid_status(status)
+            
+            assert mock_info.call_count == 2
+            assert mock_info.call_args_list[0] == mock_info.call_args_list[1]
+        assert len(test_logger._pid_status_cache) == 1
+        
+        # Least recently used lines are evicted
+        for speed in range(PID_STATUS_CACHE_SIZE + 1):
+            test_logger._format_pid_status(55.0, 50.0, speed)
+        assert len(test_logger._pid_status_cache) == PID_STATUS_CACHE_SIZE
+        assert (55.0, 50.0, 45) not in test_logger._pid_status_cache
+
+    def test_buffered_defers_flushes(self):
+        """Test that buffered output is written in batches and on exit."""
+        test_logger = EnhancedLogger()
+        stream = MagicMock(wraps=io.StringIO())
+        stream.isatty.return_value = False
+        test_logger.console.file = stream
+        
+        with test_logger.buffered(flush_every=3):
+            for _ in range(4):
+                test_logger.info("tick")
+            assert stream.flush.call_count == 1
+            # The last record is still held back
+            assert stream.getvalue().count("tick") == 3
+        
+        assert stream.flush.call_count == 2
+        assert stream.getvalue().count("tick") == 4
+
+    def test_plain_output_off_terminal(self):
+        """Test that routine records skip Rich rendering when not on a terminal."""
+        test_logger = EnhancedLogger()
+        stream = io.StringIO()
+        test_logger.console.file = stream
+        
+        test_logger.success("Connected")
+        test_logger.warning("Careful")
+        
+        lines = stream.getvalue().splitlines()
+        assert lines[0] == "INFO     ✓ Connected"
+        assert "[green]" not in stream.getvalue()
+        assert "⚠ Careful" in lines[1]
+        assert lines[1].startswith("WARNING")
+
+    def test_filtered_levels_skip_formatting(self):
+        """Test that messages below the logger level are never built or logged."""
+        test_logger = EnhancedLogger(level=logging.WARNING)
+        
+        with patch.object(test_logger.logger, 'info') as mock_info, \
+             patch.object(test_logger.logger, 'debug') as mock_debug, \
+             patch.object(test_logger, '_format_pid_status') as mock_format:
+            test_logger.debug("hidden")
+            test_logger.info("hidden")
+            test_logger.status("hidden")
+            test_logger.print_pid_status({"temperature": 50.0, "target": 50.0, "fan_speed": 30})
+            
+            mock_debug.assert_not_called()
+            mock_info.assert_not_called()
+            mock_format.assert_not_called()
+
+    def test_band_color_boundaries(self):
+        """Test that band thresholds are exclusive upper bounds."""
+        colors = [_band_color(t, _TEMP_THRESHOLDS, _TEMP_COLORS) for t in (39.9, 40, 60, 79.9, 80)]
+        assert colors == ["green", "yellow", "magenta", "magenta", "red"]
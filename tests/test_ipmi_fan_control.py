@@ -1,72 +1,174 @@
 """Tests for the IPMI fan control module."""
 
-import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
+
+import pytest
 
 from ipmi_fan_control.ipmi import DellIPMIFanController
 
 
-class TestDellIPMIFanController(unittest.TestCase):
-    """Test the Dell IPMI fan controller."""
+@pytest.fixture
+def mock_ipmi():
+    """Mock pyipmi connection handed to the controller."""
+    # A fresh Mock per test: its session and methods are created on first
+    # access, and sharing (or copying) one would carry call history over
+    return Mock()
 
-    @patch('pyipmi.create_connection')
-    @patch('pyipmi.interfaces.create_interface')
-    def setUp(self, mock_create_interface, mock_create_connection):
-        """Set up the test environment."""
-        self.mock_interface = Mock()
-        self.mock_ipmi = Mock()
-        
-        mock_create_interface.return_value = self.mock_interface
-        mock_create_connection.return_value = self.mock_ipmi
-        
-        self.mock_ipmi.session = Mock()
-        self.mock_ipmi.session.set_session_type_rmcp = Mock()
-        self.mock_ipmi.session.set_auth_type_user = Mock()
-        
-        self.controller = DellIPMIFanController(
+
+@pytest.fixture
+def controller(mock_ipmi):
+    """Create a controller wired to the mock pyipmi connection."""
+    with patch('pyipmi.interfaces.create_interface', return_value=Mock()), \
+         patch('pyipmi.create_connection', return_value=mock_ipmi):
+        return DellIPMIFanController(
             host="192.168.1.100",
             username="test",
             password="test"
         )
 
-    def test_connect(self):
+
+class TestDellIPMIFanController:
+    """Test the Dell IPMI fan controller."""
+
+    def test_connect(self, controller, mock_ipmi):
         """Test connecting to the IPMI interface."""
-        self.controller.connect()
+        controller.connect()
         
-        self.mock_ipmi.session.set_session_type_rmcp.assert_called_once_with(
+        mock_ipmi.session.set_session_type_rmcp.assert_called_once_with(
             "192.168.1.100", port=623
         )
-        self.mock_ipmi.session.set_auth_type_user.assert_called_once_with(
+        mock_ipmi.session.set_auth_type_user.assert_called_once_with(
             "test", "test"
         )
-        self.assertTrue(self.controller.connected)
+        assert controller.connected
 
-    def test_disconnect(self):
+    def test_disconnect(self, controller, mock_ipmi):
         """Test disconnecting from the IPMI interface."""
-        self.controller.connected = True
-        self.controller.disconnect()
+        controller.connected = True
+        controller.disconnect()
+        
+        mock_ipmi.session.close.assert_called_once()
+        assert not controller.connected
+
+    def test_disconnect_after_connect(self, controller, mock_ipmi):
+        """Test that disconnect closes the session resolved at connect time."""
+        controller.connect()
+        controller.disconnect()
+        controller.disconnect()
         
-        self.mock_ipmi.session.close.assert_called_once()
-        self.assertFalse(self.controller.connected)
+        mock_ipmi.session.close.assert_called_once()
+        assert not controller.connected
 
-    def test_set_fan_speed(self):
+    def test_disconnect_without_session(self, controller, mock_ipmi):
+        """Test that disconnect tolerates a session that was never opened."""
+        controller.connected = True
+        mock_ipmi.session.close.side_effect = AttributeError("_session")
+        
+        controller.disconnect()
+        
+        assert not controller.connected
+
+    def test_set_fan_speed(self, controller, mock_ipmi):
         """Test setting fan speed."""
-        self.controller.connected = True
-        self.controller._set_manual_mode = Mock()
+        controller.connected = True
+        controller._set_manual_mode = Mock()
+        
+        controller.set_fan_speed(50)
         
-        self.controller.set_fan_speed(50)
+        controller._set_manual_mode.assert_called_once()
+        mock_ipmi.raw_command.assert_called()
+
+    def test_set_manual_mode_sent_once(self, controller, mock_ipmi):
+        """Test manual mode is only re-enabled after a disconnect."""
+        controller.connected = True
+        manual = call(
+            controller.IPMI_DELL_OEM_NETFN,
+            controller.IPMI_DELL_OEM_ENABLE_MANUAL_FAN_CMD,
+            0x01,
+        )
         
-        self.controller._set_manual_mode.assert_called_once()
-        self.mock_ipmi.raw_command.assert_called()
+        controller.set_fan_speed(30)
+        controller.set_fan_speed(40)
+        assert mock_ipmi.raw_command.call_args_list.count(manual) == 1
+        
+        controller.disconnect()
+        controller.connected = True
+        controller.set_fan_speed(50)
+        assert mock_ipmi.raw_command.call_args_list.count(manual) == 2
 
-    def test_set_automatic_control(self):
+    def test_set_automatic_control(self, controller, mock_ipmi):
         """Test enabling automatic fan control."""
-        self.controller.connected = True
+        controller.connected = True
         
-        self.controller.set_automatic_control()
+        controller.set_automatic_control()
         
-        self.mock_ipmi.raw_command.assert_called()
+        mock_ipmi.raw_command.assert_called()
 
+    def test_get_all_sensors(self, controller, mock_ipmi):
+        """Test reading fans and temperatures in one SDR pass."""
+        controller.connected = True
+        
+        def make_sensor(name, raw):
+            sensor = Mock()
+            sensor.name = name
+            sensor.id = name.lower().replace(" ", "_")
+            sensor.read_sensor.return_value = Mock(raw=raw, state="ok")
+            return sensor
+        
+        mock_ipmi.sdr_repository.get_sensor_list.return_value = [
+            make_sensor("Fan1", 3240),
+            make_sensor("Inlet Temp", 22),
+            make_sensor("Voltage 1", 230),
+            make_sensor("Fan Board Temp", 30),
+        ]
+        
+        sensors = controller.get_all_sensors()
+        
+        mock_ipmi.sdr_repository.get_sensor_list.assert_called_once()
+        assert [f["name"] for f in sensors["fans"]] == ["Fan1", "Fan Board Temp"]
+        assert [t["current_temp"] for t in sensors["temps"]] == [22]
 
-if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    def test_sensor_discovery_is_cached(self, controller, mock_ipmi):
+        """Test that the SDR is walked once and only cached sensors are re-read."""
+        controller.connected = True
+        
+        fan = Mock()
+        fan.name = "Fan1"
+        fan.read_sensor.return_value = Mock(raw=3240, state="ok")
+        temp = Mock()
+        temp.name = "CPU Temp"
+        temp.read_sensor.return_value = Mock(raw=45, state="ok")
+        mock_ipmi.sdr_repository.get_sensor_list.return_value = [fan, temp]
+        
+        controller.get_fan_speeds()
+        controller.get_temperature_sensors()
+        controller.get_temperature_sensors()
+        
+        mock_ipmi.sdr_repository.get_sensor_list.assert_called_once()
+        assert temp.read_sensor.call_count == 2
+        
+        # Disconnecting forgets the sensors
+        controller.disconnect()
+        controller.connected = True
+        controller.get_fan_speeds()
+        assert mock_ipmi.sdr_repository.get_sensor_list.call_count == 2
+
+    def test_get_highest_temperature(self, controller, mock_ipmi):
+        """Test the highest temperature comes straight from the sensor readings."""
+        controller.connected = True
+        controller.get_temperature_sensors = Mock()
+        
+        sensors = []
+        for name, raw in [("Inlet Temp", 22), ("CPU Temp", 61), ("Exhaust Temp", 35)]:
+            sensor = Mock()
+            sensor.name = name
+            sensor.read_sensor.return_value = Mock(raw=raw, state="ok")
+            sensors.append(sensor)
+        mock_ipmi.sdr_repository.get_sensor_list.return_value = sensors
+        
+        assert controller.get_highest_temperature() == 61
+        controller.get_temperature_sensors.assert_not_called()
+        
+        controller.invalidate_sensor_cache()
+        mock_ipmi.sdr_repository.get_sensor_list.return_value = []
+        assert controller.get_highest_temperature() == 0.0
@@ -1,35 +1,134 @@
 """Tests for the IPMI tool interface."""
 
+import signal
 import subprocess
-from unittest.mock import MagicMock, patch
+import sys
+import textwrap
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
-from ipmi_fan_control.ipmitool import DellIPMIToolFanController
+from ipmi_fan_control.ipmitool import (
+    BATCH_MARKER,
+    DellIPMIToolFanController,
+    _parse_sdr_row,
+)
+from ipmi_fan_control.sdr_cache import SDRCache
+
+# Minimal stand-in for ``ipmitool shell``: echoes each command like readline
+# does on a non-terminal stdin, then prints canned output and the prompt.
+FAKE_SHELL = textwrap.dedent("""
+    import sys
+
+    responses = {
+        "chassis status": ("System Power : on", ""),
+        "sdr type fan": ("Fan1 RPM | 30h | ok | 7.1 | 3240 RPM", ""),
+        "raw 0x30 0xF0": ("", "Unable to send RAW command"),
+    }
+
+    out = sys.stdout
+    out.write("ipmitool> ")
+    out.flush()
+    for line in sys.stdin:
+        command = line.strip()
+        if command == "quit":
+            break
+        stdout, stderr = responses.get(command, ("", "Invalid command: " + command))
+        out.write(command + "\\n")
+        if stdout:
+            out.write(stdout + "\\n")
+        if stderr:
+            sys.stderr.write(stderr + "\\n")
+            sys.stderr.flush()
+        out.write("ipmitool> ")
+        out.flush()
+""")
+
+
+
+def sdr_get_block(name, reading, status="ok"):
+    """Format one sensor the way ``ipmitool sdr get`` prints it."""
+    return textwrap.dedent(f"""\
+        Sensor ID              : {name} (0x30)
+         Entity ID             : 7.1 (System Board)
+         Sensor Type (Threshold)  : Temperature (0x01)
+         Sensor Reading        : {reading}
+         Status                : {status}
+         Upper critical        : 90.000
+        """)
+
+# Stand-in for ``ipmitool exec <file>``: runs each script line like ipmitool
+# does, dropping "#" comments and printing nothing for failed commands.
+FAKE_EXEC = textwrap.dedent("""
+    import sys
+
+    responses = {"chassis status": "System Power         : on"}
+
+    with open(sys.argv[2]) as script:
+        for line in script:
+            words = line.split("#", 1)[0].split()
+            if not words:
+                continue
+            if words[0] == "echo":
+                print(" ".join(words[1:]))
+            elif " ".join(words) in responses:
+                print(responses[" ".join(words)])
+            else:
+                sys.stderr.write("Unable to send RAW command (rsp=0xc1)\\n")
+""")
+
+
+@pytest.fixture
+def mock_run_command(monkeypatch):
+    """Replace DellIPMIToolFanController._run_command with a MagicMock.
+    
+    Tests set return_value / side_effect on the returned mock as needed.
+    """
+    mock = MagicMock()
+    monkeypatch.setattr(DellIPMIToolFanController, "_run_command", mock)
+    return mock
+
+
+@pytest.fixture
+def ipmitool_controller():
+    """Create a local controller without verifying the connection."""
+    return DellIPMIToolFanController(verify=False)
+
+
+@pytest.fixture
+def shell_controller(tmp_path):
+    """Create a controller connected to a fake ``ipmitool shell``."""
+    script = tmp_path / "fake_ipmitool.py"
+    script.write_text(FAKE_SHELL)
+    
+    controller = DellIPMIToolFanController(verify=False)
+    controller.base_cmd = [sys.executable, str(script)]
+    controller.connect()
+    yield controller
+    controller.disconnect()
 
 
 class TestDellIPMIToolFanController:
     """Test suite for the Dell IPMI Tool Fan Controller."""
 
     @patch('subprocess.run')
-    def test_initialization(self, mock_run):
+    def test_initialization(self, mock_run, ipmitool_controller):
         """Test controller initialization with default parameters."""
         # Mock successful output for test_connection during initialization
-        mock_process = MagicMock()
-        mock_process.stdout = "Chassis Power is on"
-        mock_process.stderr = ""
-        mock_run.return_value = mock_process
+        mock_run.return_value = SimpleNamespace(stdout="Chassis Power is on", stderr="", returncode=0)
         
-        controller = DellIPMIToolFanController(verify=False)
-        assert controller.host == "localhost"
-        assert controller.port == 623
-        assert controller.username == ""
-        assert controller.password == ""
-        assert controller.interface == "lanplus"
-        assert controller.connected is False
+        assert ipmitool_controller.host == "localhost"
+        assert ipmitool_controller.port == 623
+        assert ipmitool_controller.username == ""
+        assert ipmitool_controller.password == ""
+        assert ipmitool_controller.interface == "lanplus"
+        assert ipmitool_controller.connected is False
         
         # Base command should be built correctly
-        assert controller.base_cmd == ["ipmitool"]
+        assert ipmitool_controller.base_cmd == ["ipmitool"]
 
     @patch('subprocess.run')
     def test_initialization_with_remote_host(self, mock_run):
@@ -56,16 +155,12 @@ class TestDellIPMIToolFanController:
         assert "password" in controller.base_cmd
 
     @patch('subprocess.run')
-    def test_run_command_success(self, mock_run):
+    def test_run_command_success(self, mock_run, ipmitool_controller):
         """Test the _run_command method with successful command."""
         # Mock a successful command execution
-        mock_process = MagicMock()
-        mock_process.stdout = "Command output"
-        mock_process.stderr = ""
-        mock_run.return_value = mock_process
+        mock_run.return_value = SimpleNamespace(stdout="Command output", stderr="", returncode=0)
         
-        controller = DellIPMIToolFanController(verify=False)
-        result = controller._run_command("test command")
+        result = ipmitool_controller._run_command("test command")
         
         # Verify subprocess.run was called 
         assert mock_run.called
@@ -88,7 +183,6 @@ class TestDellIPMIToolFanController:
         
         assert "IPMI command failed" in str(excinfo.value)
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_test_connection(self, mock_run_command):
         """Test the connection test functionality."""
         mock_run_command.return_value = "Chassis Power is on"
@@ -100,7 +194,19 @@ class TestDellIPMIToolFanController:
         assert controller.connected is True
         assert mock_run_command.called
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
+    def test_test_connection_is_cached(self, mock_run_command):
+        """Test that a recent successful check is reused until it expires."""
+        mock_run_command.return_value = "Chassis Power is on"
+        controller = DellIPMIToolFanController(verify=False)
+        
+        assert controller.test_connection() is True
+        assert controller.test_connection() is True
+        assert mock_run_command.call_count == 1
+        
+        controller._last_verified -= controller.CONNECTION_TTL
+        controller.test_connection()
+        assert mock_run_command.call_count == 2
+
     def test_test_connection_failure(self, mock_run_command):
         """Test the connection test functionality when it fails."""
         mock_run_command.side_effect = RuntimeError("Connection failed")
@@ -145,7 +251,6 @@ class TestDellIPMIToolFanController:
             assert fans[0]["unit"] == "RPM"
             assert fans[0]["status"] == "ok"
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_get_temperature_sensors(self, mock_run_command):
         """Test getting temperature sensors."""
         # Mock sensor output for temperatures
@@ -164,7 +269,6 @@ class TestDellIPMIToolFanController:
         assert "degrees C" in temps[0]["unit"]
         assert temps[0]["status"] == "ok"
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_get_highest_temperature(self, mock_run_command):
         """Test getting highest temperature."""
         # Mock temperature sensor output
@@ -178,12 +282,10 @@ class TestDellIPMIToolFanController:
         
         assert highest_temp == 45.0
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     @patch.object(DellIPMIToolFanController, '_set_manual_mode')
-    def test_set_fan_speed(self, mock_set_manual, mock_run_command):
+    def test_set_fan_speed(self, mock_set_manual, mock_run_command, ipmitool_controller):
         """Test setting fan speed."""
-        controller = DellIPMIToolFanController(verify=False)
-        controller.set_fan_speed(50)
+        ipmitool_controller.set_fan_speed(50)
         
         # Should first set manual mode
         assert mock_set_manual.called
@@ -191,32 +293,44 @@ class TestDellIPMIToolFanController:
         # Should then set fan speed with the correct command
         assert mock_run_command.called
         args = mock_run_command.call_args[0][0]
-        assert controller.DELL_CMD_SET_FAN_SPEED in args
+        assert ipmitool_controller.DELL_CMD_SET_FAN_SPEED in args
         assert "0x32" in args  # 50 in hex
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
-    def test_set_automatic_control(self, mock_run_command):
+    def test_set_automatic_control(self, mock_run_command, ipmitool_controller):
         """Test enabling automatic fan control."""
-        controller = DellIPMIToolFanController(verify=False)
-        controller.set_automatic_control()
+        ipmitool_controller.set_automatic_control()
         
         assert mock_run_command.called
         args = mock_run_command.call_args[0][0]
-        assert controller.DELL_CMD_ENABLE_AUTO_FAN in args
+        assert ipmitool_controller.DELL_CMD_ENABLE_AUTO_FAN in args
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
-    def test_set_manual_mode(self, mock_run_command):
+    def test_set_manual_mode(self, mock_run_command, ipmitool_controller):
         """Test setting manual fan control mode."""
-        controller = DellIPMIToolFanController(verify=False)  # Skip verification on initialization
-        controller._set_manual_mode()
+        ipmitool_controller._set_manual_mode()
         
         # Check if the last call was for setting manual mode
-        mock_run_command.assert_called_with(controller.DELL_CMD_ENABLE_MANUAL_FAN)
+        mock_run_command.assert_called_with(ipmitool_controller.DELL_CMD_ENABLE_MANUAL_FAN)
         args = mock_run_command.call_args[0][0]
-        assert controller.DELL_CMD_ENABLE_MANUAL_FAN in args
+        assert ipmitool_controller.DELL_CMD_ENABLE_MANUAL_FAN in args
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
-    def test_get_fan_speeds_with_complex_output(self, mock_run_command):
+    def test_set_manual_mode_sent_once(self, mock_run_command, ipmitool_controller):
+        """Test manual mode is only re-enabled after returning to automatic."""
+        ipmitool_controller.set_fan_speed(30)
+        ipmitool_controller.set_fan_speed(40)
+        
+        manual = call(ipmitool_controller.DELL_CMD_ENABLE_MANUAL_FAN)
+        assert mock_run_command.call_args_list.count(manual) == 1
+        
+        ipmitool_controller.set_automatic_control()
+        ipmitool_controller._set_manual_mode()
+        assert mock_run_command.call_args_list.count(manual) == 2
+        
+        # Re-sent once the reassert interval has passed
+        ipmitool_controller._manual_mode_at -= ipmitool_controller.MANUAL_MODE_REASSERT
+        ipmitool_controller._set_manual_mode()
+        assert mock_run_command.call_args_list.count(manual) == 3
+
+    def test_get_fan_speeds_with_complex_output(self, mock_run_command, ipmitool_controller):
         """Test fan speed parsing with various output formats."""
         # Mock realistic ipmitool output
         sensor_output = """Fan1A RPM        | 30h | ok  | 7.1 | 3240 RPM
@@ -226,26 +340,46 @@ Inlet Temp       | 04h | ok  | 7.1 | 22 degrees C"""
         
         mock_run_command.return_value = sensor_output
         
-        controller = DellIPMIToolFanController(verify=False)
-        fans = controller.get_fan_speeds()
+        fans = ipmitool_controller.get_fan_speeds()
         
         # Should extract fans from the output (actual behavior may vary)
         assert isinstance(fans, list)
         
-    @patch.object(DellIPMIToolFanController, '_run_command')
-    def test_get_fan_speeds_no_fans_found(self, mock_run_command):
+    def test_get_fan_speeds_prefers_sdr_type_fan(self, mock_run_command, ipmitool_controller):
+        """Test that fans are read with 'sdr type fan', falling back to 'sensor reading'."""
+        mock_run_command.return_value = "Fan1A RPM        | 30h | ok  | 7.1 | 3240 RPM"
+        
+        fans = ipmitool_controller.get_fan_speeds()
+        
+        mock_run_command.assert_called_once_with("sdr type fan")
+        assert fans[0]["name"] == "Fan1A RPM"
+        assert fans[0]["current_speed"] == 3240.0
+        
+        mock_run_command.reset_mock()
+        mock_run_command.side_effect = [
+            RuntimeError("sdr failed"),
+            "Fan1A RPM | 30h | 3240 RPM",
+        ]
+        
+        fans = ipmitool_controller.get_fan_speeds()
+        
+        assert [c.args[0] for c in mock_run_command.call_args_list] == [
+            "sdr type fan",
+            "sensor reading",
+        ]
+        assert fans[0]["current_speed"] == 3240.0
+
+    def test_get_fan_speeds_no_fans_found(self, mock_run_command, ipmitool_controller):
         """Test when no fans are found in the output."""
         # Mock commands to return output without fan data
         mock_run_command.return_value = "Inlet Temp | 04h | ok | 7.1 | 22 degrees C"
         
-        controller = DellIPMIToolFanController(verify=False)
-        fans = controller.get_fan_speeds()
+        fans = ipmitool_controller.get_fan_speeds()
         
         # Should return empty list when no fans found
         assert fans == []
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
-    def test_get_temperature_sensors_parsing_edge_cases(self, mock_run_command):
+    def test_get_temperature_sensors_parsing_edge_cases(self, mock_run_command, ipmitool_controller):
         """Test temperature sensor parsing with various formats."""
         # Mock output with different temperature formats
         sensor_output = """Inlet Temp       | 04h | ok  |  7.1 | 22 degrees C
@@ -255,15 +389,13 @@ Outlet Temp      | 07h | ns  |  7.1 | No Reading"""
         
         mock_run_command.return_value = sensor_output
         
-        controller = DellIPMIToolFanController(verify=False)
-        temps = controller.get_temperature_sensors()
+        temps = ipmitool_controller.get_temperature_sensors()
         
         # Should find valid temperature sensors
         assert len(temps) >= 2
         assert any(temp['name'] == 'Inlet Temp' for temp in temps)
         assert any(temp['current_temp'] == 22 for temp in temps)
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_command_parsing_errors(self, mock_run_command):
         """Test handling of malformed command output."""
         # Mock malformed output
@@ -293,7 +425,6 @@ Outlet Temp      | 07h | ns  |  7.1 | No Reading"""
         
         assert "IPMI command failed" in str(exc_info.value)
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_configure_pid_integration(self, mock_run_command):
         """Test PID configuration integration."""
         controller = DellIPMIToolFanController(verify=False)
@@ -311,7 +442,6 @@ Outlet Temp      | 07h | ns  |  7.1 | No Reading"""
         assert controller.target_temp == 65.0
         assert controller.monitor_interval == 20.0
 
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_temperature_monitoring_lifecycle(self, mock_run_command):
         """Test temperature monitoring start/stop lifecycle."""
         controller = DellIPMIToolFanController(verify=False)
@@ -322,23 +452,24 @@ Outlet Temp      | 07h | ns  |  7.1 | No Reading"""
         # Mock temperature sensor output
         mock_run_command.return_value = "CPU Temp | 05h | ok | 3.1 | 45 degrees C"
         
-        # Start monitoring (should not hang in test)
-        import threading
-        def stop_monitoring():
-            import time
-            time.sleep(0.1)  # Let it run briefly
-            controller.stop_temperature_monitoring()
+        # Stop as soon as the loop has reported one tick instead of sleeping
+        ticked = threading.Event()
+        statuses = []
         
-        stop_thread = threading.Thread(target=stop_monitoring)
-        stop_thread.start()
+        def callback(status):
+            statuses.append(status)
+            ticked.set()
         
-        # This should run briefly and then stop
-        controller.start_temperature_monitoring(lambda status: None)
+        controller.start_temperature_monitoring(callback=callback)
+        assert ticked.wait(2.0)
+        controller.stop_temperature_monitoring()
         
-        stop_thread.join()
+        assert statuses[0]["temperature"] == 45.0
+        assert statuses[0]["target"] == 60.0
         
-        # Should have stopped
+        # Should have stopped, with the loop no longer running
         assert not controller.monitoring
+        assert controller.monitor_worker.wait_idle(0)
 
     def test_edge_case_initialization_params(self):
         """Test initialization with edge case parameters."""
@@ -356,7 +487,6 @@ Outlet Temp      | 07h | ns  |  7.1 | No Reading"""
         assert controller.port == 1623
         assert "very_long_username_that_might_cause_issues" in controller.base_cmd
         
-    @patch.object(DellIPMIToolFanController, '_run_command')
     def test_get_highest_temperature_edge_cases(self, mock_run_command):
         """Test highest temperature calculation with edge cases."""
         # Test with no temperature sensors
@@ -366,4 +496,456 @@ Outlet Temp      | 07h | ns  |  7.1 | No Reading"""
         
         # Should handle case with no sensors gracefully - returns default 60.0
         temp = controller.get_highest_temperature()
-        assert temp == 60.0  # Default fallback value based on actual implementation
\ No newline at end of file
+        assert temp == 60.0  # Default fallback value based on actual implementation
+
+    def test_parse_sdr_row(self):
+        """Test the split-based SDR row parser and the rows it leaves to the regexes."""
+        assert _parse_sdr_row("System Fan 1     | 33h | ok  |  7.1 | 3240 RPM") == (
+            "System Fan 1", "33h", "ok", 3240.0, ["RPM"]
+        )
+        assert _parse_sdr_row("Inlet Temp       | 04h | ok  |  7.1 | 19 degrees C") == (
+            "Inlet Temp", "04h", "ok", 19.0, ["degrees", "C"]
+        )
+        assert _parse_sdr_row("Fan2 RPM         | 31h | ns  |  7.1 | No Reading") is None
+        assert _parse_sdr_row("Inlet Temp : 19 C") is None
+
+    def test_connect_opens_persistent_shell(self, shell_controller):
+        """Test that connect() keeps a shell process open for later commands."""
+        assert shell_controller.connected is True
+        proc = shell_controller._shell_proc
+        assert proc is not None
+        
+        with patch('subprocess.run') as mock_run:
+            output = shell_controller._run_command("sdr type fan")
+            mock_run.assert_not_called()
+        
+        # The echoed command line is stripped from the output
+        assert output == "Fan1 RPM | 30h | ok | 7.1 | 3240 RPM"
+        assert shell_controller._shell_proc is proc
+
+    def test_shell_command_failure(self, shell_controller):
+        """Test that stderr-only shell responses raise like failed commands."""
+        with pytest.raises(RuntimeError) as excinfo:
+            shell_controller._run_command("raw 0x30 0xF0")
+        
+        assert "Unable to send RAW command" in str(excinfo.value)
+        # The session stays usable after a failed command
+        assert shell_controller._run_command("chassis status") == "System Power : on"
+
+    def test_dead_shell_is_restarted(self, shell_controller):
+        """Test that a shell that died mid-session is reopened for the next command."""
+        proc = shell_controller._shell_proc
+        proc.kill()
+        
+        with pytest.raises(RuntimeError):
+            shell_controller._run_command("chassis status")
+        assert shell_controller._shell_proc is None
+        
+        assert shell_controller._run_command("chassis status") == "System Power : on"
+        assert shell_controller._shell_proc not in (None, proc)
+
+    def test_disconnect_closes_shell(self, shell_controller):
+        """Test that disconnect() reaps the shell process."""
+        proc = shell_controller._shell_proc
+        shell_controller.disconnect()
+        
+        assert shell_controller._shell_proc is None
+        assert shell_controller.connected is False
+        assert proc.poll() is not None
+
+    @pytest.mark.skipif(not hasattr(signal, "pthread_sigmask"), reason="needs pthread_sigmask")
+    def test_children_do_not_inherit_blocked_signals(self, ipmitool_controller):
+        """Test that ipmitool children can be stopped although the CLI blocks SIGINT/SIGTERM."""
+        ipmitool_controller.base_cmd = [
+            sys.executable,
+            "-c",
+            "import signal; print(sorted(signal.pthread_sigmask(signal.SIG_BLOCK, [])))",
+        ]
+        
+        previous = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+        try:
+            output = ipmitool_controller._run_command("chassis status")
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, previous)
+        
+        assert output == "[]"
+
+    @patch('subprocess.Popen', side_effect=OSError("not found"))
+    @patch.object(DellIPMIToolFanController, 'test_connection')
+    def test_connect_without_shell_support(self, mock_test_connection, mock_popen):
+        """Test that connect() falls back to one-shot commands without a shell."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.connect()
+        
+        assert controller._shell_proc is None
+        mock_test_connection.assert_called_once()
+
+    def test_sensor_discovery_is_cached(self, mock_run_command, tmp_path):
+        """Test that discovered sensors are later read by name in one request."""
+        mock_run_command.return_value = """
+        Inlet Temp     | 04h | ok  | 7.1 | 22 degrees C
+        CPU Temp       | 05h | ok  | 3.1 | 45 degrees C
+        """
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        
+        controller.get_temperature_sensors()
+        mock_run_command.assert_called_with("sdr type temperature")
+        
+        # A new invocation picks up the persisted discovery
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        assert cache.get_sensors("temperature") == [
+            {"id": "04h", "name": "Inlet Temp", "unit": "degrees C"},
+            {"id": "05h", "name": "CPU Temp", "unit": "degrees C"},
+        ]
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        mock_run_command.return_value = (
+            sdr_get_block("Inlet Temp", "23 (+/- 1) degrees C")
+            + "\n"
+            + sdr_get_block("CPU Temp", "No Reading", "Not Available")
+        )
+        temps = controller.get_temperature_sensors()
+        
+        mock_run_command.assert_called_with(["sdr", "get", "Inlet Temp", "CPU Temp"])
+        # A sensor without a reading is still reported, as not available
+        assert temps == [
+            {
+                "id": "04h",
+                "name": "Inlet Temp",
+                "current_temp": 23.0,
+                "unit": "degrees C",
+                "status": "ok",
+            },
+            {
+                "id": "05h",
+                "name": "CPU Temp",
+                "current_temp": None,
+                "unit": "degrees C",
+                "status": "ns",
+            },
+        ]
+        assert controller.get_highest_temperature() == 23.0
+
+    def test_sensors_sharing_a_name_are_not_cached(self, mock_run_command, tmp_path):
+        """Test that duplicate sensor names keep using the per-type read."""
+        # Both CPU sensors are called "Temp" on many PowerEdge servers
+        mock_run_command.return_value = """
+        Inlet Temp     | 04h | ok  | 7.1 | 22 degrees C
+        Temp           | 0Eh | ok  | 3.1 | 45 degrees C
+        Temp           | 0Fh | ok  | 3.2 | 71 degrees C
+        """
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        cache.data["temperature"] = [
+            {"id": "0Eh", "name": "Temp", "unit": "degrees C"},
+            {"id": "0Fh", "name": "Temp", "unit": "degrees C"},
+        ]
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        
+        for _ in range(2):
+            mock_run_command.reset_mock()
+            assert controller.get_highest_temperature() == 71.0
+            mock_run_command.assert_called_once_with("sdr type temperature")
+        assert cache.get_sensors("temperature") is None
+
+    def test_cached_sensor_status_comes_from_bmc(self, mock_run_command, tmp_path):
+        """Test that cached reads report threshold states and the discovered units."""
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        cache.set_sensors("fan", [{"id": "30h", "name": "Fan1 RPM", "unit": "RPM"}])
+        cache.set_sensors("temperature", [{"id": "0Eh", "name": "Exhaust Temp", "unit": "degrees F"}])
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        mock_run_command.return_value = (
+            sdr_get_block("Fan1 RPM", "360 (+/- 120) RPM", "Lower Critical")
+            + "\n"
+            + sdr_get_block("Exhaust Temp", "203 (+/- 1) degrees F", "Upper Critical")
+        )
+        
+        sensors = controller.get_all_sensors()
+        
+        assert sensors["fans"][0]["status"] == "lcr"
+        assert sensors["temps"][0]["status"] == "ucr"
+        assert sensors["temps"][0]["unit"] == "degrees F"
+        assert sensors["temps"][0]["current_temp"] == 203.0
+
+    def test_stale_sensor_cache_is_rediscovered(self, mock_run_command, tmp_path):
+        """Test that an unreadable cached sensor list falls back to discovery."""
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        cache.set_sensors("fan", [{"id": "30h", "name": "Old Fan", "unit": "RPM"}])
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        
+        def run_command(command):
+            if isinstance(command, list):
+                raise RuntimeError("IPMI command failed: Unable to find sensor id 'Old Fan'")
+            if command == "sdr type fan":
+                return "Fan1 RPM | 30h | ok | 7.1 | 3240 RPM"
+            raise RuntimeError("IPMI command failed: invalid command")
+        
+        mock_run_command.side_effect = run_command
+        fans = controller.get_fan_speeds()
+        
+        assert fans[0]["name"] == "Fan1 RPM"
+        assert cache.get_sensors("fan") == [{"id": "30h", "name": "Fan1 RPM", "unit": "RPM"}]
+
+    def test_get_all_sensors_single_pass(self, mock_run_command, tmp_path):
+        """Test that fans and temperatures come from one SDR walk, then one read."""
+        mock_run_command.return_value = """
+        Fan1 RPM         | 30h | ok  |  7.1 | 3240 RPM
+        Inlet Temp       | 04h | ok  |  7.1 | 22 degrees C
+        Current 1        | 6Ah | ok  | 10.1 | 0.60 Amps
+        """
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        
+        sensors = controller.get_all_sensors()
+        
+        mock_run_command.assert_called_once_with("sdr elist full")
+        assert [fan["name"] for fan in sensors["fans"]] == ["Fan1 RPM"]
+        assert [temp["name"] for temp in sensors["temps"]] == ["Inlet Temp"]
+        
+        mock_run_command.reset_mock()
+        mock_run_command.return_value = (
+            sdr_get_block("Fan1 RPM", "3360 (+/- 120) RPM")
+            + "\n"
+            + sdr_get_block("Inlet Temp", "23 (+/- 1) degrees C")
+        )
+        sensors = controller.get_all_sensors()
+        
+        mock_run_command.assert_called_once_with(["sdr", "get", "Fan1 RPM", "Inlet Temp"])
+        assert sensors["fans"][0]["current_speed"] == 3360.0
+        assert sensors["temps"][0]["current_temp"] == 23.0
+
+    def test_missing_sensor_type_is_not_rescanned(self, mock_run_command, tmp_path):
+        """Test that a system without fans is not rescanned on every call."""
+        mock_run_command.return_value = "Inlet Temp | 19 degrees C | ok"
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        
+        assert controller.get_fan_speeds() == []
+        assert cache.is_empty("fan")
+        
+        mock_run_command.reset_mock()
+        assert controller.get_fan_speeds() == []
+        mock_run_command.assert_not_called()
+
+    def test_highest_temperature_from_cached_sensors(self, mock_run_command, tmp_path):
+        """Test that the highest temperature is one by-name read of cached sensors."""
+        cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+        cache.set_sensors("temperature", [
+            {"id": "04h", "name": "Inlet Temp", "unit": "degrees C"},
+            {"id": "05h", "name": "CPU Temp", "unit": "degrees C"},
+        ])
+        controller = DellIPMIToolFanController(verify=False, sdr_cache=cache)
+        mock_run_command.return_value = (
+            sdr_get_block("Inlet Temp", "23 (+/- 1) degrees C")
+            + "\n"
+            + sdr_get_block("CPU Temp", "58 (+/- 1) degrees C")
+        )
+        
+        assert controller.get_highest_temperature() == 58.0
+        mock_run_command.assert_called_once_with(["sdr", "get", "Inlet Temp", "CPU Temp"])
+
+    def test_run_command_batch_in_shell(self, shell_controller):
+        """Test that a batch runs through the open shell, one result per command."""
+        results = shell_controller._run_command_batch(["chassis status", "raw 0x30 0xF0"])
+        
+        assert results[0] == ("chassis status", "System Power : on", None)
+        assert results[1][0] == "raw 0x30 0xF0"
+        assert "Unable to send RAW command" in results[1][2]
+
+    @patch('subprocess.run')
+    def test_run_command_batch_with_exec(self, mock_run):
+        """Test that without a shell the batch is one 'ipmitool exec' run."""
+        mock_run.return_value = SimpleNamespace(
+            stdout=f"{BATCH_MARKER} 0\nSystem Power : on\n{BATCH_MARKER} 1\n",
+            stderr="Unable to send RAW command\n",
+            returncode=0,
+        )
+        controller = DellIPMIToolFanController(verify=False)
+        
+        results = controller._run_command_batch(["chassis status", "raw 0x30 0xF0"])
+        
+        mock_run.assert_called_once()
+        args = mock_run.call_args[0][0]
+        assert args[-2] == "exec"
+        assert mock_run.call_args.kwargs["check"] is False
+        assert results[0] == ("chassis status", "System Power : on", None)
+        assert "Unable to send RAW command" in results[1][2]
+
+    def test_run_command_batch_exec_transcript(self, tmp_path):
+        """Test that the batch markers survive ipmitool exec's comment handling."""
+        script = tmp_path / "fake_ipmitool.py"
+        script.write_text(FAKE_EXEC)
+        controller = DellIPMIToolFanController(verify=False)
+        controller.base_cmd = [sys.executable, str(script)]
+        
+        results = controller._run_command_batch(["chassis status", "raw 0x30 0xF0"])
+        
+        assert results[0] == ("chassis status", "System Power         : on", None)
+        assert results[1][0] == "raw 0x30 0xF0"
+        assert "Unable to send RAW command" in results[1][2]
+
+    def test_monitor_loop_skips_unchanged_fan_speed(self):
+        """Test that the monitor loop only writes fan speeds that changed."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.get_highest_temperature = MagicMock(return_value=45.0)
+        controller.pid = MagicMock(output_min=30.0, output_max=100.0)
+        controller.pid.compute.side_effect = [40.0, 40.4, 45.0]
+        controller.set_fan_speed = MagicMock(
+            side_effect=lambda speed: setattr(controller, "_last_speed", speed)
+        )
+        
+        # Stop after the third interval
+        ticks = []
+        
+        def fake_wait(seconds):
+            ticks.append(seconds)
+            return len(ticks) == 3
+        
+        controller._stop_event.wait = fake_wait
+        controller._temperature_monitor_loop()
+        
+        assert [c.args[0] for c in controller.set_fan_speed.call_args_list] == [40, 45]
+
+    def test_monitor_loop_rewrites_unchanged_speed_periodically(self):
+        """Test that an unchanged fan speed is still rewritten every few ticks."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.keepalive_ticks = 2
+        controller.get_highest_temperature = MagicMock(return_value=45.0)
+        controller.pid = MagicMock(output_min=30.0, output_max=100.0)
+        controller.pid.compute.return_value = 40.0
+        controller.set_fan_speed = MagicMock(
+            side_effect=lambda speed: setattr(controller, "_last_speed", speed)
+        )
+        
+        # Stop after the sixth interval
+        ticks = []
+        
+        def fake_wait(seconds):
+            ticks.append(seconds)
+            return len(ticks) == 6
+        
+        controller._stop_event.wait = fake_wait
+        controller._temperature_monitor_loop()
+        
+        # Written on ticks 1 and 4, skipped twice in between and after
+        assert controller.set_fan_speed.call_count == 2
+
+    def test_monitor_error_backoff_is_capped(self):
+        """Test that retry waits stop growing at MAX_ERROR_BACKOFF (plus jitter)."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.get_highest_temperature = MagicMock(side_effect=RuntimeError("BMC down"))
+        controller.set_fan_speed = MagicMock()
+        
+        waits = []
+        
+        def fake_wait(seconds):
+            waits.append(seconds)
+            return len(waits) == 30
+        
+        controller._stop_event.wait = fake_wait
+        with patch('ipmi_fan_control.ipmitool.logger'):
+            controller._temperature_monitor_loop()
+        
+        assert 8 <= waits[0] < 9
+        assert controller.MAX_ERROR_BACKOFF <= waits[-1] < controller.MAX_ERROR_BACKOFF + 1
+
+    def test_monitor_repeated_errors_logged_once(self):
+        """Test that a burst of identical errors is logged once, then summarized."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.get_highest_temperature = MagicMock(
+            side_effect=[RuntimeError("BMC busy")] * 5 + [45.0]
+        )
+        controller.pid = MagicMock(output_min=30.0, output_max=100.0)
+        controller.pid.compute.return_value = 40.0
+        controller.set_fan_speed = MagicMock()
+        
+        waits = []
+        
+        def fake_wait(seconds):
+            waits.append(seconds)
+            return len(waits) == 6
+        
+        controller._stop_event.wait = fake_wait
+        with patch('ipmi_fan_control.ipmitool.logger') as mock_logger:
+            controller._temperature_monitor_loop()
+        
+        mock_logger.error.assert_called_once_with(
+            "Error in temperature monitor (error #1): BMC busy"
+        )
+        # Escalation is still reported when the threshold is reached
+        mock_logger.critical.assert_called_once()
+        mock_logger.warning.assert_called_with("Previous monitor error repeated 4 more times")
+
+    def test_stop_wakes_monitor_thread(self):
+        """Test that stopping does not wait for the monitoring interval to elapse."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.test_connection = MagicMock()
+        controller.get_highest_temperature = MagicMock(return_value=45.0)
+        controller.set_fan_speed = MagicMock()
+        controller._set_manual_mode = MagicMock()
+        controller.set_automatic_control = MagicMock()
+        
+        controller.start_temperature_monitoring(interval=30.0)
+        started = time.monotonic()
+        controller.stop_temperature_monitoring()
+        
+        assert time.monotonic() - started < 1.0
+        assert controller.monitor_worker.wait_idle(0)
+        
+        # Restarting reuses the same worker thread
+        thread = controller.monitor_worker.thread
+        controller.start_temperature_monitoring()
+        assert controller.monitor_worker.thread is thread
+        controller.disconnect()
+
+    def test_restart_refused_while_old_loop_runs(self):
+        """Test that start waits for a loop stuck in a slow read instead of reusing it."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.test_connection = MagicMock()
+        controller.set_fan_speed = MagicMock()
+        controller._set_manual_mode = MagicMock()
+        controller.set_automatic_control = MagicMock()
+        
+        in_read = threading.Event()
+        release = threading.Event()
+        
+        def slow_read():
+            if threading.current_thread() is controller.monitor_worker.thread:
+                in_read.set()
+                release.wait(5.0)
+            return 45.0
+        
+        controller.get_highest_temperature = MagicMock(side_effect=slow_read)
+        controller.start_temperature_monitoring(interval=30.0)
+        assert in_read.wait(1.0)
+        
+        wait_idle = controller.monitor_worker.wait_idle
+        with patch.object(controller.monitor_worker, 'wait_idle', side_effect=lambda timeout: wait_idle(0.05)):
+            controller.stop_temperature_monitoring()
+            with pytest.raises(RuntimeError, match="still running"):
+                controller.start_temperature_monitoring(target_temp=70.0)
+        
+        # The old loop still sees its stop request
+        assert controller._stop_event.is_set()
+        assert not controller.monitoring
+        release.set()
+        assert controller.monitor_worker.wait_idle(1.0)
+        
+        controller.start_temperature_monitoring()
+        assert controller.monitoring
+        controller.disconnect()
+
+    def test_monitor_errors_go_through_logger(self):
+        """Test that monitor loop errors are logged rather than printed."""
+        controller = DellIPMIToolFanController(verify=False)
+        controller.get_highest_temperature = MagicMock(side_effect=RuntimeError("BMC busy"))
+        
+        def stop(seconds):
+            controller._stop_event.set()
+        
+        controller._stop_event.wait = stop
+        with patch('ipmi_fan_control.ipmitool.logger') as mock_logger:
+            controller._temperature_monitor_loop()
+        
+        mock_logger.error.assert_called_once_with(
+            "Error in temperature monitor (error #1): BMC busy"
+        )
@@ -3,8 +3,15 @@
 import importlib.util
 import subprocess
 import sys
+from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+from typer.testing import CliRunner
+
+import ipmi_fan_control
+from ipmi_fan_control.cli import app
+
 
 class TestMainEntryPoint:
     """Test the main entry point module."""
@@ -23,8 +30,8 @@ class TestMainEntryPoint:
         with patch('ipmi_fan_control.cli.app') as mock_app:
             # Load and execute the module as if it was run directly
             spec = importlib.util.spec_from_file_location(
-                "__main__", 
-                "/home/jsenecal/Code/ipmi-script/ipmi_fan_control/__main__.py"
+                "__main__",
+                Path(ipmi_fan_control.__file__).with_name("__main__.py")
             )
             main_module = importlib.util.module_from_spec(spec)
             
@@ -37,8 +44,16 @@ class TestMainEntryPoint:
             # The app should be called when executed directly
             mock_app.assert_called_once()
 
+    def test_help_output(self):
+        """Test that the CLI shows its help text (in-process)."""
+        result = CliRunner().invoke(app, ['--help'])
+        
+        assert result.exit_code == 0
+        assert 'Usage:' in result.output
+
+    @pytest.mark.slow
     def test_python_m_execution(self):
-        """Test that 'python -m ipmi_fan_control' works."""
+        """Test that 'python -m ipmi_fan_control' works (starts a new interpreter)."""
         # This test actually runs the module to ensure it can be imported
         # and executed without errors (but we'll make it fail fast)
         result = subprocess.run(
@@ -1,8 +1,5 @@
 """Tests for the PID Controller module."""
 
-import time
-from unittest.mock import patch
-
 import pytest
 
 from ipmi_fan_control.pid import PIDController
@@ -55,6 +52,21 @@ class TestPIDController:
         pid.set_setpoint(65.0)
         assert pid.setpoint == 65.0
 
+    def test_large_setpoint_change_resets_integral(self):
+        """Test a large setpoint jump restarts the integral from the output."""
+        pid = PIDController()
+        pid.set_setpoint(60.0)
+        pid.set_auto_mode(True)
+        pid.compute(70.0, now=0.0)
+        pid.integral = 500.0
+
+        # Small adjustments keep the accumulated integral
+        pid.set_setpoint(62.0)
+        assert pid.integral == 500.0
+
+        pid.set_setpoint(70.0)
+        assert pid.integral == pid.last_output
+
     def test_set_sample_time(self):
         """Test setting sample time with adjustment of gains."""
         pid = PIDController(ki=0.1, kd=0.1, sample_time=1.0)
@@ -69,37 +81,27 @@ class TestPIDController:
         assert pid.kd == original_kd / 2
         assert pid.sample_time == 2.0
 
-    def test_compute_below_setpoint(self):
-        """Test compute when temperature is below setpoint."""
-        pid = PIDController()
-        pid.set_setpoint(60.0)
-        pid.set_auto_mode(True)
-        
-        # Temperature below setpoint should result in minimum fan speed
-        output = pid.compute(55.0)
-        assert output == pytest.approx(pid.output_min, 0.1)
-
-    def test_compute_above_setpoint(self):
-        """Test compute when temperature is above setpoint."""
-        pid = PIDController()
-        pid.set_setpoint(60.0)
-        pid.set_auto_mode(True)
-        
-        # Temperature above setpoint should result in higher fan speed
-        output = pid.compute(65.0)
-        assert output > pid.output_min
-
-    def test_compute_at_setpoint(self):
-        """Test compute when temperature is at setpoint."""
+    @pytest.mark.parametrize(
+        "temp, check",
+        [
+            # Temperature below setpoint should result in minimum fan speed
+            pytest.param(55.0, lambda out, pid: out == pid.output_min, id="below_setpoint"),
+            # Temperature above setpoint should result in higher fan speed
+            pytest.param(65.0, lambda out, pid: out > pid.output_min, id="above_setpoint"),
+            # At setpoint, expect a moderate value between the output limits
+            pytest.param(
+                60.0, lambda out, pid: pid.output_min <= out < pid.output_max, id="at_setpoint"
+            ),
+        ],
+    )
+    def test_compute_relative_to_setpoint(self, temp, check):
+        """Test the first compute below, above and at the setpoint."""
         pid = PIDController()
         pid.set_setpoint(60.0)
         pid.set_auto_mode(True)
         
-        # At setpoint, should use a moderate fan speed
-        output = pid.compute(60.0)
-        # Expect a value equal to or above minimum (the base response at setpoint is 40.0)
-        assert output >= pid.output_min
-        assert output < pid.output_max
+        output = pid.compute(temp)
+        assert check(output, pid)
 
     def test_compute_respects_output_limits(self):
         """Test that compute respects output limits."""
@@ -108,22 +110,17 @@ class TestPIDController:
         pid.set_setpoint(60.0)
         pid.set_auto_mode(True)
         
-        # Bypass rate limiting by setting initialized to True and a previous output already at max
-        pid.initialized = True
-        pid.last_output = 80.0
-        pid.last_time = time.time() - 10.0  # Set last time 10 seconds ago to bypass rate limiting
+        # The first call only initialises the controller
+        pid.compute(80.0, now=0.0)
         
         # Extreme temperature difference to force hitting the limit
-        output = pid.compute(80.0)
-        # Given the base response curve and the rate limiting, we should expect a value close to max
-        assert output >= 75.0  # Using the base response at severe offset
+        output = pid.compute(80.0, now=10.0)
+        # The clamp returns the limit itself
+        assert output == pid.output_max
         
-        # Reset and try for min value
-        pid.initialized = True
-        pid.last_output = 40.0
-        pid.last_time = time.time() - 10.0
-        output = pid.compute(50.0)  # Below setpoint should use min
-        assert output <= 40.0
+        # Far below setpoint should use min
+        output = pid.compute(50.0, now=20.0)
+        assert output == pid.output_min
 
     def test_base_response_curve(self):
         """Test the base response curve calculation."""
@@ -148,26 +145,24 @@ class TestPIDController:
         assert response_far_above > response_above
         assert response_far_above <= 100.0
 
-    def test_rate_limiting(self):
-        """Test that fan speed changes are rate limited."""
-        pid = PIDController()
+    def test_anti_windup(self):
+        """Test that the integral does not wind up while the output is saturated."""
+        pid = PIDController(kp=2.0, ki=0.5, kd=0.0)
         pid.set_setpoint(60.0)
         pid.set_auto_mode(True)
         
-        # Initialize with a speed
-        pid.last_output = 50.0
-        pid.initialized = True
-        
-        # Mock time to control the exact time difference
-        with patch('time.time', return_value=100.0):
-            pid.last_time = 99.0  # 1 second ago
-            
-            # With max rate of 5% per second, and 1 second elapsed,
-            # the output should not change by more than 5%
-            output = pid.compute(70.0)  # Large error to force big change
-            
-            # Should be rate limited to 5% increase
-            assert output <= 55.0
+        # Ten minutes far above target, pinned at maximum cooling
+        for second in range(600):
+            output = pid.compute(90.0, now=float(second))
+        assert output == pid.output_max
+        
+        # The integral tracks the output limit instead of growing without bound
+        assert pid.integral <= pid.output_max
+        
+        # Once the temperature drops, fans are back at minimum within seconds
+        for second in range(600, 610):
+            output = pid.compute(55.0, now=float(second))
+        assert output == pid.output_min
 
     def test_integration_over_time(self):
         """Test the integral term accumulates over time."""
@@ -176,12 +171,10 @@ class TestPIDController:
         pid.set_auto_mode(True)
         
         # First computation with a small error
-        with patch('time.time', return_value=100.0):
-            output1 = pid.compute(61.0)  # Error = 1
+        output1 = pid.compute(61.0, now=100.0)  # Error = 1
         
         # Second computation with the same error, but later in time
-        with patch('time.time', return_value=101.0):
-            output2 = pid.compute(61.0)  # Error = 1, 1 second later
+        output2 = pid.compute(61.0, now=101.0)  # Error = 1, 1 second later
         
         # The integral term should have accumulated, making output2 > output1
-        assert output2 > output1
\ No newline at end of file
+        assert output2 > output1
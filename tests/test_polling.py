@@ -0,0 +1,70 @@
+"""Tests for adaptive sensor polling."""
+
+from unittest.mock import MagicMock
+
+from ipmi_fan_control.polling import AdaptivePoller
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_ticks(poller, clock, ticks, interval=10.0):
+    """Read once per monitoring interval."""
+    values = []
+    for _ in range(ticks):
+        values.append(poller.read())
+        clock.now += interval
+    return values
+
+
+def test_stable_readings_back_off():
+    """Test that unchanged readings skip BMC reads up to the backoff limit."""
+    clock = FakeClock()
+    read = MagicMock(return_value=50.0)
+    poller = AdaptivePoller(read, interval=10.0, max_backoff=4.0, clock=clock)
+    
+    values = run_ticks(poller, clock, 12)
+    
+    assert values == [50.0] * 12
+    # Polls at ticks 0, 1 (unchanged -> 2x), 3 (-> 4x), 7, 11
+    assert read.call_count == 5
+    assert poller.poll_interval == 40.0
+
+
+def test_change_resets_backoff():
+    """Test that a changed reading returns to polling every interval."""
+    clock = FakeClock()
+    read = MagicMock(return_value=50.0)
+    poller = AdaptivePoller(read, interval=10.0, max_backoff=4.0, clock=clock)
+    
+    run_ticks(poller, clock, 4)
+    assert poller.poll_interval == 40.0
+    
+    read.return_value = 55.0
+    clock.now = poller.next_poll
+    assert poller.read() == 55.0
+    assert poller.poll_interval == 10.0
+    
+    # The next interval polls the BMC again instead of waiting 4x
+    read.reset_mock()
+    clock.now += 10.0
+    poller.read()
+    read.assert_called_once()
+
+
+def test_no_backoff():
+    """Test that a backoff of 1 polls on every tick."""
+    clock = FakeClock()
+    read = MagicMock(return_value=50.0)
+    poller = AdaptivePoller(read, interval=10.0, max_backoff=1.0, clock=clock)
+    
+    run_ticks(poller, clock, 5)
+    
+    assert read.call_count == 5
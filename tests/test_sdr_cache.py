@@ -0,0 +1,64 @@
+"""Tests for the persistent SDR cache."""
+
+from ipmi_fan_control.sdr_cache import SDRCache, default_cache_dir
+
+
+def test_default_cache_dir_honors_xdg(monkeypatch, tmp_path):
+    """Test that the cache lives under XDG_CACHE_HOME."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_dir() == tmp_path / "ipmi-fan-control"
+
+
+def test_round_trip(tmp_path):
+    """Test that stored sensors survive a reload."""
+    cache = SDRCache.for_host("10.0.0.1", cache_dir=tmp_path)
+    assert cache.get_sensors("fan") is None
+    
+    cache.set_sensors(
+        "fan", [{"id": "30h", "name": "Fan1", "current_speed": 3240.0, "unit": "RPM"}]
+    )
+    
+    assert (tmp_path / "sdr-10.0.0.1.json").exists()
+    reloaded = SDRCache.for_host("10.0.0.1", cache_dir=tmp_path)
+    assert reloaded.get_sensors("fan") == [{"id": "30h", "name": "Fan1", "unit": "RPM"}]
+
+
+def test_invalidate(tmp_path):
+    """Test that invalidation is persisted."""
+    cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+    cache.set_sensors("fan", [{"id": "30h", "name": "Fan1", "unit": "RPM"}])
+    cache.set_sensors("temperature", [{"id": "04h", "name": "Inlet Temp", "unit": "degrees C"}])
+    
+    cache.invalidate("fan")
+    reloaded = SDRCache.for_host("localhost", cache_dir=tmp_path)
+    assert reloaded.get_sensors("fan") is None
+    assert reloaded.get_sensors("temperature") is not None
+    
+    reloaded.invalidate()
+    assert SDRCache.for_host("localhost", cache_dir=tmp_path).data == {}
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    """Test that an unreadable cache file starts an empty cache."""
+    (tmp_path / "sdr-localhost.json").write_text("{not json")
+    cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+    assert cache.data == {}
+
+
+def test_empty_types_expire(tmp_path, monkeypatch):
+    """Test that a missing sensor type is remembered for a limited time."""
+    cache = SDRCache.for_host("localhost", cache_dir=tmp_path)
+    monkeypatch.setattr("ipmi_fan_control.sdr_cache.time.time", lambda: 1000.0)
+    cache.mark_empty("fan")
+    
+    reloaded = SDRCache.for_host("localhost", cache_dir=tmp_path)
+    assert reloaded.is_empty("fan")
+    assert not reloaded.is_empty("temperature")
+    
+    monkeypatch.setattr("ipmi_fan_control.sdr_cache.time.time", lambda: 1061.0)
+    assert not reloaded.is_empty("fan")
+    assert reloaded.is_empty("fan", ttl=120.0)
+    
+    # Discovering sensors of the type clears the flag
+    reloaded.set_sensors("fan", [{"id": "30h", "name": "Fan1", "unit": "RPM"}])
+    assert not reloaded.is_empty("fan", ttl=120.0)
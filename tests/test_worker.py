@@ -0,0 +1,47 @@
+"""Tests for the reusable monitor worker thread."""
+
+import threading
+
+from ipmi_fan_control.worker import MonitorWorker
+
+
+def test_runs_target_on_one_thread():
+    """Test that every start runs the target on the same thread."""
+    threads = []
+    worker = MonitorWorker(lambda: threads.append(threading.current_thread()))
+    
+    for _ in range(3):
+        worker.start()
+        assert worker.wait_idle(1.0)
+    
+    assert len(threads) == 3
+    assert len(set(threads)) == 1
+    assert threads[0] is not threading.current_thread()
+    
+    worker.shutdown()
+    threads[0].join(1.0)
+    assert not threads[0].is_alive()
+
+
+def test_start_while_running_runs_again():
+    """Test that a start during a run is not lost."""
+    running = threading.Event()
+    release = threading.Event()
+    runs = []
+    
+    def target():
+        runs.append(len(runs))
+        running.set()
+        if len(runs) == 1:
+            release.wait(1.0)
+    
+    worker = MonitorWorker(target)
+    worker.start()
+    assert running.wait(1.0)
+    worker.start()
+    assert not worker.wait_idle(0.05)
+    
+    release.set()
+    assert worker.wait_idle(1.0)
+    assert runs == [0, 1]
+    worker.shutdown()